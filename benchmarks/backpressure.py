@@ -0,0 +1,56 @@
+"""
+Peak RSS of a concurrent loop over a large generator, with and without `max_in_flight`.
+
+Run from the repository root:
+
+    python -m benchmarks.backpressure --items 10000000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+
+from src.loop import loop_over
+
+
+def records(n: int):
+    for i in range(n):
+        yield bytes(64) + i.to_bytes(8, 'little')
+
+
+def run_one(how: str, items: int, max_in_flight) -> dict:
+    loop_over(records(items)).map(len).returning(outputs=False).concurrently(how, chunksize=64, max_in_flight=max_in_flight).exhaust()
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # kilobytes on Linux
+    return {'how': how, 'items': items, 'max_in_flight': max_in_flight, 'peak_rss_mb': peak_kb / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=10_000_000)
+    parser.add_argument('--how', choices=['threads', 'processes'], default='threads')
+    parser.add_argument('--max-in-flight', type=int, default=None)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(args.how, args.items, args.max_in_flight)))
+        return
+
+    # Each configuration runs in a fresh interpreter, so the peak RSS of one does not hide the other.
+    results = []
+
+    for max_in_flight in [None, 1024]:
+        cmd = [sys.executable, '-m', 'benchmarks.backpressure', '--child', '--items', str(args.items), '--how', args.how]
+
+        if max_in_flight is not None:
+            cmd += ['--max-in-flight', str(max_in_flight)]
+
+        output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
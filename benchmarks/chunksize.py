@@ -0,0 +1,63 @@
+"""
+Throughput of `chunksize="auto"` compared with fixed chunk sizes, for a very cheap and a very expensive function.
+
+Run from the repository root:
+
+    python -m benchmarks.chunksize --how processes
+
+For each function, `ratio_to_best` is the duration of each case divided by that of the fastest fixed chunk size.
+"""
+import argparse
+import json
+import time
+
+from src.loop import loop_over
+
+
+def cheap(x):
+    return x + 1
+
+
+def expensive(x):
+    for _ in range(20_000):
+        x = (x * 31 + 7) % 1_000_003
+
+    return x
+
+
+FUNCTIONS = {'cheap': (cheap, 200_000), 'expensive': (expensive, 2_000)}
+
+
+def measure(how: str, function, items: int, chunksize, num_workers: int, repeats: int) -> float:
+    durations = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        loop_over(range(items)).map(function).concurrently(how, num_workers=num_workers, chunksize=chunksize).exhaust()  # type: ignore
+        durations.append(time.perf_counter() - start)
+
+    return min(durations)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--how', choices=['threads', 'processes'], default='processes')
+    parser.add_argument('--chunksizes', type=int, nargs='+', default=[1, 16, 256, 4096])
+    parser.add_argument('--num-workers', type=int, default=4)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+
+    for name, (function, items) in FUNCTIONS.items():
+        seconds = {chunksize: measure(args.how, function, items, chunksize, args.num_workers, args.repeats) for chunksize in [*args.chunksizes, 'auto']}
+        best = min(duration for chunksize, duration in seconds.items() if chunksize != 'auto')
+
+        for chunksize, duration in seconds.items():
+            results.append({'function': name, 'items': items, 'chunksize': chunksize, 'seconds': duration, 'ratio_to_best': duration / best})
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Peak memory and duration of collecting a loop's return values into NumPy arrays with `to_numpy()` and `to_columns()`, compared with converting `list(loop)`.
+
+Run from the repository root:
+
+    python -m benchmarks.collect --items 50000000
+
+Memory is measured with `tracemalloc`, which slows everything down, so durations are measured in separate runs.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.loop import loop_range
+
+
+def half(x):
+    return x / 2
+
+
+CASES = {
+    'to_numpy': {
+        'list': lambda items: np.array(list(loop_range(items).map(half))),
+        'to_numpy': lambda items: loop_range(items).map(half).to_numpy(float),
+    },
+    'to_columns': {
+        'list': lambda items: tuple(np.array(column) for column in zip(*loop_range(items).map(half).returning(enumerations=True))),
+        'to_columns': lambda items: loop_range(items).map(half).returning(enumerations=True).to_columns([int, float]),
+    },
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    results = []
+
+    for group, cases in CASES.items():
+        for name, collect in cases.items():
+            start = time.perf_counter()
+            collect(args.items)
+            seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            collect(args.items)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results.append({'group': group, 'case': name, 'items': args.items, 'seconds': seconds, 'peak_mb': peak / 2 ** 20})
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Peak memory of a loop whose functions fail on 30% of the items, when the failures are kept with `exceptions="return"`, compared with `"collect"` and
+`"skip"` (see `concurrently()`).
+
+Run from the repository root:
+
+    python -m benchmarks.errors
+
+Each item decodes a 64 KB buffer, which is still referenced by the frame of the failed call, so every exception kept (through its traceback) keeps its
+buffer alive. Runs on threads (with processes, exceptions are pickled without their tracebacks anyway). Memory is measured with `tracemalloc`, which slows
+everything down, so durations are measured in separate runs.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from src.loop import loop_over
+
+
+def parse(i):
+    buffer = bytearray(64 * 1024)
+
+    if i % 10 < 3:
+        raise ValueError(f'Item {i} is corrupt')
+
+    return len(buffer)
+
+
+def run(exceptions: str, items: int, num_workers: int) -> list:
+    return list(loop_over(range(items)).map(parse).concurrently('threads', num_workers=num_workers, exceptions=exceptions))  # type: ignore
+
+
+def measure(exceptions: str, items: int, num_workers: int) -> dict:
+    start = time.perf_counter()
+    results = run(exceptions, items, num_workers)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    run(exceptions, items, num_workers)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'exceptions': exceptions, 'items': items, 'results': len(results), 'seconds': seconds, 'peak_mb': peak / 2 ** 20}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num-workers', type=int, default=4)
+    parser.add_argument('--items', type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(json.dumps([measure(exceptions, args.items, args.num_workers) for exceptions in ['return', 'collect', 'skip']], indent=2))
+
+
+if __name__ == '__main__':
+    main()
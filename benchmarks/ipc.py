@@ -0,0 +1,109 @@
+"""
+Bytes sent between the parent and process workers per item, and the resulting throughput, for large inputs.
+
+The bytes are counted as they are written to the pipes of the pool (by wrapping `_send_bytes()` of `multiprocess`' connections before the workers are
+forked, so this needs the `fork` start method): `task_bytes` are those the parent sends to the workers, and `result_bytes` those the workers send back,
+both per item.
+
+With `--baseline`, the same measurements are also run on another checkout of the repository, e.g. on the commit before workers stopped sending the inputs
+back, and reported as `..._before`:
+
+    git worktree add /tmp/loop-before <commit>
+    python -m benchmarks.ipc --baseline /tmp/loop-before
+
+Run from the repository root:
+
+    python -m benchmarks.ipc
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from multiprocess import connection  # type: ignore
+import multiprocess  # type: ignore
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RETURNING: List[dict] = [{}, {'inputs': True}, {'enumerations': True, 'outputs': False}]
+
+
+def checksum(document: bytes) -> int:
+    return sum(document[::4096])
+
+
+def count_sent_bytes() -> Dict[str, 'multiprocess.Value']:
+    """Count the bytes written to `multiprocess`' connections, by the parent (`'tasks'`) and by any other process (`'results'`)."""
+    parent = os.getpid()
+    sent = {'tasks': multiprocess.Value('q', 0), 'results': multiprocess.Value('q', 0)}
+    send_bytes = connection.Connection._send_bytes  # Which both `send()` (used for the tasks) and `send_bytes()` (for the results) write with.
+
+    def counting_send_bytes(self, buf):
+        counter = sent['tasks' if os.getpid() == parent else 'results']
+        with counter.get_lock():
+            counter.value += memoryview(buf).nbytes
+        send_bytes(self, buf)
+
+    connection.Connection._send_bytes = counting_send_bytes
+    return sent
+
+
+def measure(root: str, size: int, items: int) -> List[dict]:
+    sys.path.insert(0, root)
+    from src.loop import loop_over  # From `root`, which may be another checkout.
+
+    sent = count_sent_bytes()
+    document = bytes(size)
+    results = []
+
+    for returning in RETURNING:
+        for counter in sent.values():
+            counter.value = 0
+
+        start = time.perf_counter()
+        loop_over(document for _ in range(items)).map(checksum).returning(**returning).concurrently('processes').exhaust()
+        elapsed = time.perf_counter() - start
+
+        results.append({'returning': returning, 'task_bytes': sent['tasks'].value / items, 'result_bytes': sent['results'].value / items,
+                        'items_per_second': items / elapsed})
+
+    return results
+
+
+def measure_baseline(baseline: str, size: int, items: int) -> List[dict]:
+    command = [sys.executable, '-m', 'benchmarks.ipc', '--root', os.path.abspath(baseline), '--size', str(size), '--items', str(items)]
+    return json.loads(subprocess.run(command, cwd=ROOT, stdout=subprocess.PIPE, check=True).stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--baseline', help='path to another checkout of the repository, measured as "before"')
+    parser.add_argument('--root', default=ROOT, help=argparse.SUPPRESS)  # The checkout measured, see `measure_baseline()`.
+    args = parser.parse_args()
+
+    after = measure(args.root, args.size, args.items)
+
+    if args.baseline is None:
+        results = [{'input_bytes': args.size, **result} for result in after]
+    else:
+        before = measure_baseline(args.baseline, args.size, args.items)
+        results = []
+
+        for b, a in zip(before, after):
+            result = {'input_bytes': args.size, 'returning': a['returning']}
+
+            for key in ['task_bytes', 'result_bytes', 'items_per_second']:
+                result[f'{key}_before'], result[f'{key}_after'] = b[key], a[key]
+
+            results.append(result)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Per-item overhead of a sequential loop, compared with an equivalent hand-written generator.
+
+Run from the repository root:
+
+    python -m benchmarks.overhead
+"""
+import argparse
+import json
+import timeit
+
+from src.loop import loop_over
+
+
+def increment(x):
+    return x + 1
+
+
+def is_even(x):
+    return x % 2 == 0
+
+
+def hand_written_0(data):
+    for x in data:
+        if is_even(x):
+            yield x
+
+
+def hand_written_1(data):
+    for x in data:
+        x = increment(x)
+        if is_even(x):
+            yield x
+
+
+def hand_written_3(data):
+    for x in data:
+        x = increment(x)
+        x = increment(x)
+        x = increment(x)
+        if is_even(x):
+            yield x
+
+
+def hand_written_10(data):
+    for x in data:
+        x = increment(increment(increment(increment(increment(increment(increment(increment(increment(increment(x))))))))))
+        if is_even(x):
+            yield x
+
+
+HAND_WRITTEN = {0: hand_written_0, 1: hand_written_1, 3: hand_written_3, 10: hand_written_10}
+
+
+def measure(stages: int, items: int, repeats: int) -> dict:
+    data = list(range(items))
+
+    def hand_written():
+        for _ in HAND_WRITTEN[stages](data):
+            pass
+
+    def looped():
+        loop = loop_over(data)
+
+        for _ in range(stages):
+            loop = loop.map(increment)
+
+        for _ in loop.filter(is_even):
+            pass
+
+    baseline = min(timeit.repeat(hand_written, number=1, repeat=repeats))
+    actual = min(timeit.repeat(looped, number=1, repeat=repeats))
+
+    return {'stages': stages, 'items': items, 'hand_written_ns_per_item': 1e9 * baseline / items, 'loop_ns_per_item': 1e9 * actual / items, 'ratio': actual / baseline}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=1_000_000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps([measure(stages, args.items, args.repeats) for stages in HAND_WRITTEN], indent=2))
+
+
+if __name__ == '__main__':
+    main()
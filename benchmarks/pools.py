@@ -0,0 +1,49 @@
+"""
+Per-loop latency of short loops, running on a fresh pool per loop (cold) versus a shared persistent pool (warm).
+
+Run from the repository root:
+
+    python -m benchmarks.pools
+"""
+import argparse
+import json
+import statistics
+import time
+
+from src.loop import loop_over, pools
+
+
+def measure(how: str, num_workers: int, items: int, repeats: int, warm: bool) -> dict:
+    shared = pools.PoolHandle(how, num_workers) if warm else None
+    latencies = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        handle = shared or pools.PoolHandle(how, num_workers)
+        loop_over(range(items)).map(abs).concurrently(pool=handle).exhaust()
+
+        if not warm:
+            handle.shutdown()
+
+        latencies.append(time.perf_counter() - start)
+
+    if shared is not None:
+        shared.shutdown()
+
+    return {'how': how, 'num_workers': num_workers, 'items': items, 'pool': 'warm' if warm else 'cold',
+            'median_ms': 1000 * statistics.median(latencies), 'max_ms': 1000 * max(latencies)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--num-workers', type=int, default=4)
+    parser.add_argument('--items', type=int, default=100)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    results = [measure(how, args.num_workers, args.items, args.repeats, warm) for how in ['threads', 'processes'] for warm in [False, True]]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
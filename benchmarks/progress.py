@@ -0,0 +1,63 @@
+"""
+Per-item overhead of `show_progress()` on a fast sequential loop, with tqdm updated on every item versus coalesced updates.
+
+Run from the repository root:
+
+    python -m benchmarks.progress --items 10000000
+"""
+import argparse
+import io
+import json
+import time
+
+from src.loop import loop_over
+
+
+def increment(x):
+    return x + 1
+
+
+CONFIGURATIONS = {
+    'per item': dict(),
+    'per item, refresh': dict(refresh=True),
+    'update_every=10000': dict(update_every=10_000),
+    'update_interval=0.1': dict(update_interval=0.1),
+    'update_interval=0.1, refresh': dict(update_interval=0.1, refresh=True),
+}
+
+
+def run(items: int, progress) -> float:
+    loop = loop_over(range(items)).map(increment)
+
+    if progress is not None:
+        # Drawing to an in-memory file measures the cost of updating the bar rather than that of the terminal.
+        loop = loop.show_progress(total=len, file=io.StringIO(), **progress)
+
+    start = time.perf_counter()
+    loop.exhaust()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=10_000_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--skip-per-item', action='store_true', help='skip the (slow) configurations which update tqdm on every item')
+    args = parser.parse_args()
+
+    baseline = min(run(args.items, None) for _ in range(args.repeats))
+    results = []
+
+    for name, progress in CONFIGURATIONS.items():
+        if args.skip_per_item and name.startswith('per item'):
+            continue
+
+        actual = min(run(args.items, progress) for _ in range(args.repeats))
+        results.append({'progress': name, 'items': args.items, 'loop_ns_per_item': 1e9 * actual / args.items,
+                        'overhead_ns_per_item': 1e9 * (actual - baseline) / args.items, 'ratio': actual / baseline})
+
+    print(json.dumps({'no_progress_ns_per_item': 1e9 * baseline / args.items, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
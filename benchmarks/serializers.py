@@ -0,0 +1,54 @@
+"""
+Per-item cost of sending items to worker processes and their results back, with each serializer (see `serializer` in `concurrently()`), for a function
+which does nothing, so the time is all overhead.
+
+Run from the repository root:
+
+    python -m benchmarks.serializers
+
+`dill` sends through pathos' pool, and `pickle` and `cloudpickle` through a `concurrent.futures.ProcessPoolExecutor`, where the loop's functions are
+serialized once per worker, and the items and results with `pickle`.
+"""
+import argparse
+import importlib.util
+import json
+import time
+
+from src.loop import loop_over
+
+
+def identity(x):
+    return x
+
+
+PAYLOADS = {
+    'int': lambda i: i,
+    'dict': lambda i: {'id': i, 'name': f'item-{i}', 'tags': ['a', 'b', 'c'], 'score': i / 3},
+    'bytes': lambda i: bytes(1024),
+}
+
+
+def measure(serializer: str, payload: str, items: int, chunksize: int, num_workers: int) -> dict:
+    data = [PAYLOADS[payload](i) for i in range(items)]
+    start = time.perf_counter()
+    loop_over(data).map(identity).concurrently('processes', num_workers=num_workers, serializer=serializer, chunksize=chunksize).exhaust()
+    seconds = time.perf_counter() - start
+    return {'serializer': serializer, 'payload': payload, 'chunksize': chunksize, 'items': items, 'us_per_item': 1e6 * seconds / items}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num-workers', type=int, default=4)
+    parser.add_argument('--items', type=int, default=20_000)
+    parser.add_argument('--chunksizes', type=int, nargs='+', default=[1, 64])
+    parser.add_argument('--payloads', choices=list(PAYLOADS), nargs='+', default=list(PAYLOADS))
+    args = parser.parse_args()
+
+    serializers = ['dill', 'pickle'] + (['cloudpickle'] if importlib.util.find_spec('cloudpickle') else [])
+    results = [measure(serializer, payload, args.items, chunksize, args.num_workers)
+               for payload in args.payloads for chunksize in args.chunksizes for serializer in serializers]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
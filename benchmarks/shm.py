@@ -0,0 +1,48 @@
+"""
+Throughput of a process pool on large NumPy arrays, with arrays pickled through the pool's pipes versus passed through shared memory.
+
+Run from the repository root:
+
+    python -m benchmarks.shm --megabytes 10
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.loop import loop_over
+
+
+def arrays(count: int, megabytes: float):
+    for i in range(count):
+        yield np.full(int(megabytes * 2**20) // 8, i, dtype=np.float64)
+
+
+def measure(transport: str, count: int, megabytes: float, num_workers: int, repeats: int) -> dict:
+    durations = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        loop_over(arrays(count, megabytes)).map(np.negative).concurrently('processes', num_workers=num_workers, transport=transport).exhaust()  # type: ignore
+        durations.append(time.perf_counter() - start)
+
+    best = min(durations)
+    return {'transport': transport, 'arrays': count, 'megabytes_per_array': megabytes, 'num_workers': num_workers, 'seconds': best,
+            'arrays_per_second': count / best, 'megabytes_per_second': count * megabytes / best}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--arrays', type=int, default=200)
+    parser.add_argument('--megabytes', type=float, default=10)
+    parser.add_argument('--num-workers', type=int, default=4)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    results = [measure(transport, args.arrays, args.megabytes, args.num_workers, args.repeats) for transport in ['pickle', 'shm']]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
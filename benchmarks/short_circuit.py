@@ -0,0 +1,72 @@
+"""
+Time-to-answer of a search through 1M items with `find()`, and how long the pool stays busy afterwards, compared with breaking out of a `for` statement
+while the iteration is kept alive (so it is not stopped until garbage collected).
+
+Run from the repository root:
+
+    python -m benchmarks.short_circuit
+
+`answer_ms` is the time until the answer is known, and `idle_ms` the time until a persistent pool (see `loop.pools`) finishes a single follow-up item,
+which is how long it kept burning CPU on results nobody reads. With `break`, that is until all the items are done, which takes minutes with processes
+(use `--items` or `--methods find` for a quicker run).
+"""
+import argparse
+import json
+import time
+
+from src.loop import loop_over, pools
+
+
+def work(x):
+    for _ in range(200):
+        x = (x * 31 + 7) % 1_000_003
+
+    return x
+
+
+def is_target(target):
+    def predicate(x):
+        return x == target
+
+    return predicate
+
+
+def measure(how: str, num_workers: int, items: int, position: int, method: str) -> dict:
+    handle = pools.PoolHandle(how, num_workers)
+    loop_over(range(num_workers)).map(abs).concurrently(pool=handle).exhaust()  # Warm up the workers.
+    target = work(position)
+
+    start = time.perf_counter()
+    loop = loop_over(range(items)).map(work).concurrently(pool=handle)
+
+    if method == 'find':
+        found = loop.find(is_target(target))
+    else:
+        iterator = iter(loop)
+
+        for found in iterator:
+            if found == target:
+                break
+
+    answered = time.perf_counter()
+    loop_over([0]).map(abs).concurrently(pool=handle).exhaust()
+    idle = time.perf_counter()
+    handle.shutdown()
+
+    return {'how': how, 'method': method, 'items': items, 'position': position, 'answer_ms': 1000 * (answered - start), 'idle_ms': 1000 * (idle - answered)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num-workers', type=int, default=4)
+    parser.add_argument('--items', type=int, default=1_000_000)
+    parser.add_argument('--position', type=int, default=1_000)
+    parser.add_argument('--methods', choices=['break', 'find'], nargs='+', default=['break', 'find'])
+    args = parser.parse_args()
+
+    results = [measure(how, args.num_workers, args.items, args.position, method) for how in ['threads', 'processes'] for method in args.methods]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
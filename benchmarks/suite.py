@@ -0,0 +1,189 @@
+"""
+Benchmark suite measuring the per-item cost of loops, compared with a plain `for` loop doing the same work.
+
+Groups:
+    stages: sequential loops with 0 to 10 `map()` stages.
+    returning: every combination of `returning()`.
+    filtering: a single `filter()` at various skip rates.
+    backends: the threads and processes backends at various `chunksize` values.
+    progress: `show_progress()` with and without `refresh`, and with coalesced updates.
+
+Run from the repository root:
+
+    python -m benchmarks.suite > baseline.json
+    # ... change something ...
+    python -m benchmarks.suite --baseline baseline.json
+
+With `--baseline`, cases which got slower than the baseline by more than `--tolerance` are reported to stderr, and the exit code is 1.
+"""
+from typing import Callable, Dict, Iterator, List
+import argparse
+import io
+import itertools
+import json
+import platform
+import sys
+import timeit
+
+from src.loop import loop_over
+
+
+def increment(x):
+    return x + 1
+
+
+def keep_below(threshold):
+    def predicate(x):
+        return x % 100 < threshold
+
+    return predicate
+
+
+def plain_0(data):
+    for x in data:
+        pass
+
+
+def plain_1(data):
+    for x in data:
+        x = increment(x)
+
+
+def plain_3(data):
+    for x in data:
+        x = increment(increment(increment(x)))
+
+
+def plain_10(data):
+    for x in data:
+        x = increment(increment(increment(increment(increment(increment(increment(increment(increment(increment(x))))))))))
+
+
+PLAIN = {0: plain_0, 1: plain_1, 3: plain_3, 10: plain_10}
+
+
+def case(group: str, name: str, items: int, loop: Callable[[], None], baseline: Callable[[], None], repeats: int) -> dict:
+    loop_s = min(timeit.repeat(loop, number=1, repeat=repeats))
+    baseline_s = min(timeit.repeat(baseline, number=1, repeat=repeats))
+    return {'group': group, 'name': name, 'items': items, 'loop_ns_per_item': 1e9 * loop_s / items, 'plain_ns_per_item': 1e9 * baseline_s / items,
+            'ratio': loop_s / baseline_s}
+
+
+def bench_stages(items: int, repeats: int) -> Iterator[dict]:
+    data = list(range(items))
+
+    for stages, plain in PLAIN.items():
+        def looped():
+            loop = loop_over(data)
+
+            for _ in range(stages):
+                loop = loop.map(increment)
+
+            loop.exhaust()
+
+        yield case('stages', f'{stages} stages', items, looped, lambda: plain(data), repeats)
+
+
+def bench_returning(items: int, repeats: int) -> Iterator[dict]:
+    data = list(range(items))
+
+    for enumerations, inputs, outputs in itertools.product([False, True], repeat=3):
+        def looped():
+            for _ in loop_over(data).map(increment).returning(enumerations, inputs, outputs):  # type: ignore
+                pass
+
+        name = f'enumerations={enumerations}, inputs={inputs}, outputs={outputs}'
+        yield case('returning', name, items, looped, lambda: plain_1(data), repeats)
+
+
+def bench_filtering(items: int, repeats: int) -> Iterator[dict]:
+    data = list(range(items))
+
+    for skip_percent in [0, 50, 90, 100]:
+        predicate = keep_below(100 - skip_percent)
+
+        def looped():
+            loop_over(data).filter(predicate).exhaust()
+
+        def plain():
+            for x in data:
+                if not predicate(x):
+                    continue
+
+        yield case('filtering', f'{skip_percent}% skipped', items, looped, plain, repeats)
+
+
+def bench_backends(items: int, repeats: int) -> Iterator[dict]:
+    data = list(range(items))
+
+    for how, chunksize in itertools.product(['threads', 'processes'], [1, 64, 1024]):
+        def looped():
+            loop_over(data).map(increment).concurrently(how, chunksize=chunksize).exhaust()  # type: ignore
+
+        yield case('backends', f'{how}, chunksize={chunksize}', items, looped, lambda: plain_1(data), repeats)
+
+
+def bench_progress(items: int, repeats: int) -> Iterator[dict]:
+    data = list(range(items))
+
+    for name, progress in [('refresh=False', dict()), ('refresh=True', dict(refresh=True)), ('update_interval=0.1', dict(update_interval=0.1))]:
+        def looped():
+            # Drawing to an in-memory file measures the cost of updating the bar rather than that of the terminal.
+            loop_over(data).map(increment).show_progress(total=len, file=io.StringIO(), **progress).exhaust()  # type: ignore
+
+        yield case('progress', name, items, looped, lambda: plain_1(data), repeats)
+
+
+GROUPS: Dict[str, Callable[[int, int], Iterator[dict]]] = {
+    'stages': bench_stages,
+    'returning': bench_returning,
+    'filtering': bench_filtering,
+    'backends': bench_backends,
+    'progress': bench_progress,
+}
+
+
+def regressions(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    previous = {(result['group'], result['name']): result for result in baseline}
+    messages = []
+
+    for result in results:
+        before = previous.get((result['group'], result['name']))
+
+        # Compare ratios rather than absolute times, so that a noisy (or different) machine affects both sides alike.
+        if before is not None and result['ratio'] > before['ratio'] * (1 + tolerance):
+            messages.append(f"{result['group']}: {result['name']}: ratio {before['ratio']:.2f} -> {result['ratio']:.2f}")
+
+    return messages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--groups', nargs='+', choices=list(GROUPS), default=list(GROUPS))
+    parser.add_argument('--items', type=int, default=200_000)
+    parser.add_argument('--backend-items', type=int, default=20_000, help='number of items for the `backends` group, which is much slower per item')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--baseline', type=argparse.FileType('r'), default=None, help='JSON output of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='relative slowdown which is reported as a regression')
+    args = parser.parse_args()
+
+    results = []
+
+    for group in args.groups:
+        items = args.backend_items if group == 'backends' else args.items
+        results.extend(GROUPS[group](items, args.repeats))
+
+    print(json.dumps({'python': platform.python_version(), 'machine': platform.machine(), 'results': results}, indent=2))
+
+    if args.baseline is not None:
+        messages = regressions(results, json.load(args.baseline)['results'], args.tolerance)
+
+        for message in messages:
+            print(f'Regression in {message}', file=sys.stderr)
+
+        if messages:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
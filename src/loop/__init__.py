@@ -1,11 +1,16 @@
-from importlib.metadata import version, PackageNotFoundError
+from .core import Loop, loop_over, loop_range
+from . import pools, caching, progress, supervision, errors
 
 
-# From: https://setuptools-scm.readthedocs.io/en/latest/usage/#version-at-runtime
-try:
-    __version__ = version("loop-python")
-except PackageNotFoundError:
-    pass  # package is not installed
+def __getattr__(name: str):
+    # The version is looked up on first use, since importing `importlib.metadata` is slow.
+    if name == '__version__':
+        from importlib.metadata import version, PackageNotFoundError
 
+        # From: https://setuptools-scm.readthedocs.io/en/latest/usage/#version-at-runtime
+        try:
+            return version("loop-python")
+        except PackageNotFoundError:
+            pass  # package is not installed
 
-from .core import Loop, loop_over, loop_range
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
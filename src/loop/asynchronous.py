@@ -0,0 +1,137 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Tuple, List, Callable, Union, TypeVar, Any
+from collections import deque
+from inspect import isawaitable
+
+from .functional import skipped
+
+
+T = TypeVar('T')
+
+
+class AsyncioPool:
+    """Marks a loop as running its coroutine functions on an event loop, with up to `num_workers` of them awaited concurrently."""
+    def __init__(self, num_workers: int):
+        self.num_workers = num_workers
+
+
+def is_async_iterable(iterable: Any) -> bool:
+    return hasattr(iterable, '__aiter__')
+
+
+async def aenumerate(iterable: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[Tuple[int, T]]:
+    i = 0
+
+    if is_async_iterable(iterable):
+        async for item in iterable:  # type: ignore
+            yield i, item
+            i += 1
+    else:
+        for item in iterable:  # type: ignore
+            yield i, item
+            i += 1
+
+
+async def amap(stages: List[Tuple[Callable, bool]], items: AsyncIterator[Tuple[int, Any]], limit: int, ordered: bool) -> AsyncIterator[Tuple[int, Any, bool, Any]]:
+    """Asynchronous counterpart of `pool.imap()`, keeping at most `limit` items in flight."""
+    import asyncio
+
+    tasks: Any = deque() if ordered else set()
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(tasks) < limit:
+                try:
+                    item = await items.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                else:
+                    task = asyncio.ensure_future(_apply_maps_and_filters_async(stages, item))
+
+                    if ordered:
+                        tasks.append(task)
+                    else:
+                        tasks.add(task)
+
+            if not tasks:
+                return
+
+            if ordered:
+                yield await tasks.popleft()
+            else:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    yield task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _apply_maps_and_filters_async(stages, item):
+    i, inp = item
+    out = inp
+    exception = False
+
+    try:
+        for function, filtering in stages:
+            result = function(out)
+
+            if isawaitable(result):
+                result = await result
+
+            if filtering:
+                if not result:
+                    out = skipped
+                    break
+            else:
+                out = result
+    except Exception as e:
+        out = e
+        exception = True
+
+    return i, inp, exception, out
+
+
+def iterate_in_event_loop(iterator: AsyncIterator[T]) -> Iterator[T]:
+    """Consume an asynchronous iterator from synchronous code, using a private event loop."""
+    import asyncio
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError('Cannot iterate an asynchronous loop with `for` inside a running event loop, use `async for` instead')
+
+    event_loop = asyncio.new_event_loop()
+
+    try:
+        while True:
+            try:
+                yield event_loop.run_until_complete(iterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        event_loop.run_until_complete(iterator.aclose())  # type: ignore
+        event_loop.run_until_complete(event_loop.shutdown_asyncgens())
+        event_loop.close()
+
+
+async def iterate_in_thread(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """Consume a (blocking) iterator from asynchronous code, advancing it in the default executor so the event loop is not blocked."""
+    import asyncio
+
+    event_loop = asyncio.get_running_loop()
+    sentinel = object()
+
+    try:
+        while True:
+            item = await event_loop.run_in_executor(None, next, iterator, sentinel)
+
+            if item is sentinel:
+                return
+
+            yield item  # type: ignore
+    finally:
+        iterator.close()  # type: ignore
@@ -0,0 +1,229 @@
+"""
+Caches for memoizing the function of a [`map()`][loop.Loop.map] (see `cache` there).
+"""
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+from inspect import isawaitable
+from threading import Event, Lock
+import pickle
+import sys
+
+if TYPE_CHECKING:
+    import sqlite3
+
+
+class Cache:
+    """
+    Base class of caches, counting hits and misses and making sure concurrent calls (from threads) with the same key compute it only once.
+
+    Subclasses implement `_lookup()` and `_store()`.
+
+    Args:
+        key: Maps the loop variable to the key under which its output is cached. If `None`, the loop variable itself is the key.
+    """
+    def __init__(self, key: Optional[Callable[[Any], Hashable]] = None):
+        self.key = key
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._in_flight: Dict[Hashable, Event] = {}
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state['_lock'], state['_in_flight']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+        self._in_flight = {}
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(hits={self.hits}, misses={self.misses})'
+
+    def get_or_compute(self, inp: Any, function: Callable[[Any], Any]) -> Any:
+        """
+        Return the cached output of `function(inp)`, calling it only if it is not cached yet.
+        """
+        key = inp if self.key is None else self.key(inp)
+
+        while True:
+            with self._lock:
+                found, out = self._lookup(key)
+
+                if found:
+                    self.hits += 1
+                    return out
+
+                event = self._in_flight.get(key)
+
+                if event is None:
+                    self.misses += 1
+                    event = self._in_flight[key] = Event()
+                    break
+
+            # Another thread is computing the same key, once it is done the output will be found (unless it raised, then this thread computes it).
+            event.wait()
+
+        try:
+            out = function(inp)
+
+            if isawaitable(out):
+                # Coroutine functions return before their outputs are ready, so concurrent calls are not deduplicated, only stored once awaited.
+                return self._store_when_done(key, out)
+
+            with self._lock:
+                self._store(key, out)
+
+            return out
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+            event.set()
+
+    async def _store_when_done(self, key: Hashable, awaitable: Any) -> Any:
+        out = await awaitable
+
+        with self._lock:
+            self._store(key, out)
+
+        return out
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        raise NotImplementedError
+
+    def _store(self, key: Hashable, out: Any) -> None:
+        raise NotImplementedError
+
+
+class LRUCache(Cache):
+    """
+    An in-memory cache which evicts the least recently used outputs once it holds more than `maxsize` outputs or `maxbytes` bytes.
+
+    Example:
+        ```python
+        from loop import loop_over
+        from loop.caching import LRUCache
+
+
+        cache = LRUCache(maxsize=100)
+        outputs = loop_over(['a', 'bb', 'a', 'a', 'ccc']).map(len, cache=cache)
+        print(list(outputs), cache)
+        ```
+        ```console
+        [1, 2, 1, 1, 3] LRUCache(hits=2, misses=3)
+        ```
+
+    Args:
+        maxsize: Maximal number of cached outputs, or `None` for no limit.
+        maxbytes: Maximal total size (as measured by `sizeof`) of the cached outputs, or `None` for no limit.
+        key: Maps the loop variable to the key under which its output is cached. If `None`, the loop variable itself is the key (so it must be hashable).
+        sizeof: Measures the size in bytes of an output, used with `maxbytes`.
+
+    !!! note
+
+        With `concurrently("processes")`, each worker process gets its own copy of the cache, and the counters of this instance are not updated.
+    """
+    def __init__(self, maxsize: Optional[int] = 1024, maxbytes: Optional[int] = None, key: Optional[Callable[[Any], Hashable]] = None,
+                 sizeof: Callable[[Any], int] = sys.getsizeof):
+        super().__init__(key)
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self._outputs: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._outputs.clear()
+            self.nbytes = 0
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._outputs.get(key)
+
+        if entry is None:
+            return False, None
+
+        self._outputs.move_to_end(key)
+        return True, entry[0]
+
+    def _store(self, key: Hashable, out: Any) -> None:
+        size = self.sizeof(out) if self.maxbytes is not None else 0
+        self._outputs[key] = (out, size)
+        self.nbytes += size
+
+        while self._outputs and ((self.maxsize is not None and len(self._outputs) > self.maxsize) or (self.maxbytes is not None and self.nbytes > self.maxbytes)):
+            _, (_, evicted_size) = self._outputs.popitem(last=False)
+            self.nbytes -= evicted_size
+
+
+class DiskCache(Cache):
+    """
+    A persistent cache, stored in an SQLite database at `path`, so outputs are reused across runs (and shared by concurrent processes).
+
+    Keys and outputs are stored pickled, so both must be picklable.
+
+    Args:
+        path: Path of the database file, created if it does not exist.
+        key: Maps the loop variable to the key under which its output is cached. If `None`, the loop variable itself is the key.
+            Equal keys must pickle to the same bytes, strings, numbers and tuples of them are a safe choice.
+
+    !!! note
+
+        With `concurrently("processes")`, the counters of this instance are not updated, since lookups happen in the worker processes.
+    """
+    def __init__(self, path: str, key: Optional[Callable[[Any], Hashable]] = None):
+        super().__init__(key)
+        self.path = str(path)
+        self._connection: Optional['sqlite3.Connection'] = None
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state['_connection'] = None  # Each process opens its own connection.
+        return state
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM outputs').fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connect().execute('DELETE FROM outputs')
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> 'sqlite3.Connection':
+        if self._connection is None:
+            import sqlite3
+
+            # Autocommit, so every output is persisted as soon as it is stored. Access is serialized by `self._lock`.
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS outputs (key BLOB PRIMARY KEY, output BLOB)')
+            self._connection = connection
+
+        return self._connection
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        row = self._connect().execute('SELECT output FROM outputs WHERE key = ?', (_dumps(key), )).fetchone()
+
+        if row is None:
+            return False, None
+
+        return True, pickle.loads(row[0])
+
+    def _store(self, key: Hashable, out: Any) -> None:
+        self._connect().execute('INSERT OR REPLACE INTO outputs VALUES (?, ?)', (_dumps(key), _dumps(out)))
+
+
+def _dumps(obj: Any) -> bytes:
+    # A fixed protocol, so keys pickled by different Python versions match.
+    return pickle.dumps(obj, protocol=4)
@@ -0,0 +1,72 @@
+"""
+Persisting which items of a loop were completed, so that a re-run resumes where a previous one stopped (see [`Loop.checkpoint()`][loop.Loop.checkpoint]).
+"""
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Tuple
+import os
+import pickle
+
+from .functional import skipped
+
+
+class Checkpoint:
+    """
+    An append-only file of pickled records, each a list of `(index, output)` pairs of completed items (`output` is `None` if outputs are not stored).
+
+    A record is appended once every `every` completed items, and when the loop ends. A truncated record (e.g. when the process was killed while writing it) is dropped.
+    """
+    def __init__(self, path: str, every: int, outputs: bool):
+        self.path = str(path)
+        self.every = every
+        self.outputs = outputs
+        self._pending: List[Tuple[int, Any]] = []
+        self._file: Any = None
+
+    def load(self) -> Dict[int, Any]:
+        """Read the completed items (mapping each index to its output), and open the file for appending new ones."""
+        completed: Dict[int, Any] = {}
+        end = 0
+
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as file:
+                while True:
+                    try:
+                        record = pickle.load(file)
+                    except EOFError:
+                        break
+                    except Exception:
+                        break  # A truncated record, the items in it will be computed again.
+
+                    completed.update(record)
+                    end = file.tell()
+
+        self._file = open(self.path, 'ab')
+        self._file.truncate(end)
+        self._pending = []
+        return completed
+
+    def record(self, i: int, out: Any) -> None:
+        self._pending.append((i, out if self.outputs or out is skipped else None))
+
+        if len(self._pending) >= self.every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            pickle.dump(self._pending, self._file)
+            self._file.flush()
+            self._pending = []
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+def split_completed(items: Iterable[Tuple[int, Any]], completed: Dict[int, Any], replayed: Deque[Tuple[int, bool, Any]]) -> Iterator[Tuple[int, Any]]:
+    """Yield the items which are not `completed`, and put the completed ones (in index order) in `replayed`, as results with their stored outputs."""
+    for i, inp in items:
+        if i in completed:
+            replayed.append((i, False, completed[i]))
+        else:
+            yield i, inp
@@ -0,0 +1,101 @@
+"""
+Collecting the return values of a loop into NumPy arrays (see [`to_numpy()`][loop.Loop.to_numpy] and [`to_columns()`][loop.Loop.to_columns]).
+
+Values are written into arrays as they arrive, so no list of the values (or of the tuples holding them) is kept along the way, and when the number of values
+is known in advance, the arrays are allocated once.
+"""
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+import itertools
+
+
+class ColumnBuilder:
+    """
+    Builds an array from values added one at a time: if `dtype` is given, into a buffer allocated for `capacity` values (and doubled when full), otherwise into
+    a list, which is converted once done (since the dtype depends on all the values).
+    """
+    def __init__(self, dtype: Any, capacity: int):
+        self.dtype = dtype
+        self.capacity = max(capacity, 1)
+        self.buffer: Any = None
+        self.values: List[Any] = []
+        self.size = 0
+
+    def add(self, value: Any) -> None:
+        if self.dtype is None:
+            self.values.append(value)
+            return
+
+        if self.buffer is None:
+            # Values which are arrays themselves (e.g. vectors), make a column of a higher dimension.
+            self.buffer = _numpy().empty((self.capacity, *_numpy().shape(value)), self.dtype)
+        elif self.size == len(self.buffer):
+            self.buffer = _grown(self.buffer)
+
+        self.buffer[self.size] = value
+        self.size += 1
+
+    def finish(self) -> Any:
+        numpy = _numpy()
+
+        if self.dtype is None:
+            return numpy.array(self.values)
+
+        if self.buffer is None:
+            return numpy.empty(0, self.dtype)
+
+        # A copy, so the unused part of the buffer is freed.
+        return self.buffer if self.size == len(self.buffer) else self.buffer[:self.size].copy()
+
+
+def to_array(values: Iterator[Any], dtype: Any, length: Optional[int]) -> Any:
+    """Collect `values` into an array (of `dtype`, if given), where `length` is the exact number of values (if known)."""
+    numpy = _numpy()
+
+    if dtype is None:
+        return numpy.array(list(values))
+
+    first = next(values, _empty)
+
+    if first is _empty:
+        return numpy.empty(0, dtype)
+
+    # Values which are arrays themselves are read as sub-arrays, so they make an array of a higher dimension.
+    shape = numpy.shape(first) if not isinstance(first, tuple) else ()
+    item_dtype = numpy.dtype((dtype, shape)) if shape else numpy.dtype(dtype)
+    return numpy.fromiter(itertools.chain([first], values), item_dtype, -1 if length is None else length)
+
+
+def to_columns(values: Iterator[Any], num_columns: int, dtypes: Sequence[Any], length: Optional[int], capacity: int) -> Tuple[Any, ...]:
+    """
+    Collect `values` (tuples of `num_columns` items, or single items if there is one column) into a column for each of their items, where `length` is the
+    exact number of values (if known) and `capacity` an estimate.
+    """
+    if num_columns == 1:
+        return to_array(values, dtypes[0], length),
+
+    columns = [ColumnBuilder(dtype, capacity) for dtype in dtypes]
+
+    for value in values:
+        for column, item in zip(columns, value):
+            column.add(item)
+
+    return tuple(column.finish() for column in columns)
+
+
+class _empty:
+    pass
+
+
+def _grown(buffer: Any) -> Any:
+    grown = _numpy().empty((2 * len(buffer), *buffer.shape[1:]), buffer.dtype)
+    grown[:len(buffer)] = buffer
+    return grown
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('Collecting into arrays requires NumPy, install it with `pip install loop-python[numpy]`') from None
+
+    return numpy
@@ -0,0 +1,159 @@
+"""
+Generates a single specialized function from a chain of `map()`/`filter()` stages, with the calls of the adapters from `functional.py` inlined and filters turned into
+plain branches, so each item costs one Python call instead of one per stage (plus one per adapter).
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from time import perf_counter
+
+from .functional import skipped
+from .profiling import StageStats, current_stages
+
+
+Stage = Tuple[Callable[[Any], Any], bool]
+
+
+def compile_stages(stages: List[Stage], profiled_from: Optional[int] = None) -> Callable[[Any], Any]:
+    """
+    Returns a function that applies all `stages` to a single input, and returns the output (or `skipped`).
+
+    If `profiled_from` is given, every call is timed into the stats of the current task (see `profiling.py`), where the first stage is the one at index `profiled_from`.
+    """
+    namespace: Dict[str, Any] = {}
+    body = _stage_lines(stages, namespace, 'return skipped', indent=1, profiled_from=profiled_from)
+
+    if profiled_from is not None:
+        namespace['current_stages'] = current_stages
+        body = '    stage_stats = current_stages()\n' + body
+
+    source = 'def pipeline(out):\n' + body + '    return out\n'
+    return _define(source, 'pipeline', namespace)
+
+
+def compile_sequential(stages: List[Stage], raise_: bool, enumerations: bool, inputs: bool, outputs: bool, progbar: Optional[Any] = None,
+                       stage_stats: Optional[List[StageStats]] = None) -> Callable[[Iterable], Iterator]:
+    """
+    Returns a generator function that applies all `stages` to each item of an iterable, and yields the packed return values (see `returning()`).
+
+    This is the whole loop, for when it runs sequentially. If `progbar` is given, it is told about every item, either directly, or (if it is coalescing) by counting the
+    items here and calling its `report()` once in a while. If `stage_stats` is given, every call is timed into it.
+    """
+    namespace: Dict[str, Any] = {}
+    profiled_from = None
+
+    if stage_stats is not None:
+        namespace['stage_stats'] = stage_stats
+        profiled_from = 0
+
+    coalescing = getattr(progbar, 'coalescing', False)
+    indent = 2 if coalescing else 1
+    on_skip = 'continue'
+    on_advance = ''
+
+    if coalescing:
+        namespace['report'] = progbar.report  # type: ignore
+        # Only skips are counted, since they are usually the rarer ones, the advances are what is left of the batch.
+        count = 'countdown -= 1\nif not countdown:\n    countdown = batch = report(batch - skips, skips, retval)\n    skips = 0\n'
+        on_skip = 'skips += 1\n' + count + 'continue'
+        on_advance = count
+    elif progbar is not None:
+        namespace['advance_one'] = progbar.advance_one
+        namespace['skip_one'] = progbar.skip_one
+        on_skip = 'skip_one()\ncontinue'
+        on_advance = 'advance_one(retval)\n'
+
+    lines = ['for i, inp in enumerate(iterable):\n' if enumerations else 'for inp in iterable:\n']
+    lines.append('    out = inp\n')
+
+    if raise_:
+        lines.append(_stage_lines(stages, namespace, on_skip, indent=1, profiled_from=profiled_from))
+    else:
+        lines.append('    try:\n')
+        lines.append(_stage_lines(stages, namespace, on_skip, indent=2, profiled_from=profiled_from) or '        pass\n')
+        lines.append('    except Exception as e:\n')
+        lines.append('        out = e\n')
+
+    packed = [name for name, returned in [('i', enumerations), ('inp', inputs), ('out', outputs)] if returned]
+
+    if not packed:
+        retval = 'None'
+    elif len(packed) == 1:
+        retval = packed[0]
+    else:
+        retval = f'({", ".join(packed)})'
+
+    if on_advance:
+        lines.append(f'    retval = {retval}\n')
+        lines.extend('    ' + line + '\n' for line in on_advance.splitlines())
+        retval = 'retval'
+
+    lines.append(f'    yield {retval}\n')
+    body = _indent(''.join(lines), indent)
+
+    if coalescing:
+        # Whatever was counted since the last report is reported when the loop ends, including when it is closed early or raises.
+        body = ('    skips = 0\n'
+                '    retval = None\n'
+                '    countdown = batch = report(0, 0, None)\n'
+                '    try:\n'
+                f'{body}'
+                '    finally:\n'
+                '        report(batch - countdown - skips, skips, retval)\n')
+
+    return _define('def run(iterable):\n' + body, 'run', namespace)
+
+
+def _stage_lines(stages: List[Stage], namespace: Dict[str, Any], on_skip: str, indent: int, profiled_from: Optional[int] = None) -> str:
+    lines = []
+
+    if profiled_from is not None:
+        namespace['perf_counter'] = perf_counter
+
+    for k, (function, filtering) in enumerate(stages):
+        inline_call = getattr(function, 'inline_call', None)
+
+        if inline_call is None:
+            namespace[f'f{k}'] = function
+            call = f'f{k}(out)'
+        else:
+            parts, adaptee, args, kwargs = inline_call
+            namespace[f'f{k}'] = adaptee
+            arguments = []
+
+            for part in parts:
+                if part.endswith('inp'):
+                    arguments.append(part.replace('inp', 'out'))
+                elif part == 'args' and args:
+                    namespace[f'args{k}'] = args
+                    arguments.append(f'*args{k}')
+                elif part == 'kwargs' and kwargs:
+                    namespace[f'kwargs{k}'] = kwargs
+                    arguments.append(f'**kwargs{k}')
+
+            call = f'f{k}({", ".join(arguments)})'
+
+        if profiled_from is not None:
+            # Timed into the `stage_stats` in scope, filters also count how many items passed.
+            result = 'passed' if filtering else 'out'
+            lines.append('start = perf_counter()\n')
+            lines.append(f'{result} = {call}\n')
+            lines.append(f'stage_stats[{profiled_from + k}].record(perf_counter() - start{", passed" if filtering else ""})\n')
+            call = result
+
+        if filtering:
+            lines.append(f'if not {call}:\n')
+            lines.extend(f'    {line}\n' for line in on_skip.splitlines())
+        elif call != 'out':
+            lines.append(f'out = {call}\n')
+
+    return _indent(''.join(lines), indent)
+
+
+def _indent(source: str, indent: int) -> str:
+    return ''.join('    ' * indent + line for line in source.splitlines(keepends=True))
+
+
+def _define(source: str, name: str, namespace: Dict[str, Any]) -> Callable:
+    namespace['skipped'] = skipped
+    code = compile(source, f'<loop.compiler.{name}>', 'exec')
+    exec(code, namespace)
+    return namespace[name]
@@ -1,10 +1,20 @@
-from typing import Callable, TypeVar, Iterable
+from typing import Callable, TypeVar, Iterable, Iterator, Optional, Literal, Any, Set
+from threading import Event, Lock, Semaphore, Thread
+import queue
+import functools
+import itertools
+import os
+
+from .functional import dumps
 
 
 T = TypeVar('T')
 R = TypeVar('R')
 
 
+_pathos_ids = itertools.count()
+
+
 class DummyPool:
     def __enter__(self):
         return self
@@ -14,3 +24,406 @@ class DummyPool:
 
     def imap(self, fn: Callable[[T], R], iterable: Iterable[T], chunksize=None) -> Iterable[R]:
         return map(fn, iterable)
+
+    def imap_unordered(self, fn: Callable[[T], R], iterable: Iterable[T], chunksize=None) -> Iterable[R]:
+        return map(fn, iterable)
+
+
+@functools.lru_cache(maxsize=None)
+def process_pool_class() -> type:
+    """The `ProcessPool` class, which is defined on first use, since importing pathos (along with dill and multiprocess) is slow."""
+    from pathos.pools import ProcessPool as _PathosProcessPool  # type: ignore
+
+    class ProcessPool(_PathosProcessPool):
+        """
+        A pathos `ProcessPool` exposing the same `imap()`/`imap_unordered()` signatures as `multiprocessing.pool.Pool`.
+
+        pathos treats every positional argument after `fn` as another iterable to be zipped, so `chunksize` must be passed by keyword.
+        """
+        def imap(self, fn: Callable[[T], R], iterable: Iterable[T], chunksize: Optional[int] = None) -> Iterable[R]:
+            return _imap_chunks(super().imap, fn, iterable, chunksize)
+
+        def imap_unordered(self, fn: Callable[[T], R], iterable: Iterable[T], chunksize: Optional[int] = None) -> Iterable[R]:
+            return _imap_chunks(self.uimap, fn, iterable, chunksize)
+
+        def apply_async(self, fn: Callable[..., R], args: tuple = (), callback: Optional[Callable[[R], Any]] = None,
+                        error_callback: Optional[Callable[[BaseException], Any]] = None) -> Any:
+            return self._serve().apply_async(fn, args, callback=callback, error_callback=error_callback)
+
+        def worker_pids(self) -> Set[int]:
+            # The processes of the underlying `multiprocess` pool, which replaces the ones that exit.
+            return {process.pid for process in self._serve()._pool if process.exitcode is None}
+
+        def kill_worker(self, pid: int) -> None:
+            for process in self._serve()._pool:
+                if process.pid == pid:
+                    process.kill()
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            # Unlike pathos, behave like `multiprocessing.pool.Pool` and stop the workers (which also drops the pool from pathos' cache).
+            self.terminate()
+            self.clear()
+
+    return ProcessPool
+
+
+class OwnedPool:
+    """
+    Settings of a pool which is created every time a loop is iterated, and shut down once the iteration is done.
+
+    Creating the pool lazily allows passing it an `initializer` which depends on the loop's functions.
+    """
+    def __init__(self, how: Literal['threads', 'processes'], num_workers: Optional[int] = None, serializer: str = 'dill', start_method: Optional[str] = None):
+        self.how = how
+        self.num_workers = num_workers
+        self.serializer = serializer
+        self.start_method = start_method
+
+    def open(self, **kwargs) -> Any:
+        if self.how == 'processes' and self.serializer != 'dill':
+            return create_executor_pool(self.num_workers, self.start_method, **kwargs)
+
+        return create_pool(self.how, self.num_workers, **kwargs)
+
+    def create_queue(self) -> Any:
+        """A queue which the pool's workers can put into, if it is handed to them when they are created."""
+        if self.how == 'processes' and self.serializer != 'dill':
+            import multiprocessing
+
+            return multiprocessing.get_context(self.start_method).SimpleQueue()
+
+        return create_queue(self.how)
+
+    def dumps(self, obj: Any) -> bytes:
+        """Serialize `obj` with the pool's serializer, such that it can be loaded with `pickle.loads()` (by workers of `ExecutorPool`)."""
+        if self.serializer == 'cloudpickle':
+            try:
+                import cloudpickle  # type: ignore
+            except ImportError:
+                raise ImportError('`serializer="cloudpickle"` requires cloudpickle, install it with `pip install loop-python[cloudpickle]`') from None
+
+            return cloudpickle.dumps(obj)
+
+        return dumps(obj)
+
+
+class ExecutorPool:
+    """
+    A [`concurrent.futures.Executor`](https://docs.python.org/3/library/concurrent.futures.html#executor-objects) exposing the
+    `imap()`/`imap_unordered()`/`apply_async()` methods of `multiprocessing.pool.Pool`.
+
+    Like `Pool`, tasks are pulled from the iterable by a feeder thread (so an `InFlightWindow` blocks the feeder rather than the consumer), and are sent to the
+    workers in chunks of `chunksize`. On exit, tasks which did not start yet are cancelled, and the executor is shut down only if it is `owned`.
+    """
+    def __init__(self, executor: Any, owned: bool = True):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.how = 'threads' if isinstance(executor, ThreadPoolExecutor) else 'processes'
+        self.num_workers: Optional[int] = getattr(executor, '_max_workers', None)  # Kept private by both executors of the standard library.
+        self.owned = owned
+        self._executor = executor
+        self._lock = Lock()
+        self._pending: Set[Any] = set()  # Futures which are not done yet, cancelled on exit.
+        self._closed = False
+
+    def __enter__(self) -> 'ExecutorPool':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.terminate()
+
+    def imap(self, fn: Callable[[T], R], iterable: Iterable[T], chunksize: Optional[int] = None) -> Iterator[R]:
+        return self._imap(fn, iterable, chunksize or 1, ordered=True)
+
+    def imap_unordered(self, fn: Callable[[T], R], iterable: Iterable[T], chunksize: Optional[int] = None) -> Iterator[R]:
+        return self._imap(fn, iterable, chunksize or 1, ordered=False)
+
+    def apply_async(self, fn: Callable[..., R], args: tuple = (), callback: Optional[Callable[[R], Any]] = None,
+                    error_callback: Optional[Callable[[BaseException], Any]] = None) -> Any:
+        def done(future: Any) -> None:
+            if future.cancelled():
+                return
+
+            error = future.exception()
+
+            if error is None:
+                if callback is not None:
+                    callback(future.result())
+            elif error_callback is not None:
+                error_callback(error)
+
+        future = self._submit(fn, *args)
+        future.add_done_callback(done)
+        return future
+
+    def terminate(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            self._closed = True  # The feeder may still be submitting.
+
+        for future in pending:
+            future.cancel()
+
+        if not self.owned:
+            return
+
+        # Like `Pool.terminate()`, running tasks are not waited for. There is no public way to stop them (before Python 3.14), so the workers are terminated.
+        for process in list((getattr(self._executor, '_processes', None) or {}).values()):
+            process.terminate()
+
+        self._executor.shutdown(wait=True)
+
+    def _submit(self, fn: Callable, *args: Any) -> Any:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Cannot submit tasks to a closed pool')
+
+            future = self._executor.submit(fn, *args)
+            self._pending.add(future)
+
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future: Any) -> None:
+        with self._lock:
+            self._pending.discard(future)
+
+    def _imap(self, fn: Callable, iterable: Iterable, chunksize: int, ordered: bool) -> Iterator:
+        submitted: 'queue.Queue[Any]' = queue.Queue()
+        Thread(target=self._feed, args=(fn, iterable, chunksize, ordered, submitted), daemon=True).start()
+        return self._results(submitted, ordered)
+
+    def _feed(self, fn: Callable, iterable: Iterable, chunksize: int, ordered: bool, submitted: 'queue.Queue[Any]') -> None:
+        count = 0
+        error = None
+
+        try:
+            iterator = iter(iterable)
+
+            while True:
+                chunk = list(itertools.islice(iterator, chunksize))
+
+                if not chunk:
+                    break
+
+                future = self._submit(_apply_to_chunk, fn, chunk)
+                count += 1
+
+                # Ordered results are read in the order of submission, unordered ones in the order of completion.
+                if ordered:
+                    submitted.put(future)
+                else:
+                    future.add_done_callback(submitted.put)
+        except BaseException as e:
+            error = e  # Raised by the consumer, after the results of the tasks submitted before it (like `Pool.imap()` does).
+
+        submitted.put(_FeedEnd(count, error))
+
+    @staticmethod
+    def _results(submitted: 'queue.Queue[Any]', ordered: bool) -> Iterator:
+        received = 0
+        end: Optional[_FeedEnd] = None
+
+        while end is None or received < end.count:
+            entry = submitted.get()
+
+            if isinstance(entry, _FeedEnd):
+                end = entry
+
+                if ordered:
+                    break
+
+                continue
+
+            received += 1
+            yield from entry.result()
+
+        if end.error is not None:  # type: ignore
+            raise end.error  # type: ignore
+
+
+class _FeedEnd:
+    def __init__(self, count: int, error: Optional[BaseException]):
+        self.count = count
+        self.error = error
+
+
+def _apply_to_chunk(fn: Callable, chunk: list) -> list:
+    return [fn(task) for task in chunk]
+
+
+def create_executor_pool(num_workers: Optional[int] = None, start_method: Optional[str] = None, initializer: Optional[Callable] = None,
+                         initargs: tuple = ()) -> ExecutorPool:
+    """An `ExecutorPool` of a new `ProcessPoolExecutor`, with workers started by `start_method` (see `multiprocessing.get_context()`)."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    executor = ProcessPoolExecutor(num_workers or default_num_workers('processes'), mp_context=multiprocessing.get_context(start_method),
+                                   initializer=initializer, initargs=initargs)
+    return ExecutorPool(executor)
+
+
+def as_pool(pool: Any) -> Any:
+    """`pool`, or an `ExecutorPool` of it if it is a `concurrent.futures.Executor` (passed by the user, so it is not shut down)."""
+    if hasattr(pool, 'imap'):
+        return pool
+
+    from concurrent.futures import Executor
+
+    return ExecutorPool(pool, owned=False) if isinstance(pool, Executor) else pool
+
+
+def create_pool(how: Literal['threads', 'processes'], num_workers: Optional[int] = None, **kwargs) -> Any:
+    if how == 'threads':
+        from multiprocessing.pool import ThreadPool
+
+        return ThreadPool(processes=num_workers or default_num_workers(how), **kwargs)
+    elif how == 'processes':
+        # pathos caches its pools by id, a unique one prevents sharing (and shutting down) a pool created elsewhere.
+        kwargs.setdefault('id', f'loop-{os.getpid()}-{next(_pathos_ids)}')
+        return process_pool_class()(processes=num_workers, **kwargs)
+    else:
+        raise ValueError(f'Non-supported pool type {how = }')
+
+
+def create_queue(how: Literal['threads', 'processes']) -> Any:
+    # A `multiprocess` queue, like the processes of pathos, so it can be handed to them when they are created. A simple one writes synchronously, so what a
+    # worker puts is not lost if it dies right after.
+    if how == 'threads':
+        return queue.Queue()
+
+    from pathos.helpers import mp  # type: ignore
+    return mp.SimpleQueue()
+
+
+def default_num_workers(how: Literal['threads', 'processes']) -> int:
+    cpu_count = os.cpu_count() or 1
+
+    # For threads, the default of https://docs.python.org/3/library/concurrent.futures.html#concurrent.futures.ThreadPoolExecutor
+    return min(32, cpu_count + 4) if how == 'threads' else cpu_count
+
+
+def _imap_chunks(imap: Callable, fn: Callable, iterable: Iterable, chunksize: Optional[int]) -> Iterator:
+    """
+    `imap(fn, iterable)`, with the items sent in chunks of `chunksize` (as `multiprocessing.pool.Pool` does itself). The results are flattened here rather than
+    by the pool, so they keep the `next(timeout)` method of the pool's `IMapIterator` (see `supervision.watch_workers()`).
+    """
+    if chunksize is None or chunksize == 1:
+        return imap(fn, iterable)
+
+    iterator = iter(iterable)
+    chunks = iter(lambda: list(itertools.islice(iterator, chunksize)), [])
+    return _ChunkItems(imap(functools.partial(_map_chunk, fn), chunks))
+
+
+def _map_chunk(fn: Callable[[T], R], chunk: list) -> list:
+    return [fn(x) for x in chunk]
+
+
+class _ChunkItems:
+    """The items of the chunks yielded by an `IMapIterator`, with the same `next(timeout)` method."""
+    def __init__(self, chunks: Any):
+        self._chunks = chunks
+        self._items: list = []  # Of the current chunk, reversed.
+
+    def __iter__(self) -> '_ChunkItems':
+        return self
+
+    def __next__(self) -> Any:
+        return self.next()
+
+    def next(self, timeout: Optional[float] = None) -> Any:
+        while not self._items:
+            self._items = self._chunks.next(timeout)[::-1]
+
+        return self._items.pop()
+
+
+class InFlightWindow:
+    """
+    Limits how many items can be pulled from an iterable before their results are consumed.
+
+    `feed()` is consumed by the pool's task-feeder thread, which blocks once `size` items are in flight until `release()` is called by the consumer.
+    """
+    def __init__(self, size: int):
+        self._semaphore = Semaphore(size)
+        self._closed = False
+
+    def feed(self, iterable: Iterable[T]) -> Iterator[T]:
+        iterator = iter(iterable)
+
+        while True:
+            # Acquire before pulling, so an item is never held by the feeder while it waits.
+            self._semaphore.acquire()
+
+            if self._closed:
+                return
+
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+
+            yield item
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+    def close(self) -> None:
+        # Wake up a feeder blocked in `feed()`, otherwise pool shutdown would wait on it forever.
+        self._closed = True
+        self._semaphore.release()
+
+
+class Cancellation:
+    """
+    Stops the work of a segment whose results are no longer needed (e.g. once [`first()`][loop.Loop.first] has its answer).
+
+    `feed()` stops pulling items once `cancel()` is called, and tasks wrapped by `apply_unless_cancelled()` which were already handed to a pool are skipped,
+    if its workers share this process (worker processes of our own pools are terminated instead).
+    """
+    def __init__(self) -> None:
+        self._event = Event()
+
+    def feed(self, iterable: Iterable[T]) -> Iterator[T]:
+        iterator = iter(iterable)
+
+        while not self._event.is_set():
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+
+            yield item
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+def apply_unless_cancelled(apply, cancellation, pipeline, returns_outputs, task):
+    """Same as `apply`, unless `cancellation` was cancelled (then the result is not read, and `None` is returned)."""
+    if cancellation.cancelled:
+        return None
+
+    return apply(pipeline, returns_outputs, task)
+
+
+def pickles_with_dill(pool: Any) -> bool:
+    """Whether `pool` sends its tasks with dill (like pathos' pools, including `pools.PoolHandle`), which can send the functions compiled by the loop."""
+    if getattr(pool, 'how', None) == 'processes' and not isinstance(pool, ExecutorPool):
+        return True
+
+    return any(cls.__module__.split('.')[0] in {'pathos', 'multiprocess'} for cls in type(pool).__mro__)
+
+
+def runs_in_threads(pool: Any) -> bool:
+    if getattr(pool, 'how', None) == 'threads':
+        return True
+
+    from multiprocessing.pool import ThreadPool
+
+    return isinstance(pool, ThreadPool)
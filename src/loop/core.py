@@ -1,14 +1,23 @@
-from typing import Iterable, Iterator, TypeVar, Literal, Tuple, Optional, Union, Callable, Any, Generic, overload, Type, List, cast
-import os
-from functools import reduce, partial
-from multiprocessing.dummy import Pool as ThreadPool
-
-from pathos.pools import ProcessPool  # type: ignore
-
-from .functional import args_last_adapter, args_first_adapter, tuple_unpack_args_last_adapter, tuple_unpack_args_first_adapter, dict_unpack_adapter, filter_adapter, skipped
+from typing import Iterable, Iterator, AsyncIterable, AsyncIterator, TypeVar, Literal, Tuple, Optional, Union, Callable, Any, Generic, overload, Type, List, Dict, Deque, Sequence, cast
+from collections import deque
+from contextlib import contextmanager
+from functools import reduce
+import itertools
+import operator
+
+from .functional import args_last_adapter, args_first_adapter, tuple_unpack_args_last_adapter, tuple_unpack_args_first_adapter, dict_unpack_adapter, skipped, BatchAdapter, CachedAdapter
 from .packing import return_first, return_first_and_second, return_first_and_third, return_first_second_and_third, return_second, return_second_and_third, return_third, return_none
-from .progress import Progbar, DummyProgbar, TqdmProgbar
-from .concurrency import DummyPool
+from .progress import Progbar, DummyProgbar, TqdmProgbar, Hooks, HookDispatcher
+from .concurrency import DummyPool, OwnedPool, as_pool, runs_in_threads
+from .pipeline import Concurrency, Segment, run_segments, merge_bypassed
+from .checkpoint import Checkpoint, split_completed
+from .compiler import compile_sequential
+from .profiling import SegmentProfile, StageStats, summarize, timed
+from .caching import Cache
+from .reduction import Reducer, Partial, empty
+from .errors import ErrorSummary
+from .collecting import to_array, to_columns
+from .asynchronous import AsyncioPool, is_async_iterable, aenumerate, amap, iterate_in_event_loop, iterate_in_thread
 
 
 S = TypeVar('S')
@@ -38,19 +47,25 @@ class _missing:
 
 
 class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
-    def __init__(self, iterable: Iterable[S]):
+    def __init__(self, iterable: Union[Iterable[S], AsyncIterable[S]]):
         self._iterable = iterable
 
-        self._functions: List[Callable[[T], Union[L, bool]]] = []
+        self._stages: List[Tuple[Callable[[T], Union[L, bool]], bool]] = []
         self._next_call_spec: Tuple[Optional[Literal['*', '**']], bool] = (None, False)
 
         self._retval_packer: Callable[[int, S, T], Any] = return_third
+        self._returns_enumerations = False
+        self._returns_inputs = False
+        self._returns_outputs = True
 
         self._progbar: Progbar = DummyProgbar()
+        self._hooks: List[Hooks] = []
+        self._checkpoint: Optional[Checkpoint] = None
+        self._profiled = False
+        self._stats: Dict[str, Any] = {'segments': []}
 
-        self._pool = DummyPool()
-        self._raise = True
-        self._chunksize_tuple: Union[Tuple[int], Tuple[()]] = ()
+        # Each entry holds the number of stages which existed when `concurrently()` was called, and the settings it was called with.
+        self._concurrency: List[Tuple[int, Concurrency]] = []
 
     def next_call_with(self, unpacking: Optional[Literal['*', '**']] = None, args_first: bool = False):
         """
@@ -73,7 +88,7 @@ class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
         self._next_call_spec = (unpacking, args_first)
         return self
 
-    def map(self, function: Callable[[T], L], *args, **kwargs) -> 'Loop[S, L, R_ENUM, R_INPS, R_OUTS]':
+    def map(self, function: Callable[[T], L], *args, cache: Optional[Cache] = None, **kwargs) -> 'Loop[S, L, R_ENUM, R_INPS, R_OUTS]':
         """
         Apply `function` to each `item` in `iterable` by calling `function(item, *args, **kwargs)`.
 
@@ -83,13 +98,65 @@ class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
         Args:
             function: Function to be applied on each item in the loop.
             args: Passed as `*args` (after the loop variable) to each call to `function`.
+            cache: Memoizes `function`, so it is called only once per distinct `item` (or key, see [`LRUCache`][loop.caching.LRUCache] and
+                [`DiskCache`][loop.caching.DiskCache]). When running with `concurrently("threads")`, an `item` which is already being computed by another worker is waited
+                for rather than computed again. The cache's `hits` and `misses` count the lookups.
             kwargs: Passed as `**kwargs` to each call to `function`.
 
         !!! note
 
             By default, applying ` map(function, *args, **kwargs)` is not the same as applying `map(functools.partial(function, *args, **kwargs))` because `functools.partial` would pass `*args` BEFORE the loop item.
         """
-        self._set_map_or_filter(function, args, kwargs, filtering=False)
+        self._set_map_or_filter(function, args, kwargs, filtering=False, cache=cache)
+        out = cast(Loop[S, L, R_ENUM, R_INPS, R_OUTS], self)
+        return out
+
+    def map_batches(self, function: Callable[[Any], Iterable[L]], batch_size: int, *args, collate: Optional[Callable[[List[T]], Any]] = None, **kwargs) -> 'Loop[S, L, R_ENUM, R_INPS, R_OUTS]':
+        """
+        Apply `function` to batches of up to `batch_size` items at once, by calling `function(batch, *args, **kwargs)`.
+
+        `function` must return exactly one output per item in `batch` (e.g. a list or an array), these outputs are then looped over one by one as if [`map()`][loop.Loop.map]
+        was used. This is useful for vectorized functions, where a single call on many items is much faster than many calls on single items.
+
+        Example:
+            ``` python
+
+            import numpy as np
+
+            from loop import loop_over
+
+
+            for x in loop_over(range(5)).map_batches(np.sqrt, 2, collate=np.array).returning(enumerations=True):
+                print(x)
+            ```
+
+            ``` console
+            (0, 0.0)
+            (1, 1.0)
+            (2, 1.4142135623730951)
+            (3, 1.7320508075688772)
+            (4, 2.0)
+            ```
+
+        Args:
+            function: Function to be applied on each batch of items in the loop.
+            batch_size: Maximal number of items in each batch (the last batch may be smaller).
+            args: Passed as `*args` (after the batch) to each call to `function`.
+            collate: Converts each batch (which is a `list` by default) before it is passed to `function`, e.g. `numpy.stack`.
+            kwargs: Passed as `**kwargs` to each call to `function`.
+
+        !!! note
+
+            Items that were skipped by a preceding [`filter()`][loop.Loop.filter] are not included in the batches, so batches may be smaller than `batch_size`.
+
+            If `function` raises an exception, it is the result of every item in the batch (see `exceptions` in [`concurrently()`][loop.Loop.concurrently]).
+
+            When used with [`concurrently()`][loop.Loop.concurrently], each batch is sent to a worker as a single task.
+        """
+        if batch_size < 1:
+            raise ValueError(f'`Loop.map_batches()` called with non-positive {batch_size = }')
+
+        self._set_map_or_filter(function, args, kwargs, filtering=False, batching=(batch_size, collate))
         out = cast(Loop[S, L, R_ENUM, R_INPS, R_OUTS], self)
         return out
 
@@ -298,9 +365,14 @@ class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
         elif enumerations and inputs and outputs:  # 111
             self._retval_packer = return_first_second_and_third
 
+        self._returns_enumerations = enumerations
+        self._returns_inputs = inputs
+        self._returns_outputs = outputs
+
         return self
 
-    def show_progress(self, refresh: bool = False, postfix_str: Optional[Union[str, Callable[[Any], Any]]] = None, total: Optional[Union[int, Callable[[Iterable], int]]] = None, **kwargs):
+    def show_progress(self, refresh: bool = False, postfix_str: Optional[Union[str, Callable[[Any], Any]]] = None, total: Optional[Union[int, Callable[[Iterable], int]]] = None,
+                      update_every: Optional[int] = None, update_interval: Optional[float] = None, **kwargs):
         """
         Display a [`tqdm.tqdm`](https://tqdm.github.io/docs/tqdm) progress bar as the iterable is being consumed.
 
@@ -325,6 +397,10 @@ class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
             postfix_str: Used for calling [`tqdm.set_postfix_str()`](https://tqdm.github.io/docs/tqdm/#set_postfix_str). If a string, it will be set only once in the beginning.
                 If a callable, it accepts the loop variable, returns a postfix (which can be of any type) on top of which `str()` is applied.
             total: Same as in [`tqdm.__init__()`](https://tqdm.github.io/docs/tqdm/#__init__), but can also be a callable that accepts an iterable and returns an int, which is used as the new `total`.
+            update_every: If given, items are counted locally and the progress bar is updated once every `update_every` items, instead of after every item.
+                The postfix (if `postfix_str` is callable) is evaluated only on these updates, with the latest loop variable, and so is `refresh`.
+            update_interval: Same as `update_every`, but the progress bar is updated once every `update_interval` seconds. When both are given, whichever comes first
+                triggers the update. Either of them makes the progress bar's overhead negligible even for very fast loops.
             kwargs: Forwarded to [`tqdm.__init__()`](https://tqdm.github.io/docs/tqdm/#__init__) as-is.
 
         !!! note
@@ -343,16 +419,133 @@ class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
             Here `x` is a tuple containing the current index, input and output.
         """
         if callable(total):
-            total = total(self._iterable)
+            total = total(self._iterable)  # type: ignore
 
-        self._progbar = TqdmProgbar(refresh, postfix_str, total=total, **kwargs)
+        self._progbar = TqdmProgbar(refresh, postfix_str, update_every, update_interval, total=total, **kwargs)
         return self
 
-    def concurrently(self, how: Literal['threads', 'processes'], exceptions: Literal['raise', 'return'] = 'raise', chunksize: Optional[int] = None, num_workers: Optional[int] = None):
+    def hooks(self, *hooks: Hooks):
+        """
+        Report the lifecycle of the loop to `hooks`, e.g. for emitting metrics and traces without wrapping every function by hand.
+
+        Example:
+            ```python
+            from loop import loop_over
+            from loop.progress import Hooks
+
+
+            class Failures(Hooks):
+                def on_item_done(self, index, duration, error):
+                    if error is not None:
+                        print(f'Item {index} failed after {duration:.1f}s: {error!r}')
+
+
+            loop_over([1, 0, 2]).map(lambda x: 1 / x).concurrently('threads', exceptions='return').hooks(Failures()).exhaust()
+            ```
+            ```console
+            Item 1 failed after 0.0s: ZeroDivisionError('division by zero')
+            ```
+
+        Args:
+            hooks: Instances of [`Hooks`][loop.progress.Hooks] subclasses. Replaces the hooks of a previous call, pass none to remove them.
+
+        !!! note
+
+            Items are reported in batches (see `batch_size` in [`Hooks`][loop.progress.Hooks]), when given several hooks, batches are as small as the smallest
+            `batch_size` (and as frequent as the shortest `batch_interval`) among them.
+
+            Hooks are not supported with asynchronous iterables or `concurrently("asyncio")`.
+        """
+        self._hooks = list(hooks)
+        return self
+
+    def checkpoint(self, path: str, every: int = 1000, outputs: bool = True):
+        """
+        Record the completed items in a file, so that if the loop is interrupted, running it again (with the same `path`) resumes where it stopped.
+
+        Items which were completed by a previous run are not computed again, their recorded outputs are returned in their place instead (in order, unless
+        `ordered=False` was passed to [`concurrently()`][loop.Loop.concurrently]), and the progress bar starts from where the previous run stopped.
+
+        Example:
+            ```python
+            from loop import loop_over
+
+
+            # If this is killed midway, running it again computes only the remaining items.
+            results = loop_over(paths).map(process).concurrently('processes').checkpoint('process.ckpt')
+            for result in results:
+                ...
+            ```
+
+        Args:
+            path: Path of the checkpoint file, created if it does not exist. Completed items are appended to it.
+            every: The completed items are written to the file in batches of this many items (and once more when the loop ends).
+            outputs: If True, the outputs of the completed items are recorded too (so they must be picklable), otherwise only their indices are recorded,
+                and completed items are not returned again by loops which return outputs (see [`returning()`][loop.Loop.returning]).
+
+        !!! note
+
+            Items are identified by their position in `iterable`, so it must yield the same items in the same order on every run.
+
+            Items whose functions raised (see `exceptions` in [`concurrently()`][loop.Loop.concurrently]) are not recorded, so they are retried on the next run.
+            Items skipped by [`filter()`][loop.Loop.filter] are recorded, and stay skipped.
+        """
+        if every < 1:
+            raise ValueError(f'`Loop.checkpoint()` called with non-positive {every = }')
+
+        self._checkpoint = Checkpoint(path, every, outputs)
+        return self
+
+    def profile(self, enabled: bool = True):
+        """
+        Measure where the loop spends its time, which is then reported by [`stats()`][loop.Loop.stats].
+
+        Every call of the functions and predicates from [`map()`][loop.Loop.map] and [`filter()`][loop.Loop.filter] is timed (in the workers, if running
+        [`concurrently()`][loop.Loop.concurrently]), as well as how long the workers were busy, and how long the consumer of the loop waited for each item.
+
+        Example:
+            ```python
+            import time
+
+            from loop import loop_over
+
+
+            loop = loop_over(range(100)).map(time.sleep).filter(lambda x: x is None).concurrently('threads', num_workers=4).profile()
+            loop.exhaust()
+            print(loop.stats()['segments'][0]['stages'][0])
+            ```
+            ```console
+            {'name': 'sleep', 'kind': 'map', 'calls': 100, 'total_seconds': 49.6, 'mean_seconds': 0.496, 'p50_seconds': 0.49, 'p99_seconds': 0.99}
+            ```
+
+        Args:
+            enabled: If False, disables a previous call. Loops which are not profiled pay nothing for this feature.
+
+        !!! note
+
+            Timing adds about a microsecond per call, and, when running concurrently, sends the timings of each task back along with its results.
+            Calls which raised an exception are not counted.
+
+            Not supported with asynchronous iterables or `concurrently("asyncio")`.
+        """
+        self._profiled = enabled
+        return self
+
+    def concurrently(self, how: Optional[Literal['threads', 'processes', 'asyncio']] = None, exceptions: Literal['raise', 'return', 'collect', 'skip'] = 'raise',
+                     chunksize: Optional[Union[int, Literal['auto']]] = None,
+                     num_workers: Optional[int] = None, ordered: bool = True, max_in_flight: Optional[int] = None, pool: Optional[Any] = None,
+                     transport: Literal['pickle', 'shm'] = 'pickle', timeout: Optional[float] = None, retries: int = 0, backoff: float = 0.0,
+                     serializer: Literal['dill', 'pickle', 'cloudpickle'] = 'dill', start_method: Optional[Literal['fork', 'forkserver', 'spawn']] = None,
+                     executor: Optional[Any] = None):
         """
         Apply the functions and predicates from all [`map()`][loop.Loop.map] and [`filter()`][loop.Loop.filter] calls concurrently.
 
-        The order of the outputs is preserved. Each `item` in `iterable` gets its own worker.
+        By default, the order of the outputs is preserved. Each `item` in `iterable` gets its own worker.
+
+        When called once, the settings apply to all the [`map()`][loop.Loop.map] and [`filter()`][loop.Loop.filter] calls. When called several times, each call applies to
+        the functions added since the previous call (functions added after the last call join the last one). Every such segment runs on its own pool, and its outputs
+        are fed to the next segment's pool, e.g. `.map(download).concurrently('threads', num_workers=64).map(parse).concurrently('processes', num_workers=8)` downloads and
+        parses concurrently, each with a suitable kind of workers. Unless `max_in_flight` is given, each segment then keeps up to 1024 items in flight.
 
         Example:
             ```python
@@ -387,38 +580,175 @@ class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
 
                 If `"processes"`, uses [`ProcessPool`](https://pathos.readthedocs.io/en/latest/pathos.html#pathos.multiprocessing.ProcessPool)
                 (from the [pathos](https://pathos.readthedocs.io/en/latest/pathos.html) library).
+
+                If `"asyncio"`, functions and predicates which are coroutine functions are awaited concurrently on an event loop (other functions are called as usual).
+                The loop can then be consumed either with `async for` inside a running event loop, or with a regular `for` (which runs a private event loop).
             exceptions: If `"raise"`, exceptions are not caught and the first exception in one of the calls will be immediately raised.
 
                 If `"return"`, exceptions are caught and returned instead of their corresponding outputs.
+
+                If `"collect"`, exceptions are caught and turned (by the worker which caught them) into an
+                [`ErrorRecord`][loop.errors.ErrorRecord], with the item's index, the exception's type and message, and its formatted traceback, which is returned
+                instead of the output. Unlike an exception, a record does not keep the frames of the failed calls (and their local variables, such as large
+                inputs) alive, so memory stays flat however many items fail.
+
+                If `"skip"`, failed items are dropped, as if filtered out.
+
+                With either, the failures are summarized in [`stats()`][loop.Loop.stats].
             chunksize: Passed to `imap()` method of [`ProcessPool`](https://pathos.readthedocs.io/en/latest/pathos.html#pathos.multiprocessing.ProcessPool) /
                 [`ThreadPool`](https://docs.python.org/3/library/multiprocessing.html#multiprocessing.pool.ThreadPool).
 
                 This is used to consume (and concurrently process) up to `chunksize` items at a time, which can solve memory issues in "heavy" iterables.
-            num_workers: Number of workers to be used in the process/thread pool. If `None`, will be set automatically. If 0, disables concurrency entirely.
+
+                If `"auto"`, items are sent to the workers in chunks whose size is adjusted during the run: the first chunks hold a single item each, and later chunks are
+                sized according to how long items take to compute and serialize, such that each chunk takes a few tens of milliseconds. The chosen sizes are reported by
+                [`stats()`][loop.Loop.stats]. Not applied in segments with [`map_batches()`][loop.Loop.map_batches], whose batches are already chunks.
+            num_workers: Number of workers to be used in the process/thread pool (or the maximal number of items awaited at once for `"asyncio"`).
+                If `None`, will be set automatically. If 0, disables concurrency entirely.
+            ordered: If True, outputs are yielded in the same order as their inputs, so a single slow item holds back all the items after it.
+
+                If False, outputs are yielded as soon as they are ready. Enumerations and inputs (see [`returning()`][loop.Loop.returning]) still refer to the original position
+                and value of each item.
+            max_in_flight: Maximal number of items that were pulled from `iterable` but whose results were not yet consumed. If `None`, the pool consumes `iterable`
+                as fast as it can, which may exhaust memory when the loop is consumed slower than it is produced. Must not be smaller than `chunksize`.
+            pool: An existing pool to run on instead of creating a new one (in which case `how` and `num_workers` must not be given), usually obtained from
+                [`loop.pools.get()`][loop.pools.get]. Any object with `imap()` and `imap_unordered()` methods (such as a `multiprocessing.pool.Pool`) is accepted.
+                The loop never shuts down a pool that was passed to it.
+
+                Note that pools created by the loop itself receive the functions (with their bound arguments) once per worker process, whereas an existing pool
+                receives them along with every task. Process pools which do not use dill (unlike pathos' pools), such as a `multiprocessing.pool.Pool`, send
+                them with `pickle`, so they must be importable (e.g. not lambdas).
+            transport: How NumPy arrays are passed between processes. If `"pickle"`, they are pickled along with the rest of the task, like any other object.
+
+                If `"shm"`, arrays (which are the loop variable itself, not nested in other objects) are copied into shared memory segments, which are
+                recycled between items, and only small descriptors are pickled. This is much faster for large arrays. Inside the workers, the input arrays are
+                views of the segments, valid only until the function returns. Requires `how="processes"` (or a process `pool` or `executor`).
+            timeout: Maximal number of seconds an item may take in a worker (or a whole batch, with [`map_batches()`][loop.Loop.map_batches]). An item that takes
+                longer fails with a `TimeoutError` (which is either raised or returned, according to `exceptions`), so a hung item delays the loop by at most
+                `timeout` seconds. A worker process running it is killed and replaced, a worker thread cannot be stopped, so it keeps running it in the background
+                (and is not waited for when the loop ends).
+            retries: Number of times a failed item is tried again before its failure is raised or returned, where failing means raising an exception, timing out,
+                or being run by a worker process which died (e.g. was killed by the operating system when running out of memory), which fails with a
+                [`WorkerCrashedError`][loop.supervision.WorkerCrashedError]. Without `timeout` and `retries`, a worker process of a pool created by the loop
+                (with `serializer="dill"`) which dies fails the whole loop with a `WorkerCrashedError`, since its items are lost (and it is not known which).
+                With other pools, the loop may wait for them forever.
+            backoff: Seconds to wait before the first retry of an item, doubled on each of its following retries.
+            serializer: How the functions are sent to the worker processes (with `how="processes"`). If `"dill"`, the pool is a pathos `ProcessPool`, which
+                serializes everything (including the items and outputs) with [dill](https://dill.readthedocs.io), and can send almost any function (e.g. lambdas
+                and functions defined in `__main__` of an interactive session).
+
+                Otherwise, the pool is a [`ProcessPoolExecutor`](https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor), and the functions
+                are sent once per worker, serialized by either `pickle` (so they must be importable, e.g. not lambdas) or
+                [cloudpickle](https://github.com/cloudpipe/cloudpickle) (which sends lambdas and closures as well, and must be installed, e.g. with
+                `pip install loop-python[cloudpickle]`). Items and outputs are serialized by `pickle`, which is much faster than dill for plain data. With
+                `timeout`, a worker running a timed out item keeps running it (as with threads), and a worker process which dies breaks the pool, so the loop
+                fails.
+            start_method: How the worker processes are started (`"fork"`, `"forkserver"` or `"spawn"`, see
+                [start methods](https://docs.python.org/3/library/multiprocessing.html#contexts-and-start-methods)), if `serializer` is not `"dill"`. If `None`,
+                the platform's default.
+            executor: An existing [`concurrent.futures.Executor`](https://docs.python.org/3/library/concurrent.futures.html#executor-objects) to run on
+                (e.g. a `ThreadPoolExecutor` or a `ProcessPoolExecutor` with an initializer), in which case `how`, `num_workers` and `pool` must not be given.
+                Outputs are ordered, chunked and have their exceptions raised or returned as with any other pool. The loop never shuts down the executor, but
+                once the loop is done (or stopped early), its items which did not start yet are cancelled.
+
+                With a `ThreadPoolExecutor`, the functions are called as is. With other executors, they are pickled (so they must be importable, e.g. not
+                lambdas) and sent along with every task, and compiled once per worker process.
+
+        !!! note
+
+            Creating a pool (especially a process pool) is relatively expensive. When many short loops are run, e.g. inside a request handler, share a
+            persistent pool between them:
+
+            ```python
+
+            from loop import loop_over, pools
+
+
+            def handle(request):
+                return loop_over(request.items).map(parse).concurrently(pool=pools.get('processes', 8)).reduce(merge)
+            ```
+
+            With `timeout` or `retries`, each item is sent to the workers on its own (so `chunksize` is not supported), and at most one item per worker is in
+            progress at a time, which is how an item's time is measured from when it starts (rather than from when it is queued). With a `pool` that is not created
+            by the loop (except for thread pools from [`loop.pools.get()`][loop.pools.get]), the time is measured from when the item is sent, and dead worker
+            processes are not detected. The pool must have an `apply_async()` method.
         """
-        # Explicitly disable concurrency by passing `num_workers=0`
-        if num_workers == 0:
-            return self
+        if executor is not None:
+            from concurrent.futures import Executor
+
+            if not isinstance(executor, Executor):
+                raise ValueError(f'`Loop.concurrently()` called with {executor = }, which is not a `concurrent.futures.Executor`')
+
+            if how is not None or num_workers is not None or pool is not None:
+                raise ValueError('`Loop.concurrently()` called with both `executor` and `how`/`num_workers`/`pool`')
+
+            pool = executor
+        elif pool is not None:
+            if how is not None or num_workers is not None:
+                raise ValueError('`Loop.concurrently()` called with both `pool` and `how`/`num_workers`')
 
-        if how == 'threads':
-            # If `num_workers` not provided, use the default of https://docs.python.org/3/library/concurrent.futures.html#concurrent.futures.ThreadPoolExecutor
+        # Explicitly disable concurrency by passing `num_workers=0`
+        elif num_workers == 0:
+            pool = DummyPool()
+        elif how in {'threads', 'processes'}:
+            pool = OwnedPool(how, num_workers, serializer, start_method)  # type: ignore
+        elif how == 'asyncio':
             if num_workers is None:
-                cpu_count = os.cpu_count() or 1
-                num_workers = min(32, cpu_count + 4)
+                num_workers = 1000
 
-            self._pool = ThreadPool(processes=num_workers)
-        elif how == 'processes':
-            self._pool = ProcessPool(processes=num_workers)
+            pool = AsyncioPool(num_workers)
         else:
             raise ValueError(f'`Loop.concurrently()` called with non-supported argument {how = }')
 
-        if exceptions not in {'raise', 'return'}:
+        if exceptions not in {'raise', 'return', 'collect', 'skip'}:
             raise ValueError(f'`Loop.concurrently()` called with non-supported argument {exceptions = }')
 
-        self._raise = (exceptions == 'raise')
+        if serializer not in {'dill', 'pickle', 'cloudpickle'}:
+            raise ValueError(f'`Loop.concurrently()` called with non-supported argument {serializer = }')
+
+        if start_method not in {None, 'fork', 'forkserver', 'spawn'}:
+            raise ValueError(f'`Loop.concurrently()` called with non-supported argument {start_method = }')
+
+        if (serializer != 'dill' or start_method is not None) and how != 'processes':
+            raise ValueError('`Loop.concurrently()` called with `serializer`/`start_method`, which require `how="processes"`')
+
+        if start_method is not None and serializer == 'dill':
+            raise ValueError('`Loop.concurrently()` called with `start_method`, which requires `serializer="pickle"` or `serializer="cloudpickle"`')
+
+        if transport not in {'pickle', 'shm'}:
+            raise ValueError(f'`Loop.concurrently()` called with non-supported argument {transport = }')
+
+        # Workers which share this process would only pay for extra copies, whichever way their pool was given.
+        if transport == 'shm' and (isinstance(pool, AsyncioPool) or runs_in_threads(as_pool(pool))):
+            raise ValueError(f'`Loop.concurrently()` called with {transport = }, which requires worker processes')
+
+        if isinstance(chunksize, str) and chunksize != 'auto':
+            raise ValueError(f'`Loop.concurrently()` called with non-supported argument {chunksize = }')
 
-        if chunksize is not None:
-            self._chunksize_tuple = (chunksize, )
+        if max_in_flight is not None and max_in_flight < max(1, chunksize if isinstance(chunksize, int) else 1):
+            raise ValueError(f'`Loop.concurrently()` called with {max_in_flight = } smaller than {chunksize = }')
+
+        if timeout is not None and timeout <= 0:
+            raise ValueError(f'`Loop.concurrently()` called with non-positive {timeout = }')
+
+        if retries < 0 or backoff < 0:
+            raise ValueError(f'`Loop.concurrently()` called with negative {retries = } or {backoff = }')
+
+        if timeout is not None or retries:
+            if isinstance(pool, (DummyPool, AsyncioPool)):
+                raise ValueError('`Loop.concurrently()` called with `timeout`/`retries`, which require threads or processes')
+
+            if chunksize is not None or transport != 'pickle':
+                raise ValueError('`Loop.concurrently()` called with `timeout`/`retries`, which do not support `chunksize` or `transport`')
+
+        capture = exceptions if exceptions in {'collect', 'skip'} else None
+        entry = (len(self._stages), Concurrency(pool, exceptions == 'raise', ordered, chunksize, max_in_flight, transport, timeout, retries, backoff, capture))
+
+        # A call which is not preceded by any new `map()`/`filter()` replaces the previous one.
+        if self._concurrency and self._concurrency[-1][0] == entry[0]:
+            self._concurrency[-1] = entry
+        else:
+            self._concurrency.append(entry)
 
         return self
 
@@ -450,34 +780,34 @@ class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
             pass
 
     @overload
-    def reduce(self: 'Loop[S, T, FALSE, FALSE, TRUE]', function: Callable[[T, T], T], initializer: Union[Type[_missing], T] = _missing) -> T:
+    def reduce(self: 'Loop[S, T, FALSE, FALSE, TRUE]', function: Callable[[T, T], T], initializer: Union[Type[_missing], T] = _missing, *, associative: bool = False, combine: Optional[Callable[[Any, Any], Any]] = None) -> T:
         ...
 
     @overload
-    def reduce(self: 'Loop[S, T, FALSE, TRUE, FALSE]', function: Callable[[S, S], S], initializer: Union[Type[_missing], S] = _missing) -> S:
+    def reduce(self: 'Loop[S, T, FALSE, TRUE, FALSE]', function: Callable[[S, S], S], initializer: Union[Type[_missing], S] = _missing, *, associative: bool = False, combine: Optional[Callable[[Any, Any], Any]] = None) -> S:
         ...
 
     @overload
-    def reduce(self: 'Loop[S, T, FALSE, TRUE, TRUE]', function: Callable[[Tuple[S, T], Tuple[S, T]], Tuple[S, T]], initializer: Union[Type[_missing], Tuple[S, T]] = _missing) -> Tuple[S, T]:
+    def reduce(self: 'Loop[S, T, FALSE, TRUE, TRUE]', function: Callable[[Tuple[S, T], Tuple[S, T]], Tuple[S, T]], initializer: Union[Type[_missing], Tuple[S, T]] = _missing, *, associative: bool = False, combine: Optional[Callable[[Any, Any], Any]] = None) -> Tuple[S, T]:
         ...
 
     @overload
-    def reduce(self: 'Loop[S, T, TRUE, FALSE, FALSE]', function: Callable[[int, int], int], initializer: Union[Type[_missing], int] = _missing) -> int:
+    def reduce(self: 'Loop[S, T, TRUE, FALSE, FALSE]', function: Callable[[int, int], int], initializer: Union[Type[_missing], int] = _missing, *, associative: bool = False, combine: Optional[Callable[[Any, Any], Any]] = None) -> int:
         ...
 
     @overload
-    def reduce(self: 'Loop[S, T, TRUE, FALSE, TRUE]', function: Callable[[Tuple[int, T], Tuple[int, T]], Tuple[int, T]], initializer: Union[Type[_missing], Tuple[int, T]] = _missing) -> Tuple[int, T]:
+    def reduce(self: 'Loop[S, T, TRUE, FALSE, TRUE]', function: Callable[[Tuple[int, T], Tuple[int, T]], Tuple[int, T]], initializer: Union[Type[_missing], Tuple[int, T]] = _missing, *, associative: bool = False, combine: Optional[Callable[[Any, Any], Any]] = None) -> Tuple[int, T]:
         ...
 
     @overload
-    def reduce(self: 'Loop[S, T, TRUE, TRUE, FALSE]', function: Callable[[Tuple[int, S], Tuple[int, S]], Tuple[int, S]], initializer: Union[Type[_missing], Tuple[int, S]] = _missing) -> Tuple[int, S]:
+    def reduce(self: 'Loop[S, T, TRUE, TRUE, FALSE]', function: Callable[[Tuple[int, S], Tuple[int, S]], Tuple[int, S]], initializer: Union[Type[_missing], Tuple[int, S]] = _missing, *, associative: bool = False, combine: Optional[Callable[[Any, Any], Any]] = None) -> Tuple[int, S]:
         ...
 
     @overload
-    def reduce(self: 'Loop[S, T, TRUE, TRUE, TRUE]', function: Callable[[Tuple[int, S, T], Tuple[int, S, T]], Tuple[int, S, T]], initializer: Union[Type[_missing], Tuple[int, S, T]] = _missing) -> Tuple[int, S, T]:
+    def reduce(self: 'Loop[S, T, TRUE, TRUE, TRUE]', function: Callable[[Tuple[int, S, T], Tuple[int, S, T]], Tuple[int, S, T]], initializer: Union[Type[_missing], Tuple[int, S, T]] = _missing, *, associative: bool = False, combine: Optional[Callable[[Any, Any], Any]] = None) -> Tuple[int, S, T]:
         ...
 
-    def reduce(self, function, initializer=_missing):
+    def reduce(self, function, initializer=_missing, *, associative=False, combine=None):
         """
         Consume the loop and reduce it to a single value using `function`.
 
@@ -496,10 +826,424 @@ class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
             ```console
             The L2 norm of [-1.1, 25.3, 4.9] equals 25.79
             ```
+
+        Args:
+            function: Called with the value reduced so far and the next return value of the loop, returns the new reduced value.
+            initializer: If given, the reduction starts from it (and it is also the result when the loop is empty).
+            associative: If True, `function` is promised to be associative (e.g. a sum, a minimum or a set union), so when the last segment of the loop runs
+                [`concurrently()`][loop.Loop.concurrently] on threads or processes, each worker reduces chunks of items by itself, and only the reduced chunks
+                are sent back and combined (in order, pairwise) by the consuming process. The chunks are sized as if `chunksize="auto"` was given, unless
+                `chunksize` was given explicitly.
+            combine: Combines two values reduced from different chunks. If given, `function` may also reduce items of another type than the reduced value
+                (e.g. adding words to a `collections.Counter`, which are then combined by `operator.add`), and each chunk starts from a copy of `initializer`,
+                which must be given (and be neutral for `combine`, such as an empty `Counter`). Requires `associative=True`.
+
+        !!! note
+
+            When reducing in the workers, exceptions raised by the functions are raised regardless of `exceptions` in [`concurrently()`][loop.Loop.concurrently],
+            and a progress bar (see [`show_progress()`][loop.Loop.show_progress]) is updated once per chunk.
+
+            If a segment before the last one has `ordered=False`, chunks may hold items out of their original order, so `function` must also be commutative.
         """
+        if combine is not None and not associative:
+            raise ValueError('`Loop.reduce()` called with `combine` but without `associative=True`')
+
+        if combine is not None and initializer is _missing:
+            raise ValueError('`Loop.reduce()` called with `combine` but without `initializer`')
+
+        segments = self._segments()
+
+        if associative and self._reduces_in_workers(segments):
+            return self._reduce_in_workers(segments, function, initializer, combine)
+
         args = () if initializer is _missing else (initializer,)
         return reduce(function, self, *args)
 
+    @overload
+    def first(self: 'Loop[S, T, FALSE, FALSE, FALSE]') -> None:
+        ...
+
+    @overload
+    def first(self: 'Loop[S, T, FALSE, FALSE, TRUE]') -> T:
+        ...
+
+    @overload
+    def first(self: 'Loop[S, T, FALSE, TRUE, FALSE]') -> S:
+        ...
+
+    @overload
+    def first(self: 'Loop[S, T, FALSE, TRUE, TRUE]') -> Tuple[S, T]:
+        ...
+
+    @overload
+    def first(self: 'Loop[S, T, TRUE, FALSE, FALSE]') -> int:
+        ...
+
+    @overload
+    def first(self: 'Loop[S, T, TRUE, FALSE, TRUE]') -> Tuple[int, T]:
+        ...
+
+    @overload
+    def first(self: 'Loop[S, T, TRUE, TRUE, FALSE]') -> Tuple[int, S]:
+        ...
+
+    @overload
+    def first(self: 'Loop[S, T, TRUE, TRUE, TRUE]') -> Tuple[int, S, T]:
+        ...
+
+    def first(self):
+        """
+        Return the first return value of the loop, and stop it (see the note below).
+
+        Example:
+            ```python
+            from loop import loop_over
+
+
+            print(loop_over(range(10)).filter(lambda x: x > 6).first())
+            ```
+            ```console
+            7
+            ```
+
+        !!! note
+
+            This and the other methods which may return before the loop is exhausted ([`take()`][loop.Loop.take], [`any()`][loop.Loop.any],
+            [`all()`][loop.Loop.all] and [`find()`][loop.Loop.find]) stop the loop as soon as they have their answer: no more items are sent to the workers,
+            pools created by the loop are shut down (which kills their worker processes), and items already sent to thread pools that are not ours to shut
+            down are skipped. Items already sent to process pools that are not ours to shut down still run in the background, but their results are discarded.
+
+        Raises:
+            ValueError: If the loop is empty.
+        """
+        with self._iteration() as iterator:
+            for retval in iterator:
+                return retval
+
+        raise ValueError('`Loop.first()` called on an empty loop')
+
+    @overload
+    def take(self: 'Loop[S, T, FALSE, FALSE, FALSE]', n: int) -> List[None]:
+        ...
+
+    @overload
+    def take(self: 'Loop[S, T, FALSE, FALSE, TRUE]', n: int) -> List[T]:
+        ...
+
+    @overload
+    def take(self: 'Loop[S, T, FALSE, TRUE, FALSE]', n: int) -> List[S]:
+        ...
+
+    @overload
+    def take(self: 'Loop[S, T, FALSE, TRUE, TRUE]', n: int) -> List[Tuple[S, T]]:
+        ...
+
+    @overload
+    def take(self: 'Loop[S, T, TRUE, FALSE, FALSE]', n: int) -> List[int]:
+        ...
+
+    @overload
+    def take(self: 'Loop[S, T, TRUE, FALSE, TRUE]', n: int) -> List[Tuple[int, T]]:
+        ...
+
+    @overload
+    def take(self: 'Loop[S, T, TRUE, TRUE, FALSE]', n: int) -> List[Tuple[int, S]]:
+        ...
+
+    @overload
+    def take(self: 'Loop[S, T, TRUE, TRUE, TRUE]', n: int) -> List[Tuple[int, S, T]]:
+        ...
+
+    def take(self, n):
+        """
+        Return the first `n` return values of the loop (or all of them, if there are fewer), and stop it (see [`first()`][loop.Loop.first]).
+
+        Example:
+            ```python
+            from loop import loop_over
+
+
+            print(loop_over(range(10)).map(lambda x: x * x).take(3))
+            ```
+            ```console
+            [0, 1, 4]
+            ```
+        """
+        if n < 0:
+            raise ValueError(f'`Loop.take()` called with negative {n = }')
+
+        if n == 0:
+            return []
+
+        with self._iteration() as iterator:
+            return list(itertools.islice(iterator, n))
+
+    @overload
+    def find(self: 'Loop[S, T, FALSE, FALSE, FALSE]', predicate: Callable[[None], Any]) -> Optional[None]:
+        ...
+
+    @overload
+    def find(self: 'Loop[S, T, FALSE, FALSE, TRUE]', predicate: Callable[[T], Any]) -> Optional[T]:
+        ...
+
+    @overload
+    def find(self: 'Loop[S, T, FALSE, TRUE, FALSE]', predicate: Callable[[S], Any]) -> Optional[S]:
+        ...
+
+    @overload
+    def find(self: 'Loop[S, T, FALSE, TRUE, TRUE]', predicate: Callable[[Tuple[S, T]], Any]) -> Optional[Tuple[S, T]]:
+        ...
+
+    @overload
+    def find(self: 'Loop[S, T, TRUE, FALSE, FALSE]', predicate: Callable[[int], Any]) -> Optional[int]:
+        ...
+
+    @overload
+    def find(self: 'Loop[S, T, TRUE, FALSE, TRUE]', predicate: Callable[[Tuple[int, T]], Any]) -> Optional[Tuple[int, T]]:
+        ...
+
+    @overload
+    def find(self: 'Loop[S, T, TRUE, TRUE, FALSE]', predicate: Callable[[Tuple[int, S]], Any]) -> Optional[Tuple[int, S]]:
+        ...
+
+    @overload
+    def find(self: 'Loop[S, T, TRUE, TRUE, TRUE]', predicate: Callable[[Tuple[int, S, T]], Any]) -> Optional[Tuple[int, S, T]]:
+        ...
+
+    def find(self, predicate):
+        """
+        Return the first return value of the loop for which `predicate` returns a truthy value (or `None` if there is none), and stop the loop (see
+        [`first()`][loop.Loop.first]).
+
+        `predicate` is called in this process, by the consumer of the loop. To run it in the workers, use [`filter()`][loop.Loop.filter] followed by
+        [`first()`][loop.Loop.first] instead.
+
+        Example:
+            ```python
+            from loop import loop_over
+
+
+            print(loop_over(['apple', 'banana', 'cherry']).find(lambda word: 'n' in word))
+            ```
+            ```console
+            banana
+            ```
+        """
+        with self._iteration() as iterator:
+            for retval in iterator:
+                if predicate(retval):
+                    return retval
+
+        return None
+
+    def any(self, predicate: Optional[Callable[[Any], Any]] = None) -> bool:
+        """
+        Return whether `predicate` (or, if not given, the [`bool()`](https://docs.python.org/3/library/functions.html#bool) of the value itself) is true for any of
+        the return values of the loop, stopping it as soon as one is found (see [`first()`][loop.Loop.first]).
+
+        `predicate` is called in this process, same as in [`find()`][loop.Loop.find].
+
+        Example:
+            ```python
+            from loop import loop_over
+
+
+            print(loop_over(range(10)).map(lambda x: x * x).any(lambda x: x > 50))
+            ```
+            ```console
+            True
+            ```
+        """
+        with self._iteration() as iterator:
+            for retval in iterator:
+                if retval if predicate is None else predicate(retval):
+                    return True
+
+        return False
+
+    def all(self, predicate: Optional[Callable[[Any], Any]] = None) -> bool:
+        """
+        Return whether `predicate` (or, if not given, the [`bool()`](https://docs.python.org/3/library/functions.html#bool) of the value itself) is true for all of
+        the return values of the loop, stopping it as soon as one for which it is false is found (see [`first()`][loop.Loop.first]).
+
+        `predicate` is called in this process, same as in [`find()`][loop.Loop.find].
+
+        Example:
+            ```python
+            from loop import loop_over
+
+
+            print(loop_over(range(10)).map(lambda x: x * x).all(lambda x: x < 50))
+            ```
+            ```console
+            False
+            ```
+        """
+        with self._iteration() as iterator:
+            for retval in iterator:
+                if not (retval if predicate is None else predicate(retval)):
+                    return False
+
+        return True
+
+    @overload
+    def to_list(self: 'Loop[S, T, FALSE, FALSE, FALSE]') -> List[None]:
+        ...
+
+    @overload
+    def to_list(self: 'Loop[S, T, FALSE, FALSE, TRUE]') -> List[T]:
+        ...
+
+    @overload
+    def to_list(self: 'Loop[S, T, FALSE, TRUE, FALSE]') -> List[S]:
+        ...
+
+    @overload
+    def to_list(self: 'Loop[S, T, FALSE, TRUE, TRUE]') -> List[Tuple[S, T]]:
+        ...
+
+    @overload
+    def to_list(self: 'Loop[S, T, TRUE, FALSE, FALSE]') -> List[int]:
+        ...
+
+    @overload
+    def to_list(self: 'Loop[S, T, TRUE, FALSE, TRUE]') -> List[Tuple[int, T]]:
+        ...
+
+    @overload
+    def to_list(self: 'Loop[S, T, TRUE, TRUE, FALSE]') -> List[Tuple[int, S]]:
+        ...
+
+    @overload
+    def to_list(self: 'Loop[S, T, TRUE, TRUE, TRUE]') -> List[Tuple[int, S, T]]:
+        ...
+
+    def to_list(self):
+        """
+        Consume the loop and return a list of its return values, same as `list(loop)`.
+        """
+        with self._iteration() as iterator:
+            # Not preallocated from `_exact_length()` (unlike `to_numpy()`): a list holds only pointers, so growing it costs little memory, and filling
+            # `[None] * n` item by item in Python is slower than `list()` filling it in C.
+            return list(iterator)
+
+    def to_numpy(self, dtype: Any = None) -> Any:
+        """
+        Consume the loop and return a NumPy array of its return values.
+
+        If `dtype` is given, the values are written into the array as they arrive, rather than being kept in a list until the loop ends (which for numbers takes
+        several times the memory of the array). The array is allocated once if the number of values is known in advance, which is when the loop's iterable has
+        a `len()` and the loop has no [`filter()`][loop.Loop.filter].
+
+        Example:
+            ```python
+            from loop import loop_over
+
+
+            print(loop_over(range(5)).map(lambda x: x / 2).to_numpy(float))
+            ```
+            ```console
+            [0.  0.5 1.  1.5 2. ]
+            ```
+
+        Args:
+            dtype: The data type of the array's elements. If the loop returns arrays (of the same shape), they make the rows of an array of a higher
+                dimension. If the loop returns tuples (see [`returning()`][loop.Loop.returning]), `dtype` must be a
+                [structured data type](https://numpy.org/doc/stable/user/basics.rec.html) with a field for each of their items, see also
+                [`to_columns()`][loop.Loop.to_columns]. If not given, it is inferred by NumPy from all the values once the loop ends.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        with self._iteration() as iterator:
+            return to_array(iterator, dtype, self._exact_length())
+
+    def to_columns(self, dtypes: Optional[Sequence[Any]] = None) -> Tuple[Any, ...]:
+        """
+        Consume the loop and return a NumPy array for each of its return values (see [`returning()`][loop.Loop.returning]), in the order of the tuples it
+        would return: the enumerations, inputs and outputs.
+
+        Each return value is written into its columns as it arrives, so the tuples returned by the loop are never kept (which for millions of items takes
+        several times the memory of the columns). Columns with a data type are allocated once if the number of values is known in advance (same as in
+        [`to_numpy()`][loop.Loop.to_numpy]), otherwise their values are kept in a list until the loop ends.
+
+        Example:
+            ```python
+            from loop import loop_over
+
+
+            indices, squares = loop_over(range(1, 4)).map(lambda x: x * x).returning(enumerations=True).to_columns([int, float])
+            print(indices, squares)
+            ```
+            ```console
+            [0 1 2] [1. 4. 9.]
+            ```
+
+        Args:
+            dtypes: The data type of each column, where `None` means it is inferred by NumPy from all its values once the loop ends. If not given, the
+                enumerations are integers, and the data types of the other columns are inferred.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        num_columns = self._returns_enumerations + self._returns_inputs + self._returns_outputs
+
+        if num_columns == 0:
+            raise ValueError('`Loop.to_columns()` called on a loop which returns nothing, see `Loop.returning()`')
+
+        if dtypes is None:
+            dtypes = [int if self._returns_enumerations and k == 0 else None for k in range(num_columns)]
+        elif len(dtypes) != num_columns:
+            raise ValueError(f'`Loop.to_columns()` called with {len(dtypes)} dtypes for {num_columns} columns')
+
+        length = self._exact_length()
+
+        with self._iteration() as iterator:
+            return to_columns(iterator, num_columns, dtypes, length, operator.length_hint(self._iterable) if length is None else length)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistics of the most recent iteration over the loop (which are updated while it is still running), see also [`profile()`][loop.Loop.profile].
+
+        Example:
+            ```python
+            from loop import loop_over
+
+
+            loop = loop_over(range(100_000)).map(abs).concurrently('processes', chunksize='auto')
+            loop.exhaust()
+            print(loop.stats())
+            ```
+            ```console
+            {'segments': [{'chunksize': 'auto', 'chunksizes': [1, 8, 64, 512, 4096, 5712, ...], 'item_seconds': 3.1e-07, 'serialization_seconds': 3.2e-06}]}
+            ```
+
+        Returns:
+            A dictionary with a `"segments"` entry, which holds a dictionary for each segment (see [`concurrently()`][loop.Loop.concurrently], a loop which does not
+                call it has a single segment) with its `"chunksize"` setting. If it was `"auto"`, there are also the chosen chunk sizes in `"chunksizes"`
+                (each time the size changed), and the estimated seconds per item spent in the functions in `"item_seconds"`, and in serialization in
+                `"serialization_seconds"`.
+
+                If the loop is profiled, each segment also has its duration in `"wall_seconds"`, and a dictionary for each of its functions in `"stages"`, with
+                its `"name"`, `"kind"` (`"map"`, `"map_batches"` or `"filter"`), number of `"calls"`, and their `"total_seconds"`, `"mean_seconds"`,
+                `"p50_seconds"` and `"p99_seconds"` (percentiles are approximate, to within about 5%). Filters also have a `"selectivity"`, the fraction of
+                items that passed. Segments which ran on a pool also have `"workers"`, with their `"count"`, total `"busy_seconds"` and `"idle_seconds"`,
+                and `"utilization"` (the busy fraction). The time not spent in the stages is spent on serialization, queueing and the pool's bookkeeping.
+
+                The top level then also has `"wait_seconds"`, the time spent waiting for the next item, and `"consumer_seconds"`, the time spent by the consumer
+                (e.g. the body of a `for` statement) between items.
+
+                If failures are captured (see `exceptions` in [`concurrently()`][loop.Loop.concurrently]), the top level also has `"errors"`, with the number of
+                failed items in `"count"`, the number of failures of each exception type in `"types"`, and the first [`ErrorRecord`][loop.errors.ErrorRecord]
+                of each type in `"examples"`.
+        """
+        stats = {**self._stats, 'segments': [summarize(segment) for segment in self._stats['segments']]}
+
+        if 'errors' in stats:
+            stats['errors'] = stats['errors'].summary()
+
+        return stats
+
     @overload
     def __iter__(self: 'Loop[S, T, FALSE, FALSE, FALSE]') -> Iterator[None]:
         ...
@@ -548,13 +1292,227 @@ class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
                 pass
             ```
         """
-        i = 0
+        segments = self._segments()
+        self._stats = {'segments': []}
+
+        if is_async_iterable(self._iterable) or any(isinstance(concurrency.pool, AsyncioPool) for _, concurrency in segments):
+            return iterate_in_event_loop(self.__aiter__())
+
+        if (len(segments) == 1 and isinstance(segments[0][1].pool, DummyPool) and segments[0][1].capture is None and not self._has_batches()
+                and self._checkpoint is None and not self._hooks):
+            # Nothing to set up, so the whole loop is compiled into a single generator (which also reports to the progress bar, if any).
+            if isinstance(self._progbar, DummyProgbar) and not self._profiled:
+                self._stats['segments'].append({'chunksize': None})
+                return self._compile_sequential(segments[0], None)(self._iterable)
+
+            iterator = self._iterate_sequential(segments[0])
+        else:
+            iterator = self._iterate(segments)
+
+        return timed(iterator, self._stats) if self._profiled else iterator
+
+    @overload
+    def __aiter__(self: 'Loop[S, T, FALSE, FALSE, FALSE]') -> AsyncIterator[None]:
+        ...
+
+    @overload
+    def __aiter__(self: 'Loop[S, T, FALSE, FALSE, TRUE]') -> AsyncIterator[T]:
+        ...
+
+    @overload
+    def __aiter__(self: 'Loop[S, T, FALSE, TRUE, FALSE]') -> AsyncIterator[S]:
+        ...
+
+    @overload
+    def __aiter__(self: 'Loop[S, T, FALSE, TRUE, TRUE]') -> AsyncIterator[Tuple[S, T]]:
+        ...
+
+    @overload
+    def __aiter__(self: 'Loop[S, T, TRUE, FALSE, FALSE]') -> AsyncIterator[int]:
+        ...
+
+    @overload
+    def __aiter__(self: 'Loop[S, T, TRUE, FALSE, TRUE]') -> AsyncIterator[Tuple[int, T]]:
+        ...
+
+    @overload
+    def __aiter__(self: 'Loop[S, T, TRUE, TRUE, FALSE]') -> AsyncIterator[Tuple[int, S]]:
+        ...
+
+    @overload
+    def __aiter__(self: 'Loop[S, T, TRUE, TRUE, TRUE]') -> AsyncIterator[Tuple[int, S, T]]:
+        ...
+
+    async def __aiter__(self):
+        """
+        Consume the loop with an `async for` statement, inside a running event loop.
+
+        Coroutine functions passed to [`map()`][loop.Loop.map] and [`filter()`][loop.Loop.filter] are awaited, concurrently if [`concurrently("asyncio")`][loop.Loop.concurrently]
+        was called. Also, `iterable` may be an asynchronous iterable.
+
+        Example:
+            ```python
+            import asyncio
+
+            from loop import loop_over
+
+
+            async def double(x):
+                await asyncio.sleep(0.1)
+                return 2 * x
+
+
+            async def main():
+                async for x in loop_over(range(5)).map(double).concurrently('asyncio'):
+                    print(x)
+
+
+            asyncio.run(main())
+            ```
+            ```console
+            0
+            2
+            4
+            6
+            8
+            ```
+
+        !!! note
+
+            When concurrency is done with threads or processes, the loop is advanced in a worker thread, so the event loop is never blocked by waiting on the pool.
+        """
+        segments = self._segments()
+        self._check_async_supported(segments)
+        stages, concurrency = segments[0]
+
+        if len(segments) > 1 or not isinstance(concurrency.pool, (AsyncioPool, DummyPool)) or self._has_batches() or self._checkpoint is not None or self._profiled or self._hooks:
+            async for retval in iterate_in_thread(iter(self)):
+                yield retval
+
+            return
+        limit = concurrency.pool.num_workers if isinstance(concurrency.pool, AsyncioPool) else 1
+        errors = self._error_summary(segments)
 
         with self._progbar as progbar:
-            with self._pool as pool:
-                for inp, exception, out in pool.imap(partial(_apply_maps_and_filters, self._functions), self._iterable, *self._chunksize_tuple):
-                    if exception and self._raise:
-                        raise out
+            async for i, inp, exception, out in amap(stages, aenumerate(self._iterable), limit, concurrency.ordered):
+                if exception and concurrency.raise_:
+                    raise out
+
+                if exception and errors is not None:
+                    out = errors.add(i, out)
+
+                    if concurrency.capture == 'skip':
+                        out = skipped
+
+                if out is skipped:
+                    progbar.skip_one()
+                else:
+                    retval = self._retval_packer(i, inp, out)
+                    progbar.advance_one(retval)
+                    yield retval
+
+    def _iterate_sequential(self, segment: Segment) -> Iterator:
+        segment_stats: Dict[str, Any] = {'chunksize': None}
+        self._stats['segments'].append(segment_stats)
+        segment_profile = None
+        stage_stats = None
+
+        if self._profiled:
+            segment_profile = segment_stats['profile'] = SegmentProfile(segment[0], None)
+            stage_stats = segment_profile.profile.stages
+
+        try:
+            with self._progbar as progbar:
+                yield from self._compile_sequential(segment, progbar, stage_stats)(self._iterable)  # type: ignore
+        finally:
+            if segment_profile is not None:
+                segment_profile.stop()
+
+    def _compile_sequential(self, segment: Segment, progbar: Optional[Progbar], stage_stats: Optional[List[StageStats]] = None) -> Callable[[Iterable], Iterator]:
+        stages, concurrency = segment
+        return compile_sequential(stages, concurrency.raise_, self._returns_enumerations, self._returns_inputs, self._returns_outputs, progbar, stage_stats)
+
+    def _exact_length(self) -> Optional[int]:
+        # Every item has a return value, unless it is filtered out, failed in a segment which skips failures, or it was completed by a previous run whose
+        # outputs were not recorded.
+        if any(filtering for _, filtering in self._stages) or not hasattr(self._iterable, '__len__'):
+            return None
+
+        if any(concurrency.capture == 'skip' for _, concurrency in self._segments()):
+            return None
+
+        if self._checkpoint is not None and not self._checkpoint.outputs and self._returns_outputs:
+            return None
+
+        return len(self._iterable)  # type: ignore
+
+    @contextmanager
+    def _iteration(self) -> Iterator[Iterator]:
+        # Closed right away once the caller is done (rather than once garbage collected), which stops the workers.
+        iterator = iter(self)
+
+        try:
+            yield iterator
+        finally:
+            close = getattr(iterator, 'close', None)
+
+            if close is not None:
+                close()
+
+    def _iterate(self, segments: List[Segment]) -> Iterator:
+        items: Iterator[Tuple[int, S]] = enumerate(self._iterable)  # type: ignore
+        inputs: Dict[int, S] = {}
+
+        # Inputs are kept aside in this process, so they are never sent back by the workers.
+        if self._returns_inputs:
+            items = _remember_inputs(items, inputs)
+
+        checkpoint = self._checkpoint
+        completed: Dict[int, Any] = {}
+        hooks = HookDispatcher(self._hooks) if self._hooks else None
+        durations: Optional[Dict[int, float]] = {} if hooks is not None else None
+        errors = self._error_summary(segments)
+
+        if checkpoint is None:
+            runner = results = run_segments(segments, items, self._returns_outputs, self._stats['segments'], self._profiled, durations, errors=errors)
+        else:
+            # Completed items are not sent to the workers, their recorded results are merged back instead.
+            completed = checkpoint.load()
+            replayed: Deque[Tuple[int, bool, Any]] = deque()
+            items = split_completed(items, completed, replayed)
+            runner = run_segments(segments, items, self._returns_outputs or checkpoint.outputs, self._stats['segments'], self._profiled, durations, errors=errors)
+            results = merge_bypassed(runner, replayed, all(concurrency.ordered for _, concurrency in segments))
+
+        error: Optional[BaseException] = None
+
+        try:
+            if hooks is not None:
+                hooks.start()
+
+            with self._progbar as progbar:
+                if completed:
+                    num_skipped = sum(out is skipped for out in completed.values())
+                    progbar.resume(len(completed) - num_skipped, num_skipped)
+
+                for i, exception, out in results:
+                    inp: Any = inputs.pop(i) if self._returns_inputs else None
+
+                    if checkpoint is not None:
+                        if i in completed:
+                            # Already counted by the progress bar, and returned only if there is what to return.
+                            if out is not skipped and (checkpoint.outputs or not self._returns_outputs):
+                                yield self._retval_packer(i, inp, out)
+
+                            continue
+
+                        if not exception:
+                            checkpoint.record(i, out)
+
+                    if hooks is not None:
+                        duration = durations.pop(i, 0.0)  # type: ignore
+
+                        if out is not skipped:
+                            hooks.item_done(i, duration, out if exception else None)
 
                     if out is skipped:
                         progbar.skip_one()
@@ -562,10 +1520,107 @@ class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
                         retval = self._retval_packer(i, inp, out)
                         progbar.advance_one(retval)
                         yield retval
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # Stops the segments right away when the loop ends early (e.g. by `break`), rather than once they are garbage collected.
+            runner.close()  # type: ignore
+
+            if checkpoint is not None:
+                checkpoint.close()
+
+            if hooks is not None:
+                hooks.end(error)
+
+    def _error_summary(self, segments: List[Segment]) -> Optional[ErrorSummary]:
+        # Reported by `stats()`, if any segment captures its failures.
+        if all(concurrency.capture is None for _, concurrency in segments):
+            return None
+
+        errors = self._stats['errors'] = ErrorSummary()
+        return errors
+
+    def _reduces_in_workers(self, segments: List[Segment]) -> bool:
+        concurrency = segments[-1][1]
+
+        # Otherwise, there are either no workers to reduce in, or features which need every item's result in this process.
+        return (not isinstance(concurrency.pool, (DummyPool, AsyncioPool)) and concurrency.transport != 'shm' and not concurrency.supervised
+                and self._checkpoint is None and not self._hooks
+                and not is_async_iterable(self._iterable) and not any(isinstance(concurrency.pool, AsyncioPool) for _, concurrency in segments)
+                and not (self._returns_inputs and len(segments) > 1)  # Inputs would have to be sent to the last segment's workers.
+                and all(concurrency.capture is None for _, concurrency in segments))
+
+    def _reduce_in_workers(self, segments: List[Segment], function: Callable[[Any, Any], Any], initializer: Any, combine: Optional[Callable[[Any, Any], Any]]) -> Any:
+        reducer = Reducer(function, self._retval_packer, empty if initializer is _missing else initializer, combine)
+        self._stats = {'segments': []}
+        results = run_segments(segments, enumerate(self._iterable), self._returns_outputs, self._stats['segments'], self._profiled, reducer=reducer)  # type: ignore
+        partials: List[Tuple[int, Any]] = []
+
+        try:
+            with self._progbar as progbar:
+                for i, exception, out in results:
+                    if exception:
+                        raise out
+
+                    if isinstance(out, Partial):
+                        progbar.advance_many(out.advanced, out.skipped)
+
+                        if out.advanced:
+                            partials.append((i, out.value))
+                    else:
+                        progbar.skip_one()  # Skipped in a previous segment.
+        finally:
+            results.close()  # type: ignore
+
+        # Each chunk is identified by its first index.
+        partials.sort(key=lambda partial: partial[0])
+        return reducer.combine_all([value for _, value in partials])
+
+    def _segments(self) -> List[Segment]:
+        if not self._concurrency:
+            return [(self._stages, Concurrency())]
 
-                    i += 1
+        segments: List[Segment] = []
+        start = 0
 
-    def _set_map_or_filter(self, function, args, kwargs, filtering: bool) -> None:
+        for j, (end, concurrency) in enumerate(self._concurrency):
+            if j == len(self._concurrency) - 1:
+                end = len(self._stages)
+
+            if end > start or (j == len(self._concurrency) - 1 and not segments):
+                segments.append((self._stages[start:end], concurrency))
+
+            start = end
+
+        return segments
+
+    def _check_async_supported(self, segments: List[Segment]) -> None:
+        # An event loop runs only a single segment, either sequentially or with `"asyncio"`.
+        single = len(segments) == 1 and isinstance(segments[0][1].pool, (AsyncioPool, DummyPool))
+
+        if not single and any(isinstance(concurrency.pool, AsyncioPool) for _, concurrency in segments):
+            raise ValueError('`concurrently("asyncio")` cannot be combined with other `concurrently()` calls in the same loop')
+
+        if not single and is_async_iterable(self._iterable):
+            raise TypeError('Asynchronous iterables can only be looped over sequentially or with `concurrently("asyncio")`')
+
+        if self._has_batches() and (is_async_iterable(self._iterable) or any(isinstance(concurrency.pool, AsyncioPool) for _, concurrency in segments)):
+            raise TypeError('`map_batches()` is not supported with asynchronous iterables or `concurrently("asyncio")`')
+
+        if self._checkpoint is not None and (is_async_iterable(self._iterable) or any(isinstance(concurrency.pool, AsyncioPool) for _, concurrency in segments)):
+            raise TypeError('`checkpoint()` is not supported with asynchronous iterables or `concurrently("asyncio")`')
+
+        if self._profiled and (is_async_iterable(self._iterable) or any(isinstance(concurrency.pool, AsyncioPool) for _, concurrency in segments)):
+            raise TypeError('`profile()` is not supported with asynchronous iterables or `concurrently("asyncio")`')
+
+        if self._hooks and (is_async_iterable(self._iterable) or any(isinstance(concurrency.pool, AsyncioPool) for _, concurrency in segments)):
+            raise TypeError('`hooks()` are not supported with asynchronous iterables or `concurrently("asyncio")`')
+
+    def _has_batches(self) -> bool:
+        return any(isinstance(function, BatchAdapter) for function, _ in self._stages)
+
+    def _set_map_or_filter(self, function, args, kwargs, filtering: bool, batching: Optional[Tuple[int, Optional[Callable]]] = None, cache: Optional[Cache] = None) -> None:
         unpacking, args_first = self._next_call_spec
         self._next_call_spec = (None, False)
 
@@ -584,30 +1639,22 @@ class Loop(Generic[S, T, R_ENUM, R_INPS, R_OUTS]):
 
         function = adapter(function, *args, **kwargs)
 
-        if filtering:
-            function = filter_adapter(function)
-
-        self._functions.append(function)
-
+        if batching is not None:
+            function = BatchAdapter(function, *batching)
 
-def _apply_maps_and_filters(functions, inp):
-    out = inp
-    exception = False
+        if cache is not None:
+            function = CachedAdapter(function, cache)
 
-    try:
-        for function in functions:
-            out = function(out)
+        self._stages.append((function, filtering))
 
-            if out is skipped:
-                break
-    except Exception as e:
-        out = e
-        exception = True
 
-    return inp, exception, out
+def _remember_inputs(items: Iterable[Tuple[int, S]], inputs: Dict[int, S]) -> Iterator[Tuple[int, S]]:
+    for i, inp in items:
+        inputs[i] = inp
+        yield i, inp
 
 
-def loop_over(iterable: Iterable[S]) -> Loop[S, S, FALSE, FALSE, TRUE]:
+def loop_over(iterable: Union[Iterable[S], AsyncIterable[S]]) -> Loop[S, S, FALSE, FALSE, TRUE]:
     """Construct a new `Loop` that iterates over `iterable`.
 
     Customize the looping behaviour by chaining different `Loop` methods and finally use a `for` statement like you normally would.
@@ -616,7 +1663,7 @@ def loop_over(iterable: Iterable[S]) -> Loop[S, S, FALSE, FALSE, TRUE]:
         --8<-- "docs/examples/minimal.md"
 
     Args:
-        iterable: The object to be looped over.
+        iterable: The object to be looped over, may also be an asynchronous iterable (see [`__aiter__()`][loop.Loop.__aiter__]).
 
     Returns:
         Returns a new `Loop` instance wrapping `iterable`.
@@ -0,0 +1,78 @@
+"""
+Capturing the failures of items as compact records (see `exceptions="collect"` and `exceptions="skip"` in [`concurrently()`][loop.Loop.concurrently]).
+
+An exception holds its traceback, which holds the frames of the calls that raised it, along with their local variables (e.g. the inputs). A failure is
+therefore turned into an `ErrorRecord` by the worker which caught it, so neither the exception nor those frames outlive the item (and only the record is
+sent back by worker processes). The records are counted into an `ErrorSummary` of the iteration.
+"""
+from typing import Any, Dict, Tuple
+from threading import Lock
+import traceback as tb
+
+
+class ErrorRecord:
+    """The failure of the item at `index`: the name of the exception's `type`, its `message`, and its formatted `traceback`."""
+    __slots__ = ('index', 'type', 'message', 'traceback')
+
+    def __init__(self, index: int, type: str, message: str, traceback: str):
+        self.index = index
+        self.type = type
+        self.message = message
+        self.traceback = traceback
+
+    def __repr__(self) -> str:
+        return f'ErrorRecord(index={self.index!r}, type={self.type!r}, message={self.message!r})'
+
+    @classmethod
+    def from_exception(cls, index: int, error: BaseException) -> 'ErrorRecord':
+        cls_ = type(error)
+        name = cls_.__qualname__ if cls_.__module__ == 'builtins' else f'{cls_.__module__}.{cls_.__qualname__}'
+        return cls(index, name, str(error), ''.join(tb.format_exception(cls_, error, error.__traceback__)))
+
+
+class ErrorSummary:
+    """Counts failures by the type of their exception, keeping the first record of each type as an example."""
+    def __init__(self) -> None:
+        self.count = 0
+        self.counts: Dict[str, int] = {}
+        self.examples: Dict[str, ErrorRecord] = {}
+        self._lock = Lock()  # Segments may report from the feeder threads of their downstream pools.
+
+    def add(self, index: int, error: Any) -> ErrorRecord:
+        """Count the failure of the item at `index`, and return its record (`error` is either a record already, or an exception)."""
+        record = error if isinstance(error, ErrorRecord) else _record(index, error)
+
+        with self._lock:
+            self.count += 1
+            self.counts[record.type] = self.counts.get(record.type, 0) + 1
+            self.examples.setdefault(record.type, record)
+
+        return record
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'count': self.count, 'types': dict(self.counts), 'examples': list(self.examples.values())}
+
+
+def apply_capturing_errors(apply, pipeline, returns_outputs, task):
+    """Same as `apply`, but with the exceptions in its result(s) replaced by `ErrorRecord`s."""
+    results = apply(pipeline, returns_outputs, task)
+
+    if isinstance(results, list):  # A batch.
+        return [_captured(result) for result in results]
+
+    return _captured(results)
+
+
+def _captured(result: Tuple[int, bool, Any]) -> Tuple[int, bool, Any]:
+    i, exception, out = result
+    return (i, True, _record(i, out)) if exception and not isinstance(out, ErrorRecord) else result
+
+
+def _record(index: int, error: BaseException) -> ErrorRecord:
+    record = ErrorRecord.from_exception(index, error)
+    # The frames of the traceback lead (through their callers) back to whoever holds the exception, which makes a reference cycle, freed only by the
+    # garbage collector, along with everything in the frames. The exception is being dropped, so the cycle is broken right away instead.
+    error.__traceback__ = None
+    return record
+
@@ -1,11 +1,34 @@
-from typing import Type, Callable, Union, TypeVar
+from typing import Callable, Optional, List, Any
 from functools import wraps
+from types import FunctionType
+import io
+import pickle
 
 
 class skipped:
     pass
 
 
+def _inlinable(*parts: str):
+    """
+    Record on each adapted function how it calls its adaptee, so that `compiler.py` can inline the call instead of going through the adapter.
+
+    `parts` are the call's arguments in order: `"inp"` (possibly starred) for the loop variable, `"args"` and `"kwargs"` for the bound arguments.
+    """
+    def decorator(adapter):
+        @wraps(adapter)
+        def inlinable_adapter(adaptee, *args, **kwargs):
+            adapted = adapter(adaptee, *args, **kwargs)
+            adapted.inline_call = (parts, adaptee, args, kwargs)
+            adapted.adapter = inlinable_adapter  # See `AdapterPickler`.
+            return adapted
+
+        return inlinable_adapter
+
+    return decorator
+
+
+@_inlinable('inp', 'args', 'kwargs')
 def args_last_adapter(adaptee, *args, **kwargs):
     @wraps(adaptee)
     def adapted(inp):
@@ -14,6 +37,7 @@ def args_last_adapter(adaptee, *args, **kwargs):
     return adapted
 
 
+@_inlinable('args', 'inp', 'kwargs')
 def args_first_adapter(adaptee, *args, **kwargs):
     @wraps(adaptee)
     def adapted(inp):
@@ -22,6 +46,7 @@ def args_first_adapter(adaptee, *args, **kwargs):
     return adapted
 
 
+@_inlinable('*inp', 'args', 'kwargs')
 def tuple_unpack_args_last_adapter(adaptee, *args, **kwargs):
     @wraps(adaptee)
     def adapted(inp):
@@ -30,6 +55,7 @@ def tuple_unpack_args_last_adapter(adaptee, *args, **kwargs):
     return adapted
 
 
+@_inlinable('args', '*inp', 'kwargs')
 def tuple_unpack_args_first_adapter(adaptee, *args, **kwargs):
     @wraps(adaptee)
     def adapted(inp):
@@ -38,6 +64,7 @@ def tuple_unpack_args_first_adapter(adaptee, *args, **kwargs):
     return adapted
 
 
+@_inlinable('args', '**inp', 'kwargs')
 def dict_unpack_adapter(adaptee, *args, **kwargs):
     @wraps(adaptee)
     def adapted(inp):
@@ -46,17 +73,59 @@ def dict_unpack_adapter(adaptee, *args, **kwargs):
     return adapted
 
 
-T = TypeVar('T')
+class BatchAdapter:
+    """
+    Calls `adaptee` once per batch of inputs (instead of once per input), and splits its outputs back into one output per input.
 
+    If `collate` is given, it is used to convert the list of inputs into the batch passed to `adaptee` (e.g. `numpy.stack`).
+    """
+    def __init__(self, adaptee: Callable, batch_size: int, collate: Optional[Callable[[List], Any]] = None):
+        self.adaptee = adaptee
+        self.batch_size = batch_size
+        self.collate = collate
 
-def filter_adapter(adaptee: Callable[[T], bool]) -> Callable[[T], Union[T, Type[skipped]]]:
-    @wraps(adaptee)
-    def adapted(inp):
-        out = adaptee(inp)
+    def __call__(self, inputs: List) -> List:
+        batch = inputs if self.collate is None else self.collate(inputs)
+        outputs = list(self.adaptee(batch))
 
-        if out:
-            return inp
-        else:
-            return skipped
+        if len(outputs) != len(inputs):
+            raise ValueError(f'Batch function {self.adaptee!r} returned {len(outputs)} outputs for {len(inputs)} inputs')
 
-    return adapted
+        return outputs
+
+
+class CachedAdapter:
+    """
+    Calls `adaptee` only for inputs whose outputs are not in `cache` yet (see `caching.py`).
+    """
+    def __init__(self, adaptee: Callable, cache: Any):
+        self.adaptee = adaptee
+        self.cache = cache
+
+    def __call__(self, inp: Any) -> Any:
+        return self.cache.get_or_compute(inp, self.adaptee)
+
+
+class AdapterPickler(pickle.Pickler):
+    """
+    A `pickle.Pickler` which pickles the functions created by the adapters above (which are closures, so `pickle` cannot pickle them) as calls to their adapters.
+    """
+    def reducer_override(self, obj: Any) -> Any:
+        adapter = getattr(obj, 'adapter', None) if isinstance(obj, FunctionType) else None
+
+        if adapter is None:
+            return NotImplemented
+
+        _, adaptee, args, kwargs = obj.inline_call
+        return _adapt, (adapter, adaptee, args, kwargs)
+
+
+def dumps(obj: Any) -> bytes:
+    """Same as `pickle.dumps()`, but also pickling adapted functions (see `AdapterPickler`)."""
+    buffer = io.BytesIO()
+    AdapterPickler(buffer).dump(obj)
+    return buffer.getvalue()
+
+
+def _adapt(adapter: Callable, adaptee: Callable, args: tuple, kwargs: dict) -> Callable:
+    return adapter(adaptee, *args, **kwargs)
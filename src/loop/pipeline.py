@@ -0,0 +1,527 @@
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache, partial
+import itertools
+import os
+import pickle
+import sys
+import time
+
+from .functional import skipped, BatchAdapter, dumps
+from .concurrency import DummyPool, OwnedPool, ExecutorPool, InFlightWindow, Cancellation, apply_unless_cancelled, runs_in_threads, pickles_with_dill, default_num_workers, create_queue, as_pool
+from .compiler import compile_stages
+from .profiling import SegmentProfile, ProfiledBatchAdapter, apply_profiled
+from .transport import SharedMemoryTransport, apply_with_shared_memory
+from .tuning import ChunksizeTuner, apply_to_chunk
+from .reduction import Reducer, apply_reducing, num_items
+from .supervision import Supervisor, apply_supervised, register_channel, unregister_channel, watch_workers
+from .errors import ErrorSummary, apply_capturing_errors
+
+
+Stage = Tuple[Callable[[Any], Any], bool]
+Result = Tuple[int, bool, Any]
+
+
+# When a loop is split into several segments, each segment keeps at most this many items in flight (unless `max_in_flight` was given),
+# which bounds the buffering between consecutive segments.
+DEFAULT_SEGMENT_MAX_IN_FLIGHT = 1024
+
+
+class Concurrency:
+    """Concurrency settings, as set by a single call to [`Loop.concurrently()`][loop.Loop.concurrently]."""
+    def __init__(self, pool: Any = None, raise_: bool = True, ordered: bool = True, chunksize: Optional[Union[int, str]] = None, max_in_flight: Optional[int] = None,
+                 transport: str = 'pickle', timeout: Optional[float] = None, retries: int = 0, backoff: float = 0.0, capture: Optional[str] = None):
+        self.pool = DummyPool() if pool is None else pool
+        self.raise_ = raise_
+        self.capture = capture  # `"collect"` or `"skip"`, for failures which are turned into `ErrorRecord`s.
+        self.ordered = ordered
+        self.chunksize = chunksize
+        self.max_in_flight = max_in_flight
+        self.transport = transport
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    @property
+    def supervised(self) -> bool:
+        return self.timeout is not None or self.retries > 0
+
+
+Segment = Tuple[List[Stage], Concurrency]
+
+
+def run_segments(segments: List[Segment], items: Iterable[Tuple[int, Any]], returns_outputs: bool, stats: Optional[List[Dict[str, Any]]] = None,
+                 profiled: bool = False, durations: Optional[Dict[int, float]] = None, reducer: Optional[Reducer] = None,
+                 errors: Optional[ErrorSummary] = None) -> Iterator[Result]:
+    """
+    Apply the stages of all `segments` on `items` (pairs of index and input), yielding `(index, exception, output)` for each item.
+
+    Each segment runs on its own pool, consuming the outputs of the previous segment's pool.
+    Items which were skipped or failed in one segment bypass the segments after it.
+
+    If `stats` is given, a dictionary of statistics is appended to it for each segment, and filled as the segment runs. If `profiled`, these include a `SegmentProfile`.
+
+    If `durations` is given, the seconds each item spent in the workers (summed over the segments) are added to it by index, before the item's result is yielded.
+
+    If `reducer` is given, the workers of the last segment (which must run on a pool) reduce chunks of items, and a single result holding a `Partial` is yielded per chunk.
+
+    Failures in segments which capture them are counted into `errors`, and yielded as an `ErrorRecord` (for `"collect"`) or as `skipped` (for `"skip"`),
+    still flagged as exceptions.
+    """
+    if errors is None:
+        errors = ErrorSummary()
+
+    runners: List[Iterator[Result]] = []
+    results: Iterator[Result]
+
+    try:
+        for j, (stages, concurrency) in enumerate(segments):
+            is_last = (j == len(segments) - 1)
+            max_in_flight = concurrency.max_in_flight
+
+            segment_stats: Dict[str, Any] = {}
+
+            if stats is not None:
+                stats.append(segment_stats)
+
+            if len(segments) > 1 and max_in_flight is None:
+                max_in_flight = max(DEFAULT_SEGMENT_MAX_IN_FLIGHT, 2 * _fixed_chunksize(concurrency))
+
+            segment_reducer = reducer if is_last else None
+
+            if j == 0:
+                results = _run_segment(stages, concurrency, max_in_flight, items, returns_outputs or not is_last, segment_stats, profiled, durations, segment_reducer,
+                                       errors)
+            else:
+                results = _run_downstream_segment(stages, concurrency, max_in_flight, results, returns_outputs or not is_last, segment_stats, profiled, durations,
+                                                  segment_reducer, errors)
+
+            runners.append(results)
+
+        yield from results
+    finally:
+        # Downstream segments go first, their pools are the ones consuming the upstream segments.
+        for runner in reversed(runners):
+            try:
+                runner.close()  # type: ignore
+            except ValueError:
+                pass  # Still running in the feeder thread of a pool that is not ours to shut down, it will stop on its own.
+
+
+def _run_downstream_segment(stages: List[Stage], concurrency: Concurrency, max_in_flight: Optional[int], upstream: Iterator[Result], returns_outputs: bool,
+                            stats: Dict[str, Any], profiled: bool, durations: Optional[Dict[int, float]], reducer: Optional[Reducer],
+                            errors: ErrorSummary) -> Iterator[Result]:
+    bypassed: Deque[Result] = deque()
+
+    def live_items() -> Iterator[Tuple[int, Any]]:
+        for i, exception, out in upstream:
+            if exception or out is skipped:
+                bypassed.append((i, exception, out))
+            else:
+                yield i, out
+
+    return merge_bypassed(_run_segment(stages, concurrency, max_in_flight, live_items(), returns_outputs, stats, profiled, durations, reducer, errors), bypassed,
+                          concurrency.ordered)
+
+
+def _fixed_chunksize(concurrency: Concurrency) -> int:
+    return 1 if concurrency.chunksize in {None, 'auto'} else concurrency.chunksize  # type: ignore
+
+
+def merge_bypassed(results: Iterable[Result], bypassed: Deque[Result], ordered: bool) -> Iterator[Result]:
+    """
+    Yield `results` along with the results in `bypassed`, which is filled (in index order) as a side effect of pulling `results`.
+
+    When `ordered`, the merged results are in index order, otherwise each bypassed result is yielded as soon as possible.
+    """
+    for result in results:
+        # `bypassed` is filled by whoever pulls the items (e.g. the pool's feeder thread), so all the items preceding `result` are already there.
+        while bypassed and (not ordered or bypassed[0][0] < result[0]):
+            yield bypassed.popleft()
+
+        yield result
+
+    while bypassed:
+        yield bypassed.popleft()
+
+
+def _run_segment(stages: List[Stage], concurrency: Concurrency, max_in_flight: Optional[int], items: Iterable[Tuple[int, Any]], returns_outputs: bool,
+                 stats: Dict[str, Any], profiled: bool, durations: Optional[Dict[int, float]], reducer: Optional[Reducer], errors: ErrorSummary) -> Iterator[Result]:
+    batch_size = next((function.batch_size for function, _ in stages if isinstance(function, BatchAdapter)), None)  # type: ignore
+    pool = as_pool(concurrency.pool)
+    chunksize: Optional[int] = concurrency.chunksize  # type: ignore  # `'auto'` is replaced below.
+    num_workers = _num_workers(pool)
+    item_window = None  # Released once per item.
+    task_window = None  # Released once per task (which may hold many items).
+    tuner = None
+    transport = None
+    segment_profile = None
+    stats['chunksize'] = concurrency.chunksize
+
+    if concurrency.chunksize == 'auto' or (reducer is not None and chunksize is None):
+        # Chunks are formed here (rather than by the pool), so their sizes can change during the run.
+        chunksize = None
+
+        if batch_size is None and not isinstance(pool, DummyPool):
+            tuner = ChunksizeTuner(max_size=max_in_flight or sys.maxsize)
+            stats['chunksizes'] = tuner.sizes
+
+    # When reducing, items are sent in chunks (unless they are already batched), so that each is sent back as a single partial result.
+    chunked = tuner is not None or (reducer is not None and batch_size is None)
+
+    if batch_size is None:
+        apply = apply_compiled
+        tasks: Iterable = items
+    else:
+        # Each task carries a whole batch (sized by the segment's first `map_batches()`), so `max_in_flight` is converted from items to batches.
+        apply = apply_to_batch
+        tasks = _group(items, batch_size)
+
+        if max_in_flight is not None:
+            max_in_flight = max(1, max_in_flight // batch_size)
+
+    if concurrency.capture is not None:
+        # Right where the exceptions are caught, so their tracebacks (and the frames they hold) are dropped by the workers.
+        apply = partial(apply_capturing_errors, apply)
+
+    if concurrency.transport == 'shm' and not isinstance(pool, DummyPool):
+        if batch_size is not None:
+            raise ValueError('`transport="shm"` is not supported in segments with `map_batches()`')
+
+        # Enough segments for every worker to have one task in progress and one done, and for the pool to fill a whole chunk while others are in use.
+        transport = SharedMemoryTransport(max(2 * num_workers, (chunksize or 1) + num_workers), returns_outputs)
+        apply = partial(apply_with_shared_memory, apply)
+        tasks = transport.send(tasks)
+
+        if tuner is not None:
+            tuner.max_size = min(tuner.max_size, num_workers)
+
+    # Once the consumer is gone, the pool is no longer fed (which matters for pools that are not ours to shut down).
+    cancellation = Cancellation()
+    tasks = cancellation.feed(tasks)
+
+    if max_in_flight is not None and not concurrency.supervised:  # A `Supervisor` limits the tasks in flight by itself.
+        if not chunked:
+            task_window = InFlightWindow(max_in_flight)
+            tasks = task_window.feed(tasks)
+        else:
+            item_window = InFlightWindow(max_in_flight)
+            tasks = item_window.feed(tasks)
+
+    if chunked:
+        # Chunks are sized when they are created, so only a few of them are created ahead of time.
+        apply = partial(apply_to_chunk, apply)
+        task_window = InFlightWindow(2 * num_workers)
+        tasks = task_window.feed(tuner.chunks(tasks) if tuner is not None else _group(tasks, chunksize))  # type: ignore
+        chunksize = None
+
+    if reducer is not None:
+        apply = partial(apply_reducing, apply, reducer)
+
+    if durations is not None:
+        apply = partial(apply_timed, apply)
+
+    if profiled:
+        segment_profile = stats['profile'] = SegmentProfile(stages, num_workers)
+        apply = partial(apply_profiled, apply, len(stages))
+
+    pipeline_id = next(_pipeline_ids)
+    supervisor = None
+    channel = None
+
+    if concurrency.supervised:
+        # Workers report the tasks they start, if they can: threads share this process, processes of our own pools are given the channel when created.
+        how = getattr(pool, 'how', None)
+
+        if isinstance(pool, OwnedPool):
+            channel = pool.create_queue()
+        elif how == 'threads':
+            channel = create_queue(how)
+
+        supervisor = Supervisor(concurrency.timeout, concurrency.retries, concurrency.backoff, num_workers, max_in_flight, channel)
+        apply = partial(apply_supervised, apply, pipeline_id)
+
+    if runs_in_threads(pool):
+        # Tasks still queued when the consumer is gone are skipped.
+        apply = partial(apply_unless_cancelled, apply, cancellation)
+
+    if isinstance(pool, OwnedPool) and pool.how == 'processes':
+        # Install the functions once per worker process, so tasks carry only the items (and not the functions with their bound arguments).
+        if pool.serializer == 'dill':
+            pool_context = pool.open(initializer=_install_pipeline, initargs=(pipeline_id, stages, profiled, channel))
+            worker = partial(_apply_installed, apply, pipeline_id, returns_outputs)
+        else:
+            # Serialized by the chosen serializer (along with `apply`, which may hold functions too), while the tasks are serialized by `pickle`.
+            serialized = pool.dumps((stages, apply))
+            pool_context = pool.open(initializer=_install_pipeline, initargs=(pipeline_id, serialized, profiled, channel))
+            worker = partial(_apply_installed, None, pipeline_id, returns_outputs)
+    else:
+        if not isinstance(pool, DummyPool) and not runs_in_threads(pool) and not pickles_with_dill(pool):
+            # Other process pools passed by the user (e.g. a `multiprocessing.pool.Pool` or a `ProcessPoolExecutor`) serialize their tasks with `pickle`,
+            # which cannot send the compiled functions, so the stages are sent (with every task) already serialized, and are compiled once per worker.
+            worker = partial(_apply_serialized, dumps((stages, apply)), profiled, returns_outputs)
+        else:
+            worker = partial(apply, _compile(stages, profiled), returns_outputs)
+
+        if channel is not None:
+            register_channel(pipeline_id, channel)
+
+        if isinstance(pool, OwnedPool):
+            pool_context = pool.open()
+
+            if supervisor is not None and concurrency.timeout is not None:
+                pool_context = _not_joined(pool_context)
+        elif isinstance(pool, (DummyPool, ExecutorPool)):
+            pool_context = pool  # An `ExecutorPool` cancels its tasks on exit, but does not shut down the user's executor.
+        else:
+            pool_context = nullcontext(pool)  # Pools passed by the user are not ours to shut down.
+
+    chunksize_tuple = () if chunksize is None else (chunksize, )
+
+    try:
+        with pool_context as opened:
+            if supervisor is None:
+                imap = opened.imap if concurrency.ordered else opened.imap_unordered
+
+                if hasattr(opened, 'worker_pids'):
+                    outputs = watch_workers(opened, imap, worker, tasks, *chunksize_tuple)  # Otherwise, a dead worker's tasks are waited for forever.
+                else:
+                    outputs = imap(worker, tasks, *chunksize_tuple)
+            else:
+                outputs = supervisor.run(opened, worker, tasks, concurrency.ordered)
+
+            try:
+                if batch_size is None and not chunked:
+                    for result in outputs:
+                        if segment_profile is not None:
+                            result, profile = result
+                            segment_profile.add(profile)
+
+                        if durations is not None:
+                            result, seconds = result
+
+                        i, exception, out = result if transport is None else transport.receive(result)
+
+                        if durations is not None:
+                            durations[i] = durations.get(i, 0.0) + seconds
+
+                        if exception and concurrency.raise_:
+                            raise out
+
+                        if exception and concurrency.capture is not None:
+                            out = _capture(concurrency.capture, errors, i, out)
+
+                        yield i, exception, out
+
+                        if task_window is not None:
+                            task_window.release()
+                else:
+                    for results in outputs:
+                        if segment_profile is not None:
+                            results, profile = results
+                            segment_profile.add(profile)
+
+                        if durations is not None:
+                            results, seconds = results
+
+                        if chunked:
+                            results, compute_seconds = results
+
+                            if tuner is not None:
+                                tuner.update(num_items(results), compute_seconds)
+
+                        for result in results:
+                            i, exception, out = result if transport is None else transport.receive(result)
+
+                            if durations is not None:
+                                # The items of a task were processed together, so they split its time.
+                                durations[i] = durations.get(i, 0.0) + seconds / len(results)
+
+                            if exception and concurrency.raise_:
+                                raise out
+
+                            if exception and concurrency.capture is not None:
+                                out = _capture(concurrency.capture, errors, i, out)
+
+                            yield i, exception, out
+
+                            if item_window is not None:
+                                for _ in range(num_items([(i, exception, out)])):
+                                    item_window.release()
+
+                        if task_window is not None:
+                            task_window.release()
+            finally:
+                cancellation.cancel()
+
+                for window in [item_window, task_window]:
+                    if window is not None:
+                        window.close()
+    finally:
+        unregister_channel(pipeline_id)
+
+        # Only once the workers are done with the segments.
+        if transport is not None:
+            transport.close()
+
+        if tuner is not None:
+            stats['item_seconds'] = tuner.item_seconds
+            stats['serialization_seconds'] = tuner.serialization_seconds
+
+        if segment_profile is not None:
+            segment_profile.stop()
+
+
+def _capture(capture: str, errors: ErrorSummary, i: int, error: Any) -> Any:
+    # Failures which did not come from the workers (e.g. timeouts) are still exceptions, and are turned into records here.
+    record = errors.add(i, error)
+    return skipped if capture == 'skip' else record
+
+
+@contextmanager
+def _not_joined(thread_pool: Any) -> Iterator[Any]:
+    try:
+        yield thread_pool
+    finally:
+        # Threads which are still running timed out items cannot be stopped, so rather than waiting for them (as `terminate()` would), they are left to finish.
+        thread_pool.close()
+
+
+def _num_workers(pool: Any) -> int:
+    if isinstance(pool, DummyPool):
+        return 1
+
+    if isinstance(pool, OwnedPool) or hasattr(pool, 'how'):  # Also a `pools.PoolHandle`.
+        return pool.num_workers or default_num_workers(pool.how)
+
+    return getattr(pool, '_processes', None) or os.cpu_count() or 1  # `multiprocessing.pool.Pool` keeps it private.
+
+
+_pipeline_ids = itertools.count()
+_installed_pipelines: Dict[int, list] = {}
+_installed_applies: Dict[int, Callable] = {}
+
+
+def _install_pipeline(pipeline_id, stages, profiled=False, channel=None):
+    if isinstance(stages, bytes):
+        stages, _installed_applies[pipeline_id] = pickle.loads(stages)
+
+    _installed_pipelines[pipeline_id] = _compile(stages, profiled)
+
+    if channel is not None:
+        register_channel(pipeline_id, channel)
+
+
+def _compile(stages: List[Stage], profiled: bool = False) -> Any:
+    """
+    Compile the stages into a single function, or, if there are `BatchAdapter`s, into a list of functions with each run of consecutive per-item stages compiled.
+
+    If `profiled`, the functions time their calls (see `profiling.py`).
+    """
+    if not any(isinstance(function, BatchAdapter) for function, _ in stages):
+        return compile_stages(stages, 0 if profiled else None)
+
+    functions: List[Callable] = []
+    run: List[Stage] = []
+
+    for k, (function, filtering) in enumerate(stages):
+        if isinstance(function, BatchAdapter):
+            if run:
+                functions.append(compile_stages(run, k - len(run) if profiled else None))
+                run = []
+
+            functions.append(ProfiledBatchAdapter(function, k) if profiled else function)
+        else:
+            run.append((function, filtering))
+
+    if run:
+        functions.append(compile_stages(run, len(stages) - len(run) if profiled else None))
+
+    return functions
+
+
+def _apply_installed(apply, pipeline_id, returns_outputs, task):
+    if apply is None:
+        apply = _installed_applies[pipeline_id]
+
+    return apply(_installed_pipelines[pipeline_id], returns_outputs, task)
+
+
+@lru_cache(maxsize=16)
+def _load_pipeline(serialized: bytes, profiled: bool) -> Tuple[Any, Callable]:
+    stages, apply = pickle.loads(serialized)
+    return _compile(stages, profiled), apply
+
+
+def _apply_serialized(serialized, profiled, returns_outputs, task):
+    pipeline, apply = _load_pipeline(serialized, profiled)
+    return apply(pipeline, returns_outputs, task)
+
+
+def _group(items: Iterable[Tuple[int, Any]], size: int) -> Iterator[List[Tuple[int, Any]]]:
+    iterator = iter(items)
+
+    while True:
+        group = list(itertools.islice(iterator, size))
+
+        if not group:
+            return
+
+        yield group
+
+
+def apply_compiled(pipeline, returns_outputs, item):
+    i, inp = item
+
+    try:
+        out = pipeline(inp)
+    except Exception as e:
+        return i, True, e
+
+    # Don't send back outputs which are not going to be returned, but keep `skipped` so the caller knows to skip.
+    if not returns_outputs and out is not skipped:
+        out = None
+
+    return i, False, out
+
+
+def apply_timed(apply, pipeline, returns_outputs, task):
+    """Same as `apply`, but also returning how long it took."""
+    start = time.perf_counter()
+    result = apply(pipeline, returns_outputs, task)
+    return result, time.perf_counter() - start
+
+
+def apply_to_batch(functions, returns_outputs, batch):
+    """Same as `apply_compiled()`, but for a list of items, so that `BatchAdapter`s among `functions` can be applied on many items at once."""
+    results = [[i, False, inp] for i, inp in batch]
+
+    for function in functions:
+        live = [result for result in results if not result[1] and result[2] is not skipped]
+
+        if isinstance(function, BatchAdapter):
+            for start in range(0, len(live), function.batch_size):
+                chunk = live[start:start + function.batch_size]
+
+                try:
+                    outs = function([result[2] for result in chunk])
+                except Exception as e:
+                    for result in chunk:
+                        result[1:] = [True, e]
+                else:
+                    for result, out in zip(chunk, outs):
+                        result[2] = out
+        else:
+            for result in live:
+                try:
+                    result[2] = function(result[2])
+                except Exception as e:
+                    result[1:] = [True, e]
+
+    if not returns_outputs:
+        for result in results:
+            if not result[1] and result[2] is not skipped:
+                result[2] = None
+
+    return [tuple(result) for result in results]
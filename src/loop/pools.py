@@ -0,0 +1,133 @@
+"""
+Persistent worker pools, which can be shared by many loops (see `pool` in [`concurrently()`][loop.Loop.concurrently]).
+"""
+from typing import Any, Callable, Dict, Iterable, Literal, Optional, Tuple, TypeVar
+from threading import Lock
+import atexit
+
+from .concurrency import create_pool
+
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class PoolHandle:
+    """
+    A thread or process pool that stays alive across loops until [`shutdown()`][loop.pools.PoolHandle.shutdown] is called.
+
+    Any number of loops may run on the same handle at the same time, their items are interleaved in the pool's task queue.
+
+    Args:
+        how: Either `"threads"` or `"processes"`, same as in [`concurrently()`][loop.Loop.concurrently].
+        num_workers: Number of workers in the pool. If `None`, will be set automatically.
+    """
+    def __init__(self, how: Literal['threads', 'processes'], num_workers: Optional[int] = None):
+        self.how = how
+        self.num_workers = num_workers
+        self._lock = Lock()
+        self._pool = create_pool(how, num_workers)
+
+    def __enter__(self) -> 'PoolHandle':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def __repr__(self) -> str:
+        state = 'shut down' if self._pool is None else 'running'
+        return f'{type(self).__name__}({self.how!r}, num_workers={self.num_workers}, {state})'
+
+    @property
+    def is_running(self) -> bool:
+        return self._pool is not None
+
+    def imap(self, fn: Callable[[T], R], iterable: Iterable[T], chunksize: Optional[int] = None) -> Iterable[R]:
+        return self._get_pool().imap(fn, iterable, *_chunksize_tuple(chunksize))
+
+    def imap_unordered(self, fn: Callable[[T], R], iterable: Iterable[T], chunksize: Optional[int] = None) -> Iterable[R]:
+        return self._get_pool().imap_unordered(fn, iterable, *_chunksize_tuple(chunksize))
+
+    def apply_async(self, fn: Callable[..., R], args: tuple = (), callback: Optional[Callable[[R], Any]] = None,
+                    error_callback: Optional[Callable[[BaseException], Any]] = None) -> Any:
+        return self._get_pool().apply_async(fn, args, callback=callback, error_callback=error_callback)
+
+    def shutdown(self) -> None:
+        """
+        Wait for all submitted work to finish and stop the workers. Calling it more than once has no effect.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+
+        if pool is None:
+            return
+
+        if self.how == 'processes':
+            pool.clear()
+        else:
+            pool.close()
+            pool.join()
+
+    def _get_pool(self):
+        pool = self._pool
+
+        if pool is None:
+            raise RuntimeError(f'{self!r} cannot be used after it was shut down')
+
+        return pool
+
+
+_handles: Dict[Tuple[str, Optional[int]], PoolHandle] = {}
+_handles_lock = Lock()
+
+
+def get(how: Literal['threads', 'processes'], num_workers: Optional[int] = None) -> PoolHandle:
+    """
+    Get a shared [`PoolHandle`][loop.pools.PoolHandle], creating it on first use.
+
+    Repeated calls with the same arguments return the same (warm) pool, unless it was shut down in the meantime.
+
+    Example:
+        ```python
+        from loop import loop_over, pools
+
+
+        for _ in range(100):
+            # Worker processes are spawned only once.
+            loop_over(range(10)).map(abs).concurrently(pool=pools.get('processes', 4)).exhaust()
+
+        pools.shutdown()
+        ```
+
+    Args:
+        how: Either `"threads"` or `"processes"`, same as in [`concurrently()`][loop.Loop.concurrently].
+        num_workers: Number of workers in the pool. If `None`, will be set automatically.
+    """
+    key = (how, num_workers)
+
+    with _handles_lock:
+        handle = _handles.get(key)
+
+        if handle is None or not handle.is_running:
+            handle = _handles[key] = PoolHandle(how, num_workers)
+
+    return handle
+
+
+def shutdown() -> None:
+    """
+    Shut down all the pools created by [`get()`][loop.pools.get]. This is done automatically when the interpreter exits.
+    """
+    with _handles_lock:
+        handles = list(_handles.values())
+        _handles.clear()
+
+    for handle in handles:
+        handle.shutdown()
+
+
+def _chunksize_tuple(chunksize: Optional[int]) -> tuple:
+    return () if chunksize is None else (chunksize, )
+
+
+atexit.register(shutdown)
@@ -0,0 +1,189 @@
+"""
+Measuring where a loop spends its time (see [`Loop.profile()`][loop.Loop.profile]).
+
+Every task times the calls of each stage into a `Profile` of its own, which is sent back to the parent along with the task's results and merged there,
+so workers share no state (threads do not race on the counters, and processes lose nothing).
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from time import perf_counter
+import math
+import threading
+
+from .functional import BatchAdapter
+
+
+# Latencies are counted in logarithmic buckets, 8 per doubling, so percentiles are accurate to within about 5% and merging is cheap.
+BUCKETS_PER_OCTAVE = 8
+
+
+class StageStats:
+    """The calls of a single stage: their count, total duration, how many passed (for filters) and a histogram of their durations."""
+    __slots__ = ('calls', 'seconds', 'passed', 'histogram')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.passed = 0
+        self.histogram: Dict[float, int] = {}
+
+    def record(self, seconds: float, passed: Any = True) -> None:
+        self.calls += 1
+        self.seconds += seconds
+
+        if passed:
+            self.passed += 1
+
+        bucket = math.floor(math.log2(seconds) * BUCKETS_PER_OCTAVE) if seconds > 0 else -math.inf
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def merge(self, other: 'StageStats') -> None:
+        self.calls += other.calls
+        self.seconds += other.seconds
+        self.passed += other.passed
+
+        for bucket, count in other.histogram.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.calls:
+            return None
+
+        rank = q * self.calls
+        seen = 0
+
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+
+            if seen >= rank:
+                # The geometric middle of the bucket.
+                return 0.0 if bucket == -math.inf else 2 ** ((bucket + 0.5) / BUCKETS_PER_OCTAVE)
+
+        return None  # Unreachable, the counts of the histogram sum up to `calls`.
+
+
+class Profile:
+    """The stats of every stage of a segment, and how long the worker was busy, as gathered by a single task (or merged from many)."""
+    __slots__ = ('stages', 'busy_seconds')
+
+    def __init__(self, num_stages: int):
+        self.stages = [StageStats() for _ in range(num_stages)]
+        self.busy_seconds = 0.0
+
+    def merge(self, other: 'Profile') -> None:
+        for stage, other_stage in zip(self.stages, other.stages):
+            stage.merge(other_stage)
+
+        self.busy_seconds += other.busy_seconds
+
+
+class SegmentProfile:
+    """The parent's side: merges the profiles of a segment's tasks, and summarizes them along with the segment's duration."""
+    def __init__(self, stages: List[Tuple[Any, bool]], num_workers: Optional[int]):
+        self.names = [(_stage_name(function), _stage_kind(function, filtering)) for function, filtering in stages]
+        self.num_workers = num_workers
+        self.profile = Profile(len(stages))
+        self.start = perf_counter()
+        self.end: Optional[float] = None
+
+    def add(self, profile: Profile) -> None:
+        self.profile.merge(profile)
+
+    def stop(self) -> None:
+        self.end = perf_counter()
+
+    def summary(self) -> Dict[str, Any]:
+        wall_seconds = (perf_counter() if self.end is None else self.end) - self.start
+        stages = []
+
+        for (name, kind), stage in zip(self.names, self.profile.stages):
+            summary = {'name': name, 'kind': kind, 'calls': stage.calls, 'total_seconds': stage.seconds,
+                       'mean_seconds': stage.seconds / stage.calls if stage.calls else None,
+                       'p50_seconds': stage.percentile(0.5), 'p99_seconds': stage.percentile(0.99)}
+
+            if kind == 'filter':
+                summary['selectivity'] = stage.passed / stage.calls if stage.calls else None
+
+            stages.append(summary)
+
+        summary = {'wall_seconds': wall_seconds, 'stages': stages}
+
+        if self.num_workers is not None:
+            capacity = self.num_workers * wall_seconds
+            busy_seconds = self.profile.busy_seconds
+            summary['workers'] = {'count': self.num_workers, 'busy_seconds': busy_seconds, 'idle_seconds': max(0.0, capacity - busy_seconds),
+                                  'utilization': busy_seconds / capacity if capacity else None}
+
+        return summary
+
+
+def summarize(segment_stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy the stats of a segment, with its `SegmentProfile` (if any) replaced by its summary."""
+    summary = {key: value for key, value in segment_stats.items() if key != 'profile'}
+
+    if 'profile' in segment_stats:
+        summary.update(segment_stats['profile'].summary())
+
+    return summary
+
+
+_local = threading.local()
+
+
+def current_stages() -> List[StageStats]:
+    """The stats of the stages of the task running in this thread, which profiled pipelines (see `compiler.py`) record into."""
+    return _local.profile.stages
+
+
+def apply_profiled(apply, num_stages, pipeline, returns_outputs, task):
+    """Same as `apply`, but also returning the `Profile` of the task."""
+    profile = _local.profile = Profile(num_stages)
+    start = perf_counter()
+    result = apply(pipeline, returns_outputs, task)
+    profile.busy_seconds = perf_counter() - start
+    return result, profile
+
+
+class ProfiledBatchAdapter(BatchAdapter):
+    """Same as the `BatchAdapter` it is created from, but timing its calls as calls of the stage at `index` (so a call is a whole batch)."""
+    def __init__(self, adapter: BatchAdapter, index: int):
+        super().__init__(adapter.adaptee, adapter.batch_size, adapter.collate)
+        self.index = index
+
+    def __call__(self, inputs: List) -> List:
+        start = perf_counter()
+        outputs = super().__call__(inputs)
+        current_stages()[self.index].record(perf_counter() - start)  # Only calls which returned, like the per-item stages.
+        return outputs
+
+
+def timed(iterator: Iterator, stats: Dict[str, Any]) -> Iterator:
+    """Yield from `iterator`, adding to `stats` the time spent waiting for it, and the time spent by the consumer between items."""
+    stats['wait_seconds'] = 0.0
+    stats['consumer_seconds'] = 0.0
+    resumed = perf_counter()
+
+    for retval in iterator:
+        returned = perf_counter()
+        stats['wait_seconds'] += returned - resumed
+        yield retval
+        resumed = perf_counter()
+        stats['consumer_seconds'] += resumed - returned
+
+    stats['wait_seconds'] += perf_counter() - resumed
+
+
+def _stage_name(function: Any) -> str:
+    while hasattr(function, 'adaptee'):  # `BatchAdapter` and `CachedAdapter`.
+        function = function.adaptee
+
+    return getattr(function, '__qualname__', None) or repr(function)
+
+
+def _stage_kind(function: Any, filtering: bool) -> str:
+    if filtering:
+        return 'filter'
+
+    while not isinstance(function, BatchAdapter) and hasattr(function, 'adaptee'):
+        function = function.adaptee
+
+    return 'map_batches' if isinstance(function, BatchAdapter) else 'map'
@@ -1,6 +1,6 @@
-from typing import Callable, Any, Optional, Union, Protocol
-
-from tqdm import tqdm
+from typing import Callable, Any, List, NamedTuple, Optional, Union, Protocol
+import sys
+import time
 
 
 class Progbar(Protocol):
@@ -16,6 +16,12 @@ class Progbar(Protocol):
     def skip_one(self) -> None:
         ...
 
+    def resume(self, advanced: int, skipped: int) -> None:
+        ...
+
+    def advance_many(self, advanced: int, skipped: int) -> None:
+        ...
+
 
 class DummyProgbar:
     def __enter__(self):
@@ -30,11 +36,123 @@ class DummyProgbar:
     def skip_one(self) -> None:
         pass
 
+    def resume(self, advanced: int, skipped: int) -> None:
+        pass
+
+    def advance_many(self, advanced: int, skipped: int) -> None:
+        pass
+
+
+class ItemDone(NamedTuple):
+    """An item whose functions were applied, as reported to [`Hooks`][loop.progress.Hooks] (`i` is its index, see `on_item_done()` there)."""
+    i: int
+    duration: float
+    error: Optional[Exception]
+
+
+class Hooks:
+    """
+    Base class of lifecycle hooks (see [`Loop.hooks()`][loop.Loop.hooks]), subclasses override the methods of the events they are interested in.
+
+    All methods are called in the process (and thread) which consumes the loop, even when the functions run in worker processes.
+
+    Example:
+        ```python
+        from loop import loop_over
+        from loop.progress import Hooks
+
+
+        class Metrics(Hooks):
+            batch_size = 100
+
+            def on_batch(self, items):
+                statsd.timing('parse', sum(item.duration for item in items) / len(items))
+                statsd.incr('parse.errors', sum(item.error is not None for item in items))
+
+
+        loop_over(paths).map(parse).concurrently('processes', exceptions='return').hooks(Metrics()).exhaust()
+        ```
+
+    Attributes:
+        batch_size: Items are reported to [`on_batch()`][loop.progress.Hooks.on_batch] in batches of up to this many items.
+        batch_interval: If not `None`, a batch is also reported once this many seconds passed since the previous one (checked whenever an item is done).
+    """
+    batch_size: int = 1
+    batch_interval: Optional[float] = None
+
+    def on_start(self) -> None:
+        """Called when the iteration over the loop starts."""
+
+    def on_batch(self, items: List[ItemDone]) -> None:
+        """
+        Called with the items which were done since the previous call, in the order in which they were done. By default, calls
+        [`on_item_done()`][loop.progress.Hooks.on_item_done] for each of them.
+        """
+        for item in items:
+            self.on_item_done(*item)
+
+    def on_item_done(self, index: int, duration: float, error: Optional[Exception]) -> None:
+        """
+        Called for each item whose functions were applied (but not for items skipped by a [`filter()`][loop.Loop.filter]).
+
+        Args:
+            index: The (zero-based) position of the item in `iterable`.
+            duration: Seconds spent applying the functions to the item (in the worker, so excluding queueing and serialization). Items which are processed together
+                (by [`map_batches()`][loop.Loop.map_batches], or with `chunksize="auto"` in [`concurrently()`][loop.Loop.concurrently]) split their time evenly.
+            error: The exception raised by one of the functions (see `exceptions` in [`concurrently()`][loop.Loop.concurrently]), or `None`.
+        """
+
+    def on_end(self, error: Optional[BaseException]) -> None:
+        """Called when the iteration ends, after the last batch was reported. `error` is the exception which ended it, if any (closing the loop early is not an error)."""
+
+
+class HookDispatcher:
+    """Delivers the events of an iteration to `hooks`, collecting items into batches."""
+    def __init__(self, hooks: List[Hooks]):
+        self._hooks = hooks
+        self._items: List[ItemDone] = []
+        self._batch_size = min(hook.batch_size for hook in hooks)
+        intervals = [hook.batch_interval for hook in hooks if hook.batch_interval is not None]
+        self._batch_interval = min(intervals) if intervals else None
+        self._deadline = float('inf')
+
+    def start(self) -> None:
+        for hook in self._hooks:
+            hook.on_start()
+
+        if self._batch_interval is not None:
+            self._deadline = time.monotonic() + self._batch_interval
+
+    def item_done(self, index: int, duration: float, error: Optional[Exception]) -> None:
+        self._items.append(ItemDone(index, duration, error))
+
+        if len(self._items) >= self._batch_size or (self._batch_interval is not None and time.monotonic() >= self._deadline):
+            self._flush()
+
+    def end(self, error: Optional[BaseException]) -> None:
+        self._flush()
+
+        for hook in self._hooks:
+            hook.on_end(error)
+
+    def _flush(self) -> None:
+        if self._items:
+            items, self._items = self._items, []
+
+            for hook in self._hooks:
+                hook.on_batch(items)
+
+        if self._batch_interval is not None:
+            self._deadline = time.monotonic() + self._batch_interval
+
 
 class TqdmProgbar:
-    def __init__(self, refresh: bool, postfix_str: Optional[Union[str, Callable[[Any], Any]]] = None, **kwargs):
+    def __init__(self, refresh: bool, postfix_str: Optional[Union[str, Callable[[Any], Any]]] = None, update_every: Optional[int] = None,
+                 update_interval: Optional[float] = None, **kwargs):
         self._on_set_postfix = self._do_nothing
         self._on_refresh = self._do_nothing
+        from tqdm import tqdm
+
         self._tqdm = tqdm(**kwargs)
         self._refresh = refresh
 
@@ -47,11 +165,39 @@ class TqdmProgbar:
         if refresh:
             self._on_refresh = self._do_refresh
 
+        # When coalescing, items are counted (by the caller of `report()`, or by `advance_one()`/`skip_one()`) and reported to `tqdm` only once every
+        # `update_every` items or `update_interval` seconds, whichever comes first.
+        self.coalescing = update_every is not None or update_interval is not None
+        self._update_every = update_every or sys.maxsize
+        self._update_interval = update_interval
+        self._pending_advances = 0
+        self._pending_skips = 0
+        self._last_retval: Any = None
+        self._deadline = float('inf')
+        self._last_report_time = 0.0
+        self._countdown = 1
+        self._advances = 0
+        self._skips = 0
+
+        if self.coalescing:
+            self.advance_one = self._coalesced_advance_one  # type: ignore
+            self.skip_one = self._coalesced_skip_one  # type: ignore
+
     def __enter__(self):
         self._tqdm.__enter__()
+
+        if self._update_interval is not None:
+            self._last_report_time = time.monotonic()
+            self._deadline = self._last_report_time + self._update_interval
+
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.coalescing:
+            self.report(self._advances, self._skips, self._last_retval)
+            self._advances = self._skips = 0
+            self._flush()
+
         self._tqdm.__exit__(exc_type, exc_val, exc_tb)
 
     def advance_one(self, retval: Any) -> None:
@@ -63,6 +209,93 @@ class TqdmProgbar:
         if self._tqdm.total is not None:
             self._tqdm.total -= 1
 
+    def resume(self, advanced: int, skipped: int) -> None:
+        """Start from where a previous run stopped, after `advanced` items were returned and `skipped` items were skipped."""
+        if skipped and self._tqdm.total is not None:
+            self._tqdm.total -= skipped
+
+        # Set as `initial`, so the resumed items do not count towards the iteration rate.
+        self._tqdm.initial = self._tqdm.n = self._tqdm.last_print_n = advanced
+        self._on_refresh()
+
+    def advance_many(self, advanced: int, skipped: int) -> None:
+        """Account for many items at once, whose return values are unknown (so the postfix is not updated)."""
+        if self.coalescing:
+            self.report(advanced, skipped, self._last_retval)
+            return
+
+        if skipped and self._tqdm.total is not None:
+            self._tqdm.total -= skipped
+
+        self._tqdm.update(advanced)
+        self._on_refresh()
+
+    def report(self, advances: int, skips: int, retval: Any) -> int:
+        """
+        Report many advanced (the last of which is `retval`) and skipped items at once, when coalescing.
+
+        Returns after how many more items `report()` should be called again. Calling it with no items just returns that count.
+        """
+        self._pending_advances += advances
+        self._pending_skips += skips
+
+        if advances:
+            self._last_retval = retval
+
+        pending = self._pending_advances + self._pending_skips
+
+        if self._update_interval is None:
+            if pending >= self._update_every:
+                self._flush()
+
+            return self._update_every - (self._pending_advances + self._pending_skips)
+
+        now = time.monotonic()
+
+        if pending >= self._update_every or now >= self._deadline:
+            self._flush()
+            self._deadline = now + self._update_interval
+
+        # Reading the clock on every item is costly for fast loops, so the number of items between readings adapts to the loop's rate,
+        # aiming at a few readings per interval (and growing at most twofold each time, in case the rate was measured over a slow start).
+        count = advances + skips
+        elapsed = now - self._last_report_time
+        self._last_report_time = now
+        per_reading = int(count * self._update_interval / (4 * elapsed)) if elapsed > 0 else 2 * count
+        return max(1, min(per_reading, 2 * count, self._update_every - (self._pending_advances + self._pending_skips)))
+
+    def _coalesced_advance_one(self, retval: Any) -> None:
+        self._advances += 1
+        self._last_retval = retval
+        self._countdown -= 1
+
+        if not self._countdown:
+            self._countdown = self.report(self._advances, self._skips, retval)
+            self._advances = self._skips = 0
+
+    def _coalesced_skip_one(self) -> None:
+        self._skips += 1
+        self._countdown -= 1
+
+        if not self._countdown:
+            self._countdown = self.report(self._advances, self._skips, self._last_retval)
+            self._advances = self._skips = 0
+
+    def _flush(self) -> None:
+        if self._pending_skips and self._tqdm.total is not None:
+            self._tqdm.total -= self._pending_skips
+
+        if self._pending_advances:
+            # The postfix only needs to reflect the last item, so it is not evaluated for the ones in between.
+            self._on_set_postfix(self._last_retval)
+            self._tqdm.update(self._pending_advances)
+            self._on_refresh()
+        elif self._pending_skips:
+            self._on_refresh()
+
+        self._pending_advances = 0
+        self._pending_skips = 0
+
     def _do_nothing(self, *args, **kwargs) -> None:
         pass
 
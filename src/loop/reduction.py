@@ -0,0 +1,85 @@
+"""
+Reducing a loop inside its workers (see `associative` in [`Loop.reduce()`][loop.Loop.reduce]).
+
+The tasks of the loop's last segment are chunks of items, each of which a worker reduces into a single `Partial`, so only partial results are sent back.
+The parent then combines the partial results (in the order of their chunks) pairwise, as a balanced tree.
+"""
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+import copy
+
+from .functional import skipped
+
+
+class empty:
+    pass
+
+
+class Partial(NamedTuple):
+    """The reduction of a chunk's items, and how many of them were reduced (`advanced`) or skipped by a filter."""
+    value: Any
+    advanced: int
+    skipped: int
+
+
+class Reducer:
+    """
+    Reduces chunks with `function`, starting from a copy of `initializer` if there is a `combine` (which then combines the chunks), or from their first item otherwise.
+    """
+    def __init__(self, function: Callable[[Any, Any], Any], packer: Callable[[int, Any, Any], Any], initializer: Any = empty,
+                 combine: Optional[Callable[[Any, Any], Any]] = None):
+        self.function = function
+        self.packer = packer
+        self.initializer = initializer
+        self.combine = combine
+
+    def reduce(self, task: List[Tuple[int, Any]], results: List[Tuple[int, bool, Any]]) -> List[Tuple[int, bool, Any]]:
+        """Reduce the `results` of the items in `task` into a single result, holding a `Partial` (or the first exception)."""
+        value = empty if self.combine is None else copy.deepcopy(self.initializer)  # Mutable accumulators must not be shared by chunks.
+        advanced = 0
+
+        for (_, inp), (i, exception, out) in zip(task, results):
+            if exception:
+                return [(i, True, out)]
+
+            if out is skipped:
+                continue
+
+            retval = self.packer(i, inp, out)
+            value = retval if value is empty else self.function(value, retval)
+            advanced += 1
+
+        return [(task[0][0], False, Partial(value, advanced, len(results) - advanced))]
+
+    def combine_all(self, values: List[Any]) -> Any:
+        """Combine the partial values of all chunks (in order) into the final value."""
+        if not values:
+            if self.initializer is empty:
+                raise TypeError('reduce() of empty iterable with no initial value')
+
+            return self.initializer
+
+        combine = self.function if self.combine is None else self.combine
+
+        while len(values) > 1:
+            paired = [combine(values[k], values[k + 1]) for k in range(0, len(values) - 1, 2)]
+            values = paired + values[len(values) - len(values) % 2:]
+
+        if self.combine is None and self.initializer is not empty:
+            return self.function(self.initializer, values[0])
+
+        return values[0]
+
+
+def apply_reducing(apply, reducer, pipeline, returns_outputs, task):
+    """Same as `apply` (for a task holding a list of items), but with the results reduced by `reducer`."""
+    results = apply(pipeline, returns_outputs, task)
+
+    if isinstance(results, tuple):  # From `apply_to_chunk()`, along with its duration.
+        return reducer.reduce(task, results[0]), results[1]
+
+    return reducer.reduce(task, results)
+
+
+def num_items(results: List[Tuple[int, bool, Any]]) -> int:
+    """The number of items in `results`, where a `Partial` stands for all the items it reduced."""
+    return sum(out.advanced + out.skipped if isinstance(out, Partial) else 1 for _, _, out in results)
@@ -0,0 +1,244 @@
+"""
+Running tasks with timeouts and retries (see `timeout` and `retries` in [`concurrently()`][loop.Loop.concurrently]).
+
+Instead of `imap()`, every task is submitted on its own with `apply_async()`, and at most one task per worker runs at once, so each task starts as soon as it is submitted.
+Workers report when they start a task, and the parent gives up on tasks which run for longer than the timeout: a process running one is killed (and replaced
+by the pool), while a thread running one cannot be stopped, so it is left to finish in the background. Tasks which failed, timed out or whose process died are
+submitted again, after an exponentially growing delay, until they run out of retries.
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from queue import Empty, Queue
+import heapq
+import itertools
+import os
+import sys
+import time
+
+
+# How often the parent checks for crashed workers and for newly started tasks.
+POLL_SECONDS = 0.05
+
+
+class WorkerCrashedError(RuntimeError):
+    """The worker process running an item exited (e.g. killed by the operating system when running out of memory) before the item was done."""
+
+
+class Attempt:
+    """A single submission of a task."""
+    __slots__ = ('seq', 'task', 'number', 'submitted', 'started', 'pid')
+
+    def __init__(self, seq: int, task: Any, number: int):
+        self.seq = seq
+        self.task = task
+        self.number = number
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.pid: Optional[int] = None
+
+
+class Supervisor:
+    """
+    Runs `worker` on tasks in `pool`, with up to `num_workers` tasks running at once and at most `max_in_flight` tasks whose results were not yet yielded.
+
+    If `channel` is given, workers report on it when they start a task (see `apply_supervised()`), otherwise a task's time is measured from its submission.
+    If the pool has `worker_pids()` and `kill_worker()` (see `concurrency.ProcessPool`), workers running timed out tasks are killed, and tasks of workers
+    which died are detected.
+    """
+    def __init__(self, timeout: Optional[float], retries: int, backoff: float, num_workers: int, max_in_flight: Optional[int], channel: Optional[Any]):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.num_workers = num_workers
+        self.max_in_flight = max_in_flight or sys.maxsize
+        self.channel = channel
+        self._attempt_ids = itertools.count()
+
+    def run(self, pool: Any, worker: Callable, tasks: Iterable, ordered: bool) -> Iterator:
+        """Yield the result of `worker` for each of `tasks` (or a failure, once its retries are exhausted), like the pool's `imap()` would."""
+        tasks = iter(tasks)
+        completed: 'Queue[Tuple[int, bool, Any]]' = Queue()
+        running: Dict[int, Attempt] = {}
+        delayed: List[Tuple[float, int, int, Any]] = []  # A heap of tasks waiting to be retried, as `(not_before, seq, number, task)`.
+        done: Dict[int, Any] = {}
+        next_seq = 0  # The next task to take from `tasks`.
+        next_yield = 0  # The next task to yield, when `ordered`.
+        exhausted = False
+        manages_workers = hasattr(pool, 'kill_worker')
+
+        def submit(seq: int, task: Any, number: int) -> None:
+            attempt_id = next(self._attempt_ids)
+            running[attempt_id] = Attempt(seq, task, number)
+            pool.apply_async(worker, ((attempt_id, task), ), callback=lambda result: completed.put((attempt_id, True, result)),
+                             error_callback=lambda error: completed.put((attempt_id, False, error)))
+
+        def finish(attempt: Attempt, result: Any) -> None:
+            if attempt.number < self.retries and _failed(result):
+                delay = self.backoff * 2 ** attempt.number
+                heapq.heappush(delayed, (time.time() + delay, attempt.seq, attempt.number + 1, attempt.task))
+            else:
+                done[attempt.seq] = result
+
+        while True:
+            now = time.time()
+
+            while delayed and delayed[0][0] <= now and len(running) < self.num_workers:
+                _, seq, number, task = heapq.heappop(delayed)
+                submit(seq, task, number)
+
+            while not exhausted and len(running) < self.num_workers and next_seq - next_yield < self.max_in_flight:
+                try:
+                    task = next(tasks)
+                except StopIteration:
+                    exhausted = True
+                    break
+
+                submit(next_seq, task, 0)
+                next_seq += 1
+
+            if done:
+                yielded = next_yield
+
+                if ordered:
+                    while next_yield in done:
+                        yield done.pop(next_yield)
+                        next_yield += 1
+                else:
+                    for seq in list(done):
+                        yield done.pop(seq)
+                        next_yield += 1
+
+                if next_yield != yielded:
+                    continue  # Room was made for more tasks.
+
+            if exhausted and next_yield == next_seq:
+                return
+
+            self._wait(completed, running, delayed, finish)
+            self._drain_channel(running)
+            self._check_deadlines(pool, running, finish, manages_workers)
+
+    def _wait(self, completed: Queue, running: Dict[int, Attempt], delayed: list, finish: Callable[[Attempt, Any], None]) -> None:
+        wait = None
+
+        if delayed:
+            wait = max(0.0, delayed[0][0] - time.time())
+
+        if running and (self.timeout is not None or self.channel is not None):
+            wait = POLL_SECONDS if wait is None else min(wait, POLL_SECONDS)
+
+        try:
+            entry = completed.get(timeout=wait) if wait is None or wait > 0 else completed.get_nowait()
+        except Empty:
+            return
+
+        while True:
+            attempt_id, succeeded, value = entry
+            attempt = running.pop(attempt_id, None)
+
+            # Results of abandoned attempts (e.g. of threads which finished after their timeout) are dropped.
+            if attempt is not None:
+                finish(attempt, value if succeeded else _failure(attempt.task, value))
+
+            try:
+                entry = completed.get_nowait()
+            except Empty:
+                return
+
+    def _drain_channel(self, running: Dict[int, Attempt]) -> None:
+        if self.channel is None:
+            return
+
+        while not self.channel.empty():
+            attempt_id, pid, started = self.channel.get()
+            attempt = running.get(attempt_id)
+
+            if attempt is not None:
+                attempt.started = started
+                attempt.pid = pid
+
+    def _check_deadlines(self, pool: Any, running: Dict[int, Attempt], finish: Callable[[Attempt, Any], None], manages_workers: bool) -> None:
+        now = time.time()
+        live_pids = pool.worker_pids() if manages_workers else None
+
+        for attempt_id, attempt in list(running.items()):
+            if live_pids is not None and attempt.pid is not None and attempt.pid not in live_pids:
+                del running[attempt_id]
+                finish(attempt, _failure(attempt.task, WorkerCrashedError(f'The worker process {attempt.pid} exited while running the item')))
+                continue
+
+            if self.timeout is None:
+                continue
+
+            start = attempt.started if self.channel is not None else attempt.submitted
+
+            if start is not None and now - start > self.timeout:
+                del running[attempt_id]
+
+                if manages_workers and attempt.pid is not None:
+                    pool.kill_worker(attempt.pid)
+
+                finish(attempt, _failure(attempt.task, TimeoutError(f'The item did not finish within {self.timeout} seconds')))
+
+
+def watch_workers(pool: Any, imap: Callable, *args: Any) -> Iterator:
+    """
+    Yield the outputs of `imap(*args)` (`pool.imap()` or `pool.imap_unordered()`), failing with a `WorkerCrashedError` if a worker process of `pool` (which has `worker_pids()`,
+    see `concurrency.ProcessPool`) exits, since the tasks it was running are lost, and the outputs would never end.
+
+    Workers of the pool only exit when it is closed, and it is not known which items the worker was running, so any exit fails the whole loop (unlike with
+    a `Supervisor`, which fails only the item).
+    """
+    from multiprocess import TimeoutError  # type: ignore  # The pool exists, so this was imported already.
+
+    pids = pool.worker_pids()  # Before any task is sent.
+    outputs = imap(*args)
+
+    while True:
+        try:
+            yield outputs.next(POLL_SECONDS)
+        except StopIteration:
+            return
+        except TimeoutError:
+            live_pids = pool.worker_pids()
+
+            for pid in pids - live_pids:
+                raise WorkerCrashedError(f'The worker process {pid} exited while the loop was running (pass `retries` to retry the items of dead workers)')
+
+            pids = live_pids
+
+
+def _failed(result: Any) -> bool:
+    if isinstance(result, list):  # A batch.
+        return any(exception for _, exception, _ in result)
+
+    return result[1]
+
+
+def _failure(task: Any, error: BaseException) -> Any:
+    if isinstance(task, list):  # A batch.
+        return [(i, True, error) for i, _ in task]
+
+    return task[0], True, error
+
+
+_channels: Dict[int, Any] = {}
+
+
+def register_channel(supervision_id: int, channel: Any) -> None:
+    """Make the workers in this process report the tasks they start on `channel` (for workers created with this as their pool's initializer)."""
+    _channels[supervision_id] = channel
+
+
+def unregister_channel(supervision_id: int) -> None:
+    _channels.pop(supervision_id, None)
+
+
+def apply_supervised(apply, supervision_id, pipeline, returns_outputs, task):
+    """Same as `apply`, but for tasks submitted by a `Supervisor`, which is told when the task starts."""
+    attempt_id, task = task
+    channel = _channels.get(supervision_id)
+
+    if channel is not None:
+        channel.put((attempt_id, os.getpid(), time.time()))
+
+    return apply(pipeline, returns_outputs, task)
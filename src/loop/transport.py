@@ -0,0 +1,229 @@
+"""
+Moving NumPy arrays between processes through shared memory instead of pickling them through the pool's pipes (see `transport` in
+[`concurrently()`][loop.Loop.concurrently]).
+
+The parent process owns a recycled set of shared memory segments. Each task is given a segment (if it has a use for one), into which the parent copies the
+input array, and the worker copies the output array. Only small descriptors of the arrays pass through the pipes.
+"""
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+from threading import Condition
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+
+MIN_SEGMENT_SIZE = 1 << 20
+
+
+class SharedArray(NamedTuple):
+    """Describes an array stored at the beginning of the shared memory segment named `name`."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+# A task's segment, as its name and size (or `None` if it has none).
+Segment = Optional[Tuple[str, int]]
+
+
+class SharedMemoryTransport:
+    """
+    The parent's side of the transport: wraps the tasks sent to the pool with `send()`, and unwraps the results received from it with `receive()`.
+
+    At most `max_segments` segments are in use at once, `send()` blocks until a segment is released by `receive()`. This must be larger than the pool's `chunksize`,
+    since the pool pulls whole chunks of tasks before sending them.
+    """
+    def __init__(self, max_segments: int, returns_outputs: bool):
+        self.max_segments = max_segments
+        self.returns_outputs = returns_outputs
+        self._condition = Condition()
+        self._free: List['SharedMemory'] = []
+        self._used: Dict[str, 'SharedMemory'] = {}
+        self._task_segments: Dict[int, str] = {}
+        self._output_nbytes = 0  # The size of the largest output array seen so far.
+        self._closed = False
+
+    def send(self, items: Iterable[Tuple[int, Any]]) -> Iterator[Tuple[int, Any, Segment]]:
+        for i, inp in items:
+            nbytes = max(_shareable_nbytes(inp), self._output_nbytes)
+
+            if nbytes == 0:
+                yield i, inp, None
+                continue
+
+            segment = self._acquire(nbytes)
+
+            if segment is None:
+                return  # Closed while waiting for a segment, the loop has ended.
+
+            self._task_segments[i] = segment.name
+
+            if _shareable_nbytes(inp):
+                inp = _write(segment, inp)
+
+            yield i, inp, (segment.name, segment.size)
+
+    def receive(self, result: Tuple[int, bool, Any]) -> Tuple[int, bool, Any]:
+        i, exception, out = result
+        segment_name = self._task_segments.pop(i, None)
+
+        if isinstance(out, SharedArray):
+            out = _read(self._used[out.name], out).copy()  # The segment is about to be reused.
+        elif self.returns_outputs and _shareable_nbytes(out) > self._output_nbytes:
+            # Sent pickled since its segment was too small (or missing), later tasks get segments large enough.
+            self._output_nbytes = _shareable_nbytes(out)
+
+        if segment_name is not None:
+            self._release(segment_name)
+
+        return i, exception, out
+
+    def close(self) -> None:
+        with self._condition:
+            segments = self._free + list(self._used.values())
+            self._free = []
+            self._used = {}
+            self._closed = True
+            self._condition.notify_all()  # Wake up a pool's feeder thread waiting in `send()`.
+
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    def _acquire(self, nbytes: int) -> Optional['SharedMemory']:
+        with self._condition:
+            while len(self._used) >= self.max_segments and not self._closed:
+                self._condition.wait()
+
+            if self._closed:
+                return None
+
+            fitting = [segment for segment in self._free if segment.size >= nbytes]
+
+            if fitting:
+                segment = min(fitting, key=lambda segment: segment.size)
+                self._free.remove(segment)
+            else:
+                if len(self._free) + len(self._used) >= self.max_segments:
+                    # Too small for the current arrays, make room for a larger one.
+                    evicted = self._free.pop(0)
+                    evicted.close()
+                    evicted.unlink()
+
+                from multiprocessing.shared_memory import SharedMemory
+
+                segment = SharedMemory(create=True, size=_segment_size(nbytes))
+
+            self._used[segment.name] = segment
+            return segment
+
+    def _release(self, name: str) -> None:
+        with self._condition:
+            if not self._closed:
+                self._free.append(self._used.pop(name))
+                self._condition.notify()
+
+
+def apply_with_shared_memory(apply, pipeline, returns_outputs, task):
+    """The worker's side of the transport: same as `apply`, but for tasks created by `SharedMemoryTransport.send()`."""
+    i, inp, segment = task
+
+    if isinstance(inp, SharedArray):
+        # A view, valid only while the task runs (the segment is reused once its result is received).
+        inp = _read(_attach(inp.name), inp)
+
+    i, exception, out = apply(pipeline, returns_outputs, (i, inp))
+
+    if segment is not None and not exception and 0 < _shareable_nbytes(out) <= segment[1]:
+        out = _write(_attach(segment[0]), out)
+
+    return i, exception, out
+
+
+def _shareable_nbytes(obj: Any) -> int:
+    numpy = _numpy()
+
+    if numpy is None or not isinstance(obj, numpy.ndarray) or obj.dtype.hasobject:
+        return 0
+
+    return obj.nbytes
+
+
+def _segment_size(nbytes: int) -> int:
+    # Rounded up to a power of two, so segments fit arrays of slightly varying sizes.
+    return max(MIN_SEGMENT_SIZE, 1 << (nbytes - 1).bit_length())
+
+
+def _write(segment: 'SharedMemory', array: Any) -> SharedArray:
+    shared = SharedArray(segment.name, array.shape, array.dtype.str)
+    view = _read(segment, shared)
+
+    # The output may be a view of the input, which is in the same segment.
+    if _numpy().shares_memory(view, array):
+        array = array.copy()
+
+    view[...] = array
+    return shared
+
+
+def _read(segment: 'SharedMemory', shared: SharedArray) -> Any:
+    numpy = _numpy()
+    return numpy.ndarray(shared.shape, numpy.dtype(shared.dtype), buffer=segment.buf)
+
+
+_attached: 'OrderedDict[str, SharedMemory]' = OrderedDict()
+MAX_ATTACHED = 64
+
+
+def _attach(name: str) -> 'SharedMemory':
+    segment = _attached.get(name)
+
+    if segment is None:
+        segment = _attach_untracked(name)
+        _attached[name] = segment
+
+        # Workers of persistent pools outlive the loops, so segments which were probably unlinked by now are detached.
+        while len(_attached) > MAX_ATTACHED:
+            _, detached = _attached.popitem(last=False)
+
+            try:
+                detached.close()
+            except BufferError:
+                pass
+    else:
+        _attached.move_to_end(name)
+
+    return segment
+
+
+def _attach_untracked(name: str) -> 'SharedMemory':
+    # The segment is owned (and unlinked) by the parent, so it must not be tracked (and unlinked when this process exits) here as well.
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+
+    try:
+        return SharedMemory(name=name, track=False)  # type: ignore  # Python 3.13+
+    except TypeError:
+        pass
+
+    register = resource_tracker.register
+    resource_tracker.register = _do_not_register  # type: ignore
+
+    try:
+        return SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _do_not_register(name: str, rtype: str) -> None:
+    pass
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        return None
+
+    return numpy
@@ -0,0 +1,82 @@
+"""
+Choosing the number of items sent to a worker at once (see `chunksize="auto"` in [`concurrently()`][loop.Loop.concurrently]).
+"""
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+import itertools
+import pickle
+import time
+
+
+class ChunksizeTuner:
+    """
+    Picks chunk sizes such that each chunk takes about `target_seconds` to (de)serialize and compute, which makes the fixed cost of sending a chunk to a worker
+    negligible, while keeping chunks small enough to be spread evenly between workers.
+
+    The first chunks hold a single item, and the chunk size is adjusted after every chunk according to the measured per-item costs.
+    """
+    def __init__(self, max_size: int, target_seconds: float = 0.02, serialization_samples: int = 8):
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.size = 1
+        self.sizes = [1]
+        self.item_seconds: Optional[float] = None
+        self.serialization_seconds: Optional[float] = None
+        self._serialization_samples = serialization_samples
+
+    def chunks(self, items: Iterable[Tuple[int, Any]]) -> Iterator[List[Tuple[int, Any]]]:
+        """Group `items` into chunks, each sized by the estimates at the time it is created."""
+        iterator = iter(items)
+
+        while True:
+            chunk = list(itertools.islice(iterator, self.size))
+
+            if not chunk:
+                return
+
+            if self._serialization_samples > 0:
+                self._serialization_samples -= 1
+                self._measure_serialization(chunk)
+
+            yield chunk
+
+    def update(self, num_items: int, compute_seconds: float) -> None:
+        """Account for a chunk of `num_items` items which took `compute_seconds` in the worker."""
+        if num_items == 0:
+            return
+
+        self.item_seconds = _average(self.item_seconds, compute_seconds / num_items)
+        item_seconds = self.item_seconds + (self.serialization_seconds or 0.0)
+
+        if item_seconds > 0:
+            # Grow gradually, the first measurements may be off (e.g. imports and caches warming up in the worker).
+            size = int(min(self.target_seconds / item_seconds, 8 * self.size, self.max_size))
+        else:
+            size = min(8 * self.size, self.max_size)
+
+        size = max(1, size)
+
+        if size != self.size:
+            self.size = size
+            self.sizes.append(size)
+
+    def _measure_serialization(self, chunk: List[Tuple[int, Any]]) -> None:
+        start = time.perf_counter()
+
+        try:
+            pickle.dumps(chunk)
+        except Exception:
+            return  # Not picklable by `pickle` (but maybe by the pool's serializer), do without.
+
+        # Twice, since inputs are deserialized as well (outputs are about as costly, and are accounted for by the same estimate).
+        self.serialization_seconds = _average(self.serialization_seconds, 2 * (time.perf_counter() - start) / len(chunk))
+
+
+def apply_to_chunk(apply, pipeline, returns_outputs, chunk):
+    """Same as `apply`, but for a list of tasks, also returning how long it took."""
+    start = time.perf_counter()
+    results = [apply(pipeline, returns_outputs, task) for task in chunk]
+    return results, time.perf_counter() - start
+
+
+def _average(average: Optional[float], value: float, weight: float = 0.3) -> float:
+    return value if average is None else (1 - weight) * average + weight * value
@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+
+from src.loop import loop_over
+
+from .utilities import assert_loops_as_expected, assert_loop_raises
+
+
+async def double(x):
+    await asyncio.sleep(0.01)
+    return 2 * x
+
+
+async def is_even(x):
+    await asyncio.sleep(0.01)
+    return x % 2 == 0
+
+
+async def arange(n):
+    for i in range(n):
+        await asyncio.sleep(0)
+        yield i
+
+
+def test_concurrent():
+    start = time.perf_counter()
+    loop = loop_over(range(500)).map(double).concurrently('asyncio')
+    assert_loops_as_expected(loop, [2 * x for x in range(500)])
+    assert time.perf_counter() - start < 2
+
+
+def test_filter():
+    loop = loop_over(range(20)).filter(is_even).map(double).returning(enumerations=True, inputs=True).concurrently('asyncio')
+    assert_loops_as_expected(loop, [(x, x, 2 * x) for x in range(0, 20, 2)])
+
+
+def test_unordered():
+    async def sleep_if_first(x):
+        await asyncio.sleep(0.2 if x == 0 else 0.01)
+        return x
+
+    results = list(loop_over(range(10)).map(sleep_if_first).returning(enumerations=True, inputs=True).concurrently('asyncio', ordered=False))
+    assert results[-1] == (0, 0, 0)
+    assert sorted(results) == [(x, x, x) for x in range(10)]
+
+
+def test_async_iterable():
+    loop = loop_over(arange(10)).map(double).concurrently('asyncio')
+    assert_loops_as_expected(loop, [2 * x for x in range(10)])
+
+
+def test_async_iterable_with_threads():
+    loop = loop_over(arange(10)).concurrently('threads')
+    assert_loop_raises(loop, TypeError)
+
+
+def test_raise_errors():
+    async def raise_error(x):
+        raise TypeError(x)
+
+    loop = loop_over(range(10)).map(raise_error).concurrently('asyncio')
+    assert_loop_raises(loop, TypeError)
+
+
+def test_return_errors():
+    async def raise_error(x):
+        raise TypeError(x)
+
+    for x in loop_over(range(10)).map(raise_error).concurrently('asyncio', exceptions='return'):
+        assert isinstance(x, TypeError)
+
+
+def test_async_for():
+    async def main():
+        return [x async for x in loop_over(arange(10)).map(double).concurrently('asyncio')]
+
+    assert asyncio.run(main()) == [2 * x for x in range(10)]
+
+
+def test_async_for_sequential():
+    async def main():
+        return [x async for x in loop_over(range(10)).filter(is_even).map(double)]
+
+    assert asyncio.run(main()) == [2 * x for x in range(0, 10, 2)]
+
+
+def test_async_for_threads():
+    async def main():
+        return [x async for x in loop_over(range(10)).map(lambda x: 2 * x).concurrently('threads')]
+
+    assert asyncio.run(main()) == [2 * x for x in range(10)]
+
+
+def test_for_inside_event_loop():
+    async def main():
+        for _ in loop_over(range(10)).map(double).concurrently('asyncio'):
+            pass
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
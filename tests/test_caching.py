@@ -0,0 +1,121 @@
+from threading import Lock
+import asyncio
+import time
+
+import pytest
+
+from src.loop import loop_over
+from src.loop.caching import LRUCache, DiskCache
+
+from .utilities import assert_loops_as_expected, assert_loop_raises
+
+
+class CallCounter:
+    def __init__(self, function, delay=0.0):
+        self.function = function
+        self.delay = delay
+        self.calls = 0
+        self._lock = Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+
+        time.sleep(self.delay)
+        return self.function(*args, **kwargs)
+
+
+def test_lru_hits_and_misses():
+    cache = LRUCache()
+    square = CallCounter(pow)
+    loop = loop_over([1, 2, 1, 3, 2, 1]).map(square, 2, cache=cache)
+    assert_loops_as_expected(loop, [1, 4, 1, 9, 4, 1])
+    assert square.calls == 3
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert len(cache) == 3
+
+
+def test_lru_maxsize():
+    cache = LRUCache(maxsize=2)
+    loop = loop_over([1, 2, 3, 1]).map(abs, cache=cache)
+    assert_loops_as_expected(loop, [1, 2, 3, 1])
+    assert (cache.hits, cache.misses) == (0, 4)  # 1 was evicted by 3.
+    assert len(cache) == 2
+
+
+def test_lru_maxbytes():
+    cache = LRUCache(maxsize=None, maxbytes=10, sizeof=len)
+    loop = loop_over(['aaaa', 'bbbb', 'cccc', 'cccc', 'aaaa']).map(str.upper, cache=cache)
+    assert_loops_as_expected(loop, ['AAAA', 'BBBB', 'CCCC', 'CCCC', 'AAAA'])
+    assert (cache.hits, cache.misses) == (1, 4)
+    assert cache.nbytes <= 10
+
+
+def test_key():
+    cache = LRUCache(key=lambda x: x['id'])
+    loop = loop_over([{'id': 1, 'v': 'a'}, {'id': 1, 'v': 'b'}]).map(lambda x: x['v'], cache=cache)
+    assert_loops_as_expected(loop, ['a', 'a'])
+
+
+def test_with_unpacking():
+    cache = LRUCache()
+    loop = loop_over([(1, 2), (1, 2), (2, 1)]).next_call_with(unpacking='*').map(pow, cache=cache)
+    assert_loops_as_expected(loop, [1, 1, 2])
+    assert cache.hits == 1
+
+
+def test_exceptions_not_cached():
+    cache = LRUCache()
+    loop = loop_over([0, 0, 1]).map(lambda x: 1 / x, cache=cache).concurrently('threads', exceptions='return', num_workers=0)
+    outputs = list(loop)
+    assert isinstance(outputs[0], ZeroDivisionError) and isinstance(outputs[1], ZeroDivisionError)
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert_loop_raises(loop_over([0]).map(lambda x: 1 / x, cache=cache), ZeroDivisionError)
+
+
+def test_in_flight_deduplication():
+    cache = LRUCache()
+    slow_square = CallCounter(lambda x: x**2, delay=0.05)
+    loop = loop_over([3] * 8 + [4] * 8).map(slow_square, cache=cache).concurrently('threads', num_workers=16)
+    assert_loops_as_expected(loop, [9] * 8 + [16] * 8)
+    assert slow_square.calls == 2
+    assert (cache.hits, cache.misses) == (14, 2)
+
+
+def test_asyncio():
+    cache = LRUCache()
+
+    async def double(x):
+        await asyncio.sleep(0.001)
+        return 2 * x
+
+    assert_loops_as_expected(loop_over([1, 2, 1]).map(double, cache=cache).concurrently('asyncio', num_workers=1), [2, 4, 2])
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_disk_persists(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    upper = CallCounter(str.upper)
+
+    for _ in range(2):
+        cache = DiskCache(path)
+        assert_loops_as_expected(loop_over(['a', 'b', 'a']).map(upper, cache=cache), ['A', 'B', 'A'])
+        cache.close()
+
+    assert (cache.hits, cache.misses) == (3, 0)
+    assert len(DiskCache(path)) == 2
+    assert upper.calls == 2
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_disk_concurrently(tmp_path, how):
+    cache = DiskCache(tmp_path / 'cache.sqlite', key=str)
+    loop = loop_over(list(range(20)) * 2).map(pow, 2, cache=cache).concurrently(how, num_workers=3)
+    assert_loops_as_expected(loop, [x**2 for x in range(20)] * 2)
+    assert len(cache) == 20
+
+    # Everything is cached by now, in this process too.
+    loop = loop_over(range(20)).map(pow, 2, cache=cache)
+    hits = cache.hits
+    assert_loops_as_expected(loop, [x**2 for x in range(20)])
+    assert cache.hits == hits + 20
@@ -0,0 +1,109 @@
+import io
+import re
+
+import pytest
+
+from src.loop import loop_over
+
+from .utilities import assert_loops_as_expected
+
+
+class Recorder:
+    def __init__(self):
+        self.inputs = []
+
+    def __call__(self, x):
+        self.inputs.append(x)
+        return 10 * x
+
+
+def test_resume(tmp_path):
+    path = tmp_path / 'loop.ckpt'
+    first = Recorder()
+
+    for i, out in enumerate(loop_over(range(100)).map(first).checkpoint(path, every=7)):
+        if i == 49:
+            break
+
+    second = Recorder()
+    loop = loop_over(range(100)).map(second).checkpoint(path, every=7).returning(enumerations=True, inputs=True, outputs=True)
+    assert_loops_as_expected(loop, [(i, i, 10 * i) for i in range(100)])
+    assert second.inputs == list(range(50, 100))
+
+    # Everything is completed now.
+    third = Recorder()
+    assert_loops_as_expected(loop_over(range(100)).map(third).checkpoint(path), [10 * i for i in range(100)])
+    assert third.inputs == []
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+@pytest.mark.parametrize('ordered', [True, False])
+def test_concurrently(tmp_path, how, ordered):
+    path = tmp_path / 'loop.ckpt'
+    loop = loop_over(range(50)).map(pow, 2).concurrently(how, num_workers=3).checkpoint(path, every=10)
+    loop.exhaust()
+
+    loop = loop_over(range(100)).map(pow, 2).concurrently(how, num_workers=3, ordered=ordered).checkpoint(path, every=10)
+    outputs = list(loop)
+
+    if ordered:
+        assert outputs == [x**2 for x in range(100)]
+    else:
+        assert sorted(outputs) == [x**2 for x in range(100)]
+
+
+def test_without_outputs(tmp_path):
+    path = tmp_path / 'loop.ckpt'
+    first = Recorder()
+    loop_over(range(10)).map(first).checkpoint(path, outputs=False).exhaust()
+    assert first.inputs == list(range(10))
+
+    second = Recorder()
+    assert_loops_as_expected(loop_over(range(12)).map(second).checkpoint(path, outputs=False), [100, 110])
+    assert_loops_as_expected(loop_over(range(12)).map(second).checkpoint(path, outputs=False).returning(enumerations=True, outputs=False), list(range(12)))
+    assert second.inputs == [10, 11]
+
+
+def test_skipped_and_failed(tmp_path):
+    path = tmp_path / 'loop.ckpt'
+    loop = loop_over(range(10)).filter(lambda x: x % 2 == 0).map(lambda x: 1 / (x - 4)).concurrently('threads', exceptions='return').checkpoint(path)
+    outputs = list(loop)
+    assert isinstance(outputs[2], ZeroDivisionError)
+
+    recorder = Recorder()
+    loop = loop_over(range(10)).filter(lambda x: x % 2 == 0).map(recorder).checkpoint(path)
+    assert_loops_as_expected(loop, [-0.25, -0.5, 40, 0.5, 0.25])
+    assert recorder.inputs == [4]
+
+
+def test_truncated_record(tmp_path):
+    path = tmp_path / 'loop.ckpt'
+    loop_over(range(10)).map(abs).checkpoint(path, every=5).exhaust()
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])  # The second record was cut off.
+
+    recorder = Recorder()
+    assert_loops_as_expected(loop_over(range(10)).map(recorder).checkpoint(path), [0, 1, 2, 3, 4, 50, 60, 70, 80, 90])
+    assert recorder.inputs == [5, 6, 7, 8, 9]
+
+
+def test_progress_resumes(tmp_path):
+    path = tmp_path / 'loop.ckpt'
+
+    for i, _ in enumerate(loop_over(range(100)).filter(lambda x: x % 4 != 0).checkpoint(path, every=1)):
+        if i == 29:
+            break
+
+    with io.StringIO() as file:
+        loop_over(range(100)).filter(lambda x: x % 4 != 0).checkpoint(path).show_progress(refresh=True, total=100, file=file).exhaust()
+        prints = [part.rstrip() for part in file.getvalue().split('\r')]
+
+    # The print following the initial one is right after resuming 30 returned (and 10 skipped) items.
+    assert re.search(r' 0/100 \[', prints[1])
+    assert re.search(r' 30/90 \[', prints[2])
+    assert re.search(r' 75/75 \[', prints[-1])
+
+
+def test_non_positive_every(tmp_path):
+    with pytest.raises(ValueError):
+        loop_over(range(10)).checkpoint(tmp_path / 'loop.ckpt', every=0)
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from src.loop import loop_over
+from src.loop.tuning import ChunksizeTuner
+
+
+def square(x):
+    return x * x
+
+
+def slow_square(x):
+    time.sleep(0.01)
+    return x * x
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+@pytest.mark.parametrize('ordered', [True, False])
+def test_auto_outputs(how, ordered):
+    loop = loop_over(range(5000)).map(square).concurrently(how, num_workers=2, chunksize='auto', ordered=ordered)
+    outputs = list(loop)
+    assert (outputs if ordered else sorted(outputs)) == [x * x for x in range(5000)]
+
+
+def test_auto_with_max_in_flight():
+    loop = loop_over(range(1000)).map(square).concurrently('threads', num_workers=2, chunksize='auto', max_in_flight=16)
+    assert list(loop) == [x * x for x in range(1000)]
+    assert max(loop.stats()['segments'][0]['chunksizes']) <= 16
+
+
+def test_auto_with_filter():
+    loop = loop_over(range(1000)).filter(lambda x: x % 3 == 0).concurrently('threads', num_workers=2, chunksize='auto')
+    assert list(loop) == list(range(0, 1000, 3))
+
+
+def test_stats_cheap_function_grows():
+    loop = loop_over(range(20000)).map(square).concurrently('processes', num_workers=2, chunksize='auto')
+    loop.exhaust()
+    stats, = loop.stats()['segments']
+    assert stats['chunksize'] == 'auto'
+    assert stats['chunksizes'][0] == 1
+    assert max(stats['chunksizes']) > 100
+    assert stats['item_seconds'] is not None and stats['serialization_seconds'] is not None
+
+
+def test_stats_slow_function_stays_small():
+    loop = loop_over(range(30)).map(slow_square).concurrently('threads', num_workers=2, chunksize='auto')
+    loop.exhaust()
+    stats, = loop.stats()['segments']
+    assert max(stats['chunksizes']) <= 2
+    assert stats['item_seconds'] >= 0.01
+
+
+def test_stats_fixed_chunksize():
+    loop = loop_over(range(10)).map(square).concurrently('threads', chunksize=4).map(square).concurrently('threads')
+    assert loop.stats() == {'segments': []}
+    loop.exhaust()
+    assert loop.stats() == {'segments': [{'chunksize': 4}, {'chunksize': None}]}
+
+
+def test_invalid_chunksize():
+    with pytest.raises(ValueError):
+        loop_over(range(10)).concurrently('threads', chunksize='fast')  # type: ignore
+
+
+def test_tuner_bounds():
+    tuner = ChunksizeTuner(max_size=50)
+    chunks = tuner.chunks((i, i) for i in range(1000))
+    assert len(next(chunks)) == 1
+    tuner.update(1, 0.0)
+    assert tuner.size == 8
+    tuner.update(8, 0.0)
+    assert tuner.size == 50
+    tuner.update(50, 50.0)
+    assert tuner.size == 1
@@ -0,0 +1,100 @@
+import pytest
+
+from src.loop import loop_over, loop_range
+
+
+np = pytest.importorskip('numpy')
+
+
+def test_to_list():
+    assert loop_range(5).map(lambda x: x * x).to_list() == [0, 1, 4, 9, 16]
+    assert loop_over('abc').returning(enumerations=True).concurrently('threads').to_list() == [(0, 'a'), (1, 'b'), (2, 'c')]
+
+
+def test_to_numpy():
+    array = loop_range(5).map(lambda x: x / 2).to_numpy(float)
+    assert array.dtype == np.float64
+    np.testing.assert_array_equal(array, [0, 0.5, 1, 1.5, 2])
+
+
+def test_to_numpy_inferred_dtype():
+    np.testing.assert_array_equal(loop_range(3).to_numpy(), [0, 1, 2])
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_to_numpy_filtered(how):
+    # Fewer values than items, so the length is not known in advance.
+    array = loop_range(100).filter(lambda x: x % 3 == 0).concurrently(how).to_numpy(np.int32)
+    assert array.dtype == np.int32
+    np.testing.assert_array_equal(array, np.arange(0, 100, 3))
+
+
+def test_to_numpy_unknown_length():
+    np.testing.assert_array_equal(loop_over(iter(range(10))).to_numpy(int), np.arange(10))
+
+
+def test_to_numpy_resumed(tmp_path):
+    # Items completed by the previous run are not returned again, since their outputs were not recorded.
+    path = tmp_path / 'loop.ckpt'
+    loop_range(5).map(float).checkpoint(path, outputs=False).exhaust()
+    np.testing.assert_array_equal(loop_range(10).map(float).checkpoint(path, outputs=False).to_numpy(float), [5, 6, 7, 8, 9])
+    np.testing.assert_array_equal(loop_range(10).checkpoint(path, outputs=False).returning(enumerations=True, outputs=False).to_numpy(int), np.arange(10))
+
+
+def test_to_numpy_rows():
+    array = loop_range(4).map(lambda x: np.full(3, x)).to_numpy(float)
+    assert array.shape == (4, 3)
+    np.testing.assert_array_equal(array[:, 0], np.arange(4))
+
+
+def test_to_numpy_structured():
+    array = loop_over('ab').returning(enumerations=True).to_numpy([('index', int), ('letter', 'U1')])
+    assert array['index'].tolist() == [0, 1]
+    assert array['letter'].tolist() == ['a', 'b']
+
+
+def test_to_numpy_empty():
+    assert loop_over([]).to_numpy(float).shape == (0, )
+
+
+def test_to_columns():
+    indices, inputs, outputs = loop_range(1, 4).map(lambda x: x * x).returning(enumerations=True, inputs=True).to_columns([None, None, float])
+    np.testing.assert_array_equal(indices, [0, 1, 2])
+    assert indices.dtype.kind == 'i'
+    np.testing.assert_array_equal(inputs, [1, 2, 3])
+    np.testing.assert_array_equal(outputs, [1, 4, 9])
+    assert outputs.dtype == np.float64
+
+
+def test_to_columns_default_dtypes():
+    indices, outputs = loop_over(['a', 'b']).returning(enumerations=True).to_columns()
+    assert indices.dtype.kind == 'i'
+    assert outputs.tolist() == ['a', 'b']
+
+
+def test_to_columns_grows():
+    # The capacity estimate is too small, since the iterable has no length.
+    indices, outputs = loop_over(iter(range(1000))).map(lambda x: np.full(2, x)).returning(enumerations=True).to_columns([int, float])
+    np.testing.assert_array_equal(indices, np.arange(1000))
+    assert outputs.shape == (1000, 2)
+    np.testing.assert_array_equal(outputs[:, 1], np.arange(1000))
+
+
+def test_to_columns_filtered():
+    indices, outputs = loop_range(10).filter(lambda x: x % 2).returning(enumerations=True).to_columns([int, int])
+    np.testing.assert_array_equal(indices, [1, 3, 5, 7, 9])
+    np.testing.assert_array_equal(outputs, [1, 3, 5, 7, 9])
+
+
+def test_to_columns_single():
+    columns = loop_range(3).to_columns([float])
+    assert len(columns) == 1
+    np.testing.assert_array_equal(columns[0], [0, 1, 2])
+
+
+def test_to_columns_invalid():
+    with pytest.raises(ValueError):
+        loop_range(3).returning(outputs=False).to_columns()
+
+    with pytest.raises(ValueError):
+        loop_range(3).to_columns([int, int])
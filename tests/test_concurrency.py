@@ -6,6 +6,8 @@ import pytest
 
 from src.loop import loop_over
 
+from .utilities import assert_loops_as_expected, assert_loop_raises
+
 
 def test_different_thread_ids():
     def wait_and_get_id(x):
@@ -92,3 +94,190 @@ def test_return_errors_in_processes():
 
     for x in loop_over(range(100)).map(raise_error).concurrently('processes', exceptions='return'):
         assert isinstance(x, TypeError)
+
+
+def _sleep_if_first(x):
+    time.sleep(0.5 if x == 0 else 0.01)
+    return x * 10
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_unordered(how):
+    loop = loop_over(range(20)).map(_sleep_if_first).returning(enumerations=True, inputs=True).concurrently(how, num_workers=4, ordered=False)
+    results = list(loop)
+    assert results[0] != (0, 0, 0)
+    assert sorted(results) == [(i, i, i * 10) for i in range(20)]
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_ordered_chunksize(how):
+    loop = loop_over(range(20)).map(_sleep_if_first).concurrently(how, num_workers=4, chunksize=3)
+    assert list(loop) == [i * 10 for i in range(20)]
+
+
+def test_unordered_return_errors():
+    def raise_error(x):
+        raise TypeError(x)
+
+    for x in loop_over(range(100)).map(raise_error).concurrently('threads', exceptions='return', ordered=False):
+        assert isinstance(x, TypeError)
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+@pytest.mark.parametrize('chunksize', [None, 4])
+def test_max_in_flight(how, chunksize):
+    max_in_flight = 8
+    pulled = 0
+
+    def counting_source():
+        nonlocal pulled
+        for i in range(200):
+            pulled += 1
+            yield i
+
+    loop = loop_over(counting_source()).map(abs).concurrently(how, num_workers=4, chunksize=chunksize, max_in_flight=max_in_flight)
+
+    for consumed, x in enumerate(loop):
+        assert x == consumed
+        assert pulled - consumed <= max_in_flight
+        time.sleep(0.001)
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+@pytest.mark.parametrize('ordered', [True, False])
+def test_max_in_flight_slow_consumer(how, ordered):
+    max_in_flight = 5
+    pulled = 0
+    lags = []
+
+    def counting_source():
+        nonlocal pulled
+        for i in range(40):
+            pulled += 1
+            yield i
+
+    loop = loop_over(counting_source()).map(abs).concurrently(how, num_workers=2, ordered=ordered, max_in_flight=max_in_flight)
+
+    for consumed, _ in enumerate(loop):
+        time.sleep(0.02)  # Much slower than the workers, so the source would be drained if nothing held it back.
+        lags.append(pulled - consumed)
+
+    assert max(lags) == max_in_flight  # Reached (the workers run ahead of the consumer), but never exceeded.
+    assert pulled == 40
+
+
+def test_max_in_flight_smaller_than_chunksize():
+    with pytest.raises(ValueError):
+        loop_over(range(10)).concurrently('threads', chunksize=4, max_in_flight=2)
+
+
+def test_max_in_flight_early_break():
+    for x in loop_over(range(1000)).map(abs).concurrently('threads', max_in_flight=2):
+        if x == 10:
+            break
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_inputs_kept_in_parent(ordered):
+    inp = [[i] * 100 for i in range(50)]
+    loop = loop_over(inp).map(len).returning(inputs=True).concurrently('processes', num_workers=4, ordered=ordered)
+
+    for x, out in loop:
+        assert out == 100
+        assert any(x is item for item in inp)  # The very same object, not a copy that was sent back from a worker.
+
+
+def test_inputs_without_outputs_in_processes():
+    loop = loop_over(range(20)).filter(lambda x: x % 3 == 0).map(str).returning(enumerations=True, inputs=True, outputs=False).concurrently('processes', num_workers=4)
+    assert list(loop) == [(i, i) for i in range(0, 20, 3)]
+
+
+class PickleCounter:
+    pickled = 0
+
+    def __getstate__(self):
+        PickleCounter.pickled += 1
+        return {}
+
+    def __setstate__(self, state):
+        pass
+
+
+def _add_nothing(x, counter):
+    return x
+
+
+def test_functions_not_sent_per_task():
+    num_workers = 3
+    PickleCounter.pickled = 0
+    loop = loop_over(range(100)).map(_add_nothing, PickleCounter()).concurrently('processes', num_workers=num_workers)
+    assert_loops_as_expected(loop, range(100))
+    assert PickleCounter.pickled <= num_workers  # At most once per worker (when workers are spawned, with fork it's never).
+
+
+def test_iterate_twice():
+    loop = loop_over(range(10)).map(abs).concurrently('threads')
+    assert list(loop) == list(loop)
+
+
+def _with_pid(x):
+    return x, getpid()
+
+
+def test_segments():
+    main_thread, main_pid = get_ident(), getpid()
+
+    def with_thread_id(x):
+        time.sleep(0.001)
+        return x, get_ident()
+
+    loop = loop_over(range(100)).map(with_thread_id).concurrently('threads', num_workers=4).map(_with_pid).concurrently('processes', num_workers=2)
+    results = list(loop)
+
+    assert [x for (x, _), _ in results] == list(range(100))
+    assert main_thread not in {thread_id for (_, thread_id), _ in results}
+    assert main_pid not in {pid for _, pid in results}
+
+
+def test_segments_bypass_skipped_and_errors():
+    def fail_on_five(x):
+        if x == 5:
+            raise TypeError(x)
+        return x
+
+    loop = (loop_over(range(20)).filter(lambda x: x % 2 == 1).map(fail_on_five).returning(enumerations=True, inputs=True).concurrently('threads', exceptions='return').
+            map(lambda x: 10 * x).concurrently('threads', num_workers=3, chunksize=2))
+    results = list(loop)
+
+    assert [i for i, _, _ in results] == list(range(1, 20, 2))
+    assert isinstance(results[2][2], TypeError)
+    assert [out for i, _, out in results if i != 5] == [10 * x for x in range(1, 20, 2) if x != 5]
+
+
+def test_segments_raise_downstream():
+    def raise_error(x):
+        raise TypeError(x)
+
+    loop = loop_over(range(20)).map(abs).concurrently('threads').map(raise_error).concurrently('threads')
+    assert_loop_raises(loop, TypeError)
+
+
+def test_segments_unordered_downstream():
+    loop = loop_over(range(20)).filter(lambda x: x != 3).concurrently('threads').map(_sleep_if_first).returning(enumerations=True).concurrently('threads', ordered=False)
+    results = list(loop)
+    assert results[0] != (0, 0)
+    assert sorted(results) == [(i, 10 * i) for i in range(20) if i != 3]
+
+
+def test_segments_sequential_downstream():
+    main_thread = get_ident()
+    loop = loop_over(range(20)).map(abs).concurrently('threads').map(lambda x: get_ident()).concurrently(num_workers=0)
+    assert set(loop) == {main_thread}
+
+
+def test_segments_early_break():
+    loop = loop_over(range(100000)).map(abs).concurrently('threads', max_in_flight=4).map(_with_pid).concurrently('processes', num_workers=2)
+
+    for x, _ in loop:
+        if x == 10:
+            break
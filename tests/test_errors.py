@@ -0,0 +1,112 @@
+import gc
+import time
+import weakref
+
+import pytest
+
+from src.loop import loop_over
+from src.loop.errors import ErrorRecord
+
+
+class Payload:
+    pass
+
+
+def inverse(x):
+    return 1 / (x % 3)
+
+
+def nap_on_zero(x):
+    time.sleep(1 if x == 0 else 0)
+    return x
+
+
+def add(x, y):
+    return x + y
+
+
+@pytest.mark.parametrize('how, num_workers', [('threads', 2), ('processes', 2), ('threads', 0), ('asyncio', None)])
+def test_collect(how, num_workers):
+    loop = loop_over(range(6)).map(inverse).concurrently(how, num_workers=num_workers, exceptions='collect')  # type: ignore
+    results = list(loop)
+
+    assert results[1:3] + results[4:] == [1.0, 0.5, 1.0, 0.5]
+
+    for index in [0, 3]:
+        record = results[index]
+        assert isinstance(record, ErrorRecord)
+        assert (record.index, record.type, record.message) == (index, 'ZeroDivisionError', 'division by zero')
+        assert 'in inverse' in record.traceback
+
+    errors = loop.stats()['errors']
+    assert (errors['count'], errors['types']) == (2, {'ZeroDivisionError': 2})
+    assert [record.index for record in errors['examples']] == [0]
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+@pytest.mark.parametrize('chunksize', [None, 4])
+def test_skip(how, chunksize):
+    loop = loop_over(range(12)).map(inverse).returning(enumerations=True).concurrently(how, num_workers=2, exceptions='skip', chunksize=chunksize)
+    assert [i for i, _ in loop] == [i for i in range(12) if i % 3]
+    assert loop.stats()['errors']['count'] == 4
+
+
+@pytest.mark.parametrize('how, num_workers', [('threads', 2), ('threads', 0)])
+def test_skip_to_numpy(how, num_workers):
+    np = pytest.importorskip('numpy')
+    array = loop_over(range(10)).map(inverse).concurrently(how, num_workers=num_workers, exceptions='skip').to_numpy(float)  # type: ignore
+    np.testing.assert_array_equal(array, [1, 0.5, 1, 0.5, 1, 0.5])
+
+
+def test_batches():
+    def fail_on_odd_batch(batch):
+        if batch[0] % 4:
+            raise ValueError(batch)
+
+        return batch
+
+    results = list(loop_over(range(8)).map_batches(fail_on_odd_batch, 2).concurrently('threads', exceptions='collect'))
+    assert results[:2] + results[4:6] == [0, 1, 4, 5]
+    assert [record.index for record in results if isinstance(record, ErrorRecord)] == [2, 3, 6, 7]
+
+
+def test_segments():
+    loop = loop_over(range(6)).map(inverse).concurrently('threads', exceptions='skip').map(add, 1).concurrently('processes', num_workers=2)
+    assert list(loop) == [2.0, 1.5, 2.0, 1.5]
+    assert loop.stats()['errors']['count'] == 2
+
+
+def test_timeout_collected():
+    loop = loop_over(range(3)).map(nap_on_zero).concurrently('threads', exceptions='collect', timeout=0.2)
+    record, *rest = list(loop)
+    assert rest == [1, 2]
+    assert (record.index, record.type) == (0, 'TimeoutError')
+
+
+def test_reduce():
+    loop = loop_over(range(6)).map(inverse).concurrently('processes', num_workers=2, exceptions='skip', chunksize=2)
+    assert loop.reduce(add, associative=True) == 3.0
+
+
+def test_frames_released():
+    released = []
+
+    def fail(x):
+        payload = Payload()
+        weakref.finalize(payload, released.append, x)
+        raise ValueError(x)
+
+    gc.disable()
+
+    try:
+        for exceptions in ['collect', 'skip']:
+            released.clear()
+            list(loop_over(range(10)).map(fail).concurrently('threads', exceptions=exceptions))  # type: ignore
+            assert sorted(released) == list(range(10))
+    finally:
+        gc.enable()
+
+
+def test_invalid_exceptions():
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently('threads', exceptions='ignore')  # type: ignore
@@ -0,0 +1,111 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from os import getpid
+import threading
+import time
+
+import pytest
+
+from src.loop import loop_over
+
+from .utilities import assert_loops_as_expected, assert_loop_raises
+
+
+def add(x, y):
+    return x + y
+
+
+def is_even(x):
+    return x % 2 == 0
+
+
+def inverse(x):
+    return 1 / x
+
+
+def wait_and_get_pid(x):
+    time.sleep(0.01)
+    return getpid()
+
+
+def slow_first(x):
+    time.sleep(0.2 if x == 0 else 0.0)
+    return x
+
+
+@pytest.fixture(scope='module')
+def process_executor():
+    with ProcessPoolExecutor(2) as executor:
+        yield executor
+
+
+@pytest.fixture(params=['threads', 'processes'])
+def executor(request, process_executor):
+    if request.param == 'processes':
+        yield process_executor
+    else:
+        with ThreadPoolExecutor(3) as executor:
+            yield executor
+
+
+@pytest.mark.parametrize('chunksize', [None, 4, 'auto'])
+def test_ordered(executor, chunksize):
+    assert_loops_as_expected(loop_over(range(50)).map(add, 1).filter(is_even).concurrently(executor=executor, chunksize=chunksize), range(2, 51, 2))
+
+
+def test_unordered(executor):
+    assert sorted(loop_over(range(20)).map(slow_first).concurrently(executor=executor, ordered=False)) == list(range(20))
+
+
+def test_exceptions(executor):
+    results = list(loop_over(range(3)).map(inverse).concurrently(executor=executor, exceptions='return'))
+    assert isinstance(results[0], ZeroDivisionError)
+    assert results[1:] == [1, 0.5]
+
+    assert_loop_raises(loop_over(range(3)).map(inverse).concurrently(executor=executor), ZeroDivisionError)
+
+
+def test_reduce_and_batches(executor):
+    assert loop_over(range(100)).map(add, 1).concurrently(executor=executor).reduce(add, associative=True) == 5050
+    assert list(loop_over(range(10)).map_batches(sorted, 3).concurrently(executor=executor)) == list(range(10))
+
+
+def test_not_shut_down(process_executor):
+    first = set(loop_over(range(30)).map(wait_and_get_pid).concurrently(executor=process_executor))
+    second = set(loop_over(range(30)).map(wait_and_get_pid).concurrently(executor=process_executor))
+    assert first == second
+    assert process_executor.submit(abs, -1).result() == 1
+
+
+def test_pending_cancelled():
+    started = []
+    release = threading.Event()
+
+    def record(x):
+        started.append(x)
+        release.wait(5)
+        return x
+
+    with ThreadPoolExecutor(2) as executor:
+        assert loop_over(range(100)).map(record).concurrently(executor=executor, max_in_flight=10).first() == 0
+        release.set()
+
+    assert len(started) <= 10
+
+
+def test_timeout():
+    with ThreadPoolExecutor(2) as executor:
+        results = list(loop_over(range(4)).map(slow_first).concurrently(executor=executor, exceptions='return', timeout=0.1))
+
+    assert isinstance(results[0], TimeoutError)
+    assert results[1:] == [1, 2, 3]
+
+
+def test_invalid_arguments(process_executor):
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently('threads', executor=process_executor)
+
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently(num_workers=2, executor=process_executor)
+
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently(executor=object())
@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from src.loop import loop_over
+from src.loop.progress import Hooks
+
+
+def inverse(x):
+    return 1 / x
+
+
+def nap(x):
+    time.sleep(0.01)
+    return x
+
+
+def is_odd(x):
+    return x % 2 == 1
+
+
+class Recorder(Hooks):
+    def __init__(self, batch_size=1, batch_interval=None):
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.events = []
+        self.batches = []
+
+    def on_start(self):
+        self.events.append('start')
+
+    def on_batch(self, items):
+        self.batches.append(len(items))
+        super().on_batch(items)
+
+    def on_item_done(self, index, duration, error):
+        self.events.append((index, duration, error))
+
+    def on_end(self, error):
+        self.events.append(('end', error))
+
+    def items(self):
+        return [event for event in self.events if isinstance(event, tuple) and event[0] != 'end']
+
+
+@pytest.mark.parametrize('how', [None, 'threads', 'processes'])
+def test_events(how):
+    recorder = Recorder()
+    loop = loop_over(range(10)).filter(is_odd).map(nap)
+
+    if how is not None:
+        loop = loop.concurrently(how, num_workers=2)
+
+    assert list(loop.hooks(recorder)) == list(range(1, 10, 2))
+    assert recorder.events[0] == 'start'
+    assert recorder.events[-1] == ('end', None)
+    items = recorder.items()
+    assert [index for index, _, _ in items] == [1, 3, 5, 7, 9]
+    assert all(0.01 <= duration < 0.1 and error is None for _, duration, error in items)
+
+
+def test_errors():
+    recorder = Recorder()
+    outputs = list(loop_over([1, 0, 2]).map(inverse).concurrently('threads', exceptions='return').hooks(recorder))
+    errors = [error for _, _, error in recorder.items()]
+    assert errors[0] is None and errors[2] is None
+    assert errors[1] is outputs[1]
+    assert isinstance(errors[1], ZeroDivisionError)
+
+
+def test_raised_error_ends():
+    recorder = Recorder()
+
+    with pytest.raises(ZeroDivisionError):
+        loop_over([1, 0, 2]).map(inverse).hooks(recorder).exhaust()
+
+    assert recorder.events[0] == 'start'
+    assert recorder.events[-1][0] == 'end'
+    assert isinstance(recorder.events[-1][1], ZeroDivisionError)
+
+
+def test_closed_early():
+    recorder = Recorder()
+
+    for x in loop_over(range(100)).hooks(recorder):
+        if x == 3:
+            break
+
+    assert recorder.events[-1] == ('end', None)
+
+
+def test_batches():
+    recorder = Recorder(batch_size=4)
+    loop_over(range(10)).map(abs).concurrently('threads').hooks(recorder).exhaust()
+    assert recorder.batches == [4, 4, 2]
+    assert sorted(index for index, _, _ in recorder.items()) == list(range(10))
+
+
+def test_batch_interval():
+    recorder = Recorder(batch_size=1000, batch_interval=0.02)
+    loop_over(range(10)).map(nap).hooks(recorder).exhaust()
+    assert 1 < len(recorder.batches) < 10
+    assert sum(recorder.batches) == 10
+
+
+def test_map_batches_split_duration():
+    recorder = Recorder()
+    loop_over(range(8)).map_batches(lambda batch: [nap(x) for x in batch], 4).concurrently('threads').hooks(recorder).exhaust()
+    assert all(0.01 <= duration < 0.05 for _, duration, _ in recorder.items())
+
+
+def test_several_hooks():
+    first, second = Recorder(batch_size=2), Recorder(batch_size=5)
+    loop_over(range(4)).hooks(first, second).exhaust()
+    assert first.events == second.events
+    assert second.batches == [2, 2]
+
+
+def test_not_supported_with_asyncio():
+    async def double(x):
+        return 2 * x
+
+    with pytest.raises(TypeError):
+        list(loop_over(range(3)).map(double).concurrently('asyncio').hooks(Recorder()))
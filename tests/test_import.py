@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported only once they are used, so short-lived programs which never use them do not pay for importing them: the modules of the package import
+# these inside the functions which need them, rather than at the top.
+LAZY_MODULES = ['pathos', 'dill', 'multiprocess', 'tqdm', 'numpy', 'asyncio', 'sqlite3', 'multiprocessing', 'importlib.metadata']
+
+
+def imported_modules(code: str) -> list:
+    script = f'import json, sys\n{code}\nprint(json.dumps(sorted(sys.modules)))'
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def test_import_is_lazy():
+    modules = imported_modules('import src.loop')
+    assert [module for module in LAZY_MODULES if module in modules] == []
+
+
+def test_sequential_loop_is_lazy():
+    modules = imported_modules('from src.loop import loop_over\nloop_over(range(10)).map(abs).filter(bool).exhaust()')
+    assert [module for module in LAZY_MODULES if module in modules] == []
+
+
+@pytest.mark.parametrize('code, module', [
+    ('loop_over(range(3)).concurrently("processes").exhaust()', 'pathos'),
+    ('loop_over(range(3)).show_progress(disable=True).exhaust()', 'tqdm'),
+])
+def test_imported_on_use(code, module):
+    assert module in imported_modules(f'from src.loop import loop_over\n{code}')
+
+
+def test_version():
+    import src.loop
+
+    # Looked up on first use, and missing if the package is not installed.
+    try:
+        version = src.loop.__version__
+    except AttributeError:
+        pass
+    else:
+        assert isinstance(version, str)
+
+    with pytest.raises(AttributeError):
+        src.loop.does_not_exist  # type: ignore
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+from src.loop import loop_over
+
+from .utilities import assert_loops_as_expected, assert_loop_raises
+
+
+def double_all(batch):
+    return [2 * x for x in batch]
+
+
+def test_simple():
+    loop = loop_over(range(10)).map_batches(double_all, 3)
+    assert_loops_as_expected(loop, [2 * x for x in range(10)])
+
+
+def test_batch_sizes():
+    sizes = []
+
+    def record_size(batch):
+        sizes.append(len(batch))
+        return batch
+
+    loop_over(range(10)).map_batches(record_size, 4).exhaust()
+    assert sizes == [4, 4, 2]
+
+
+def test_args_kwargs():
+    def scale_and_shift(batch, scale, shift=0):
+        return [scale * x + shift for x in batch]
+
+    loop = loop_over(range(10)).map_batches(scale_and_shift, 4, 3, shift=1)
+    assert_loops_as_expected(loop, [3 * x + 1 for x in range(10)])
+
+
+def test_returning_and_filter():
+    loop = loop_over(range(20)).filter(lambda x: x % 3 == 0).map_batches(double_all, 2).map(str).filter(lambda x: x != '12').returning(enumerations=True, inputs=True)
+    assert_loops_as_expected(loop, [(x, x, str(2 * x)) for x in range(0, 20, 3) if x != 6])
+
+
+def test_numpy():
+    np = pytest.importorskip('numpy')
+    loop = loop_over(range(10)).map_batches(np.square, 4, collate=np.array)
+    assert_loops_as_expected(loop, [x ** 2 for x in range(10)])
+
+
+def test_wrong_number_of_outputs():
+    loop = loop_over(range(10)).map_batches(lambda batch: batch[:-1], 4)
+    assert_loop_raises(loop, ValueError)
+
+
+def test_non_positive_batch_size():
+    with pytest.raises(ValueError):
+        loop_over(range(10)).map_batches(double_all, 0)
+
+
+def test_return_errors():
+    def fail_on_second_batch(batch):
+        if 3 in batch:
+            raise TypeError(batch)
+        return batch
+
+    results = list(loop_over(range(9)).map_batches(fail_on_second_batch, 3).concurrently('threads', exceptions='return'))
+    assert results[:3] == [0, 1, 2] and results[6:] == [6, 7, 8]
+    assert all(isinstance(x, TypeError) for x in results[3:6])
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_concurrently(how):
+    loop = loop_over(range(100)).map(abs).map_batches(double_all, 8).returning(enumerations=True).concurrently(how, num_workers=3, max_in_flight=32)
+    assert_loops_as_expected(loop, [(x, 2 * x) for x in range(100)])
+
+
+def test_one_task_per_batch():
+    def sleep_per_call(batch):
+        time.sleep(0.05)
+        return batch
+
+    start = time.perf_counter()
+    loop_over(range(40)).map_batches(sleep_per_call, 10).concurrently('threads', num_workers=4).exhaust()
+    assert time.perf_counter() - start < 0.15
+
+
+def test_async_for():
+    async def main():
+        return [x async for x in loop_over(range(5)).map_batches(double_all, 2)]
+
+    assert asyncio.run(main()) == [2 * x for x in range(5)]
+
+
+def test_asyncio():
+    loop = loop_over(range(5)).map_batches(double_all, 2).concurrently('asyncio')
+    assert_loop_raises(loop, TypeError)
@@ -0,0 +1,126 @@
+from multiprocessing import Pool as ProcessPool
+from multiprocessing.dummy import Pool as ThreadPool
+from threading import Thread
+from os import getpid
+import time
+
+import pytest
+
+from src.loop import loop_over, pools
+
+from .utilities import assert_loops_as_expected, assert_loop_raises
+
+
+def wait_and_get_pid(x):
+    time.sleep(0.01)
+    return getpid()
+
+
+def add(x, y):
+    return x + y
+
+
+def is_odd(x):
+    return x % 2 == 1
+
+
+def test_get_same_handle():
+    handle = pools.get('threads', 3)
+    assert pools.get('threads', 3) is handle
+    assert pools.get('threads', 4) is not handle
+
+
+def test_warm_processes():
+    with pools.PoolHandle('processes', 3) as handle:
+        first = set(loop_over(range(30)).map(wait_and_get_pid).concurrently(pool=handle))
+        second = set(loop_over(range(30)).map(wait_and_get_pid).concurrently(pool=handle))
+        assert first == second
+        assert len(first) == 3
+
+
+def test_not_shut_down_by_loop():
+    with pools.PoolHandle('threads', 2) as handle:
+        for _ in range(3):
+            loop = loop_over(range(10)).map(lambda x: 2 * x).concurrently(pool=handle)
+            assert_loops_as_expected(loop, [2 * x for x in range(10)])
+
+        assert handle.is_running
+
+    assert not handle.is_running
+
+
+def test_shared_by_concurrent_loops():
+    results = {}
+
+    def run(offset):
+        results[offset] = list(loop_over(range(100)).map(lambda x: x + offset).concurrently(pool=handle, chunksize=3))
+
+    with pools.PoolHandle('processes', 4) as handle:
+        threads = [Thread(target=run, args=(offset,)) for offset in range(5)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+    assert results == {offset: [x + offset for x in range(100)] for offset in range(5)}
+
+
+def test_use_after_shutdown():
+    handle = pools.PoolHandle('threads', 2)
+    handle.shutdown()
+    handle.shutdown()
+
+    assert_loop_raises(loop_over(range(10)).concurrently(pool=handle), RuntimeError)
+
+
+def test_shutdown_all():
+    handle = pools.get('threads', 5)
+    pools.shutdown()
+    assert not handle.is_running
+    assert pools.get('threads', 5) is not handle
+
+
+def test_multiprocessing_pool():
+    with ThreadPool(2) as pool:
+        loop = loop_over(range(10)).map(lambda x: 2 * x).concurrently(pool=pool, ordered=False)
+        assert sorted(loop) == [2 * x for x in range(10)]
+        loop = loop_over(range(10)).map(lambda x: 2 * x).concurrently(pool=pool)
+        assert_loops_as_expected(loop, [2 * x for x in range(10)])
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+@pytest.mark.parametrize('chunksize', [None, 3])
+def test_multiprocessing_process_pool(ordered, chunksize):
+    # Sends its tasks with `pickle` rather than dill, so the compiled functions must be sent in a way it supports.
+    with ProcessPool(2) as pool:
+        loop = loop_over(range(10)).map(add, 1).filter(is_odd).concurrently(pool=pool, ordered=ordered, chunksize=chunksize)
+        results = list(loop)
+        assert (results if ordered else sorted(results)) == [1, 3, 5, 7, 9]
+
+
+def pair(x):
+    return x, x + 1
+
+
+def double_all(batch):
+    return [2 * x for x in batch]
+
+
+@pytest.mark.parametrize('profiled', [False, True])
+def test_compiled_stages_on_pickle_pool(profiled):
+    # Every kind of stage the compiler generates code for (adapted arguments, unpacking, filters and batches), sent through `pickle`.
+    with ProcessPool(2) as pool:
+        loop = (loop_over(range(8)).next_call_with(args_first=True).map(pow, 2).map(pair).next_call_with(unpacking='*').map(add).filter(is_odd)
+                .map_batches(double_all, 2).concurrently(pool=pool))
+
+        if profiled:
+            loop = loop.profile()
+
+        assert list(loop) == [2 * (2 ** x + 2 ** x + 1) for x in range(8)]
+
+
+def test_pool_and_how():
+    with pytest.raises(ValueError):
+        loop_over(range(10)).concurrently('threads', pool=pools.get('threads'))
@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import pytest
+
+from src.loop import loop_over
+
+
+def square(x):
+    return x * x
+
+
+def is_even(x):
+    return x % 2 == 0
+
+
+def nap(x):
+    time.sleep(0.005)
+    return x
+
+
+def stage(stats, name):
+    return next(stage for stage in stats['stages'] if stage['name'] == name)
+
+
+def test_not_profiled_is_plain_generator():
+    iterator = iter(loop_over(range(10)).map(square))
+    assert iterator.gi_code.co_name == 'run'  # type: ignore
+    assert 'perf_counter' not in iterator.gi_frame.f_globals  # type: ignore
+
+
+def test_sequential():
+    loop = loop_over(range(100)).map(square).filter(is_even).map(nap).profile()
+    assert list(loop) == [x * x for x in range(0, 100, 2)]
+    stats = loop.stats()
+    segment, = stats['segments']
+    assert 'workers' not in segment
+    assert [(s['name'], s['kind'], s['calls']) for s in segment['stages']] == [('square', 'map', 100), ('is_even', 'filter', 100), ('nap', 'map', 50)]
+    assert stage(segment, 'is_even')['selectivity'] == 0.5
+    nap_stats = stage(segment, 'nap')
+    assert 0.005 <= nap_stats['mean_seconds'] < 0.05
+    assert 0.8 * 0.005 <= nap_stats['p50_seconds'] <= nap_stats['p99_seconds']
+    assert nap_stats['total_seconds'] == pytest.approx(50 * nap_stats['mean_seconds'])
+    assert stats['wait_seconds'] >= nap_stats['total_seconds']
+    assert segment['wall_seconds'] >= nap_stats['total_seconds']
+
+
+def test_consumer_seconds():
+    loop = loop_over(range(5)).map(square).profile()
+
+    for _ in loop:
+        time.sleep(0.01)
+
+    assert loop.stats()['consumer_seconds'] >= 0.05
+    assert loop.stats()['wait_seconds'] < 0.05
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+@pytest.mark.parametrize('chunksize', [None, 'auto'])
+def test_concurrent(how, chunksize):
+    loop = loop_over(range(200)).filter(is_even).map(nap).concurrently(how, num_workers=2, chunksize=chunksize).profile()
+    assert list(loop) == list(range(0, 200, 2))
+    segment, = loop.stats()['segments']
+    assert stage(segment, 'is_even')['calls'] == 200
+    assert stage(segment, 'nap')['calls'] == 100
+    assert stage(segment, 'nap')['total_seconds'] >= 0.5
+    workers = segment['workers']
+    assert workers['count'] == 2
+    assert workers['busy_seconds'] >= stage(segment, 'nap')['total_seconds']
+    assert 0 < workers['utilization'] <= 1.05
+
+
+def test_segments_and_batches():
+    loop = (loop_over(range(50)).map(square).concurrently('threads', num_workers=2)
+            .map_batches(lambda batch: [x + 1 for x in batch], 8).filter(is_even).concurrently('threads', num_workers=3).profile())
+    assert list(loop) == [x * x + 1 for x in range(50) if (x * x + 1) % 2 == 0]
+    first, second = loop.stats()['segments']
+    assert [s['kind'] for s in first['stages']] == ['map']
+    assert [(s['kind'], s['calls']) for s in second['stages']] == [('map_batches', 7), ('filter', 50)]
+    assert second['workers']['count'] == 3
+
+
+def test_disabled():
+    loop = loop_over(range(10)).map(square).profile().profile(False)
+    loop.exhaust()
+    assert loop.stats() == {'segments': [{'chunksize': None}]}
+
+
+def test_exceptions_returned():
+    loop = loop_over([1, 0, 2]).map(lambda x: 1 / x).concurrently('threads', exceptions='return').profile()
+    outputs = list(loop)
+    assert isinstance(outputs[1], ZeroDivisionError)
+    assert loop.stats()['segments'][0]['stages'][0]['calls'] == 2  # Calls which raised are not timed.
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_batch_exceptions_returned(how):
+    def invert_all(batch):
+        return [1 / x for x in batch]
+
+    loop = loop_over([1, 2, 0, 3, 4, 5]).map_batches(invert_all, 2).concurrently(how, exceptions='return').profile()
+    outputs = list(loop)
+    assert all(isinstance(out, ZeroDivisionError) for out in outputs[2:4])
+    assert loop.stats()['segments'][0]['stages'][0]['calls'] == 2  # The batch which raised is not timed.
+
+
+def test_async_not_supported():
+    async def double(x):
+        return 2 * x
+
+    with pytest.raises(TypeError):
+        list(loop_over(range(3)).map(double).concurrently('asyncio').profile())
+
+
+def test_aiter_sequential():
+    loop = loop_over(range(5)).map(square).profile()
+
+    async def consume():
+        return [x async for x in loop]
+
+    assert asyncio.run(consume()) == [x * x for x in range(5)]
+    assert loop.stats()['segments'][0]['stages'][0]['calls'] == 5
@@ -109,3 +109,54 @@ def _capture_tqdm_outputs_without_newlines(loop: Loop, **kwargs) -> List[str]:
     outputs = [part.rstrip() for part in output.split('\r')]
 
     return outputs
+
+
+@pytest.mark.parametrize('coalescing', [dict(update_every=7), dict(update_interval=0.01), dict(update_every=1000, update_interval=60)])
+def test_coalesced_dynamic_postfix(coalescing):
+    inp = list(range(0, 100, 2))
+    out = [x**2 for x in inp]
+    loop = loop_over(inp).map(pow, 2).returning(enumerations=True, inputs=True, outputs=True)
+    prints = _capture_tqdm_outputs_without_newlines(loop, total=len, postfix_str=lambda x: f'idx={x[0]},inp={x[1]},out={x[2]}', **coalescing)
+
+    pattern = rf'100%\|(.*)\| {len(inp)}/{len(inp)} \[.+<.+, .+, idx={len(inp) - 1},inp={inp[-1]},out={out[-1]}\]'
+    assert re.fullmatch(pattern, prints[-1])
+
+
+@pytest.mark.parametrize('concurrent', [False, True])
+def test_coalesced_filtering(concurrent):
+    n = 100
+    loop = loop_over(range(n)).filter(lambda x: x%2 == 0)
+
+    if concurrent:
+        loop = loop.concurrently('threads')
+
+    prints = _capture_tqdm_outputs_without_newlines(loop, total=n, update_every=7)
+
+    pattern = rf'100%\|(.*)\| {n//2}/{n//2} \[.+<.+, .+\]'
+    assert re.fullmatch(pattern, prints[-1])
+
+
+def test_coalesced_postfix_evaluated_per_update():
+    calls = []
+
+    def postfix(x):
+        calls.append(x)
+        return x
+
+    with io.StringIO() as file:
+        loop_over(range(100)).show_progress(postfix_str=postfix, update_every=10, file=file).exhaust()
+
+    assert calls == list(range(9, 100, 10))
+
+
+@pytest.mark.parametrize('coalescing', [dict(), dict(update_every=7), dict(update_interval=0.01)])
+def test_coalesced_early_break(coalescing):
+    with io.StringIO() as file:
+        for i, x in enumerate(loop_over(range(100)).filter(lambda x: x%2 == 0).show_progress(total=100, file=file, **coalescing)):
+            if i == 9:
+                break
+
+        output = file.getvalue()
+
+    # 10 items were returned and 9 were skipped before the loop was left.
+    assert re.search(r'\| 10/91 \[', output.split('\r')[-1])
@@ -54,3 +54,98 @@ def test_sum():
     expected = sum(range(10))
     result = loop_over(range(10)).reduce(lambda x,y: x+y)
     assert expected == result
+
+
+def add(x, y):
+    return x + y
+
+
+def concat(x, y):
+    return x + y
+
+
+def square(x):
+    return x * x
+
+
+def is_odd(x):
+    return x % 2 == 1
+
+
+def count_into(counter, word):
+    counter[word] += 1
+    return counter
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+@pytest.mark.parametrize('chunksize', [None, 7, 'auto'])
+def test_associative_sum(how, chunksize):
+    loop = loop_over(range(10000)).map(square).filter(is_odd).concurrently(how, num_workers=2, chunksize=chunksize)
+    assert loop.reduce(add, associative=True) == sum(x * x for x in range(10000) if x % 2)
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_associative_keeps_order(ordered):
+    # Concatenation is associative but not commutative.
+    loop = loop_over(range(3000)).map(str).concurrently('threads', num_workers=4, chunksize=16, ordered=ordered)
+    assert loop.reduce(concat, associative=True) == ''.join(map(str, range(3000)))
+
+
+def test_associative_initializer():
+    assert loop_over(range(100)).concurrently('threads', num_workers=2).reduce(add, 1000, associative=True) == 1000 + sum(range(100))
+    assert loop_over(['a', 'b', 'c']).concurrently('threads').reduce(concat, '>', associative=True) == '>abc'
+
+
+def test_associative_empty():
+    assert loop_over([]).concurrently('threads').reduce(add, 5, associative=True) == 5
+
+    with pytest.raises(TypeError):
+        loop_over([]).concurrently('threads').reduce(add, associative=True)
+
+    assert loop_over(range(10)).filter(lambda x: x > 100).concurrently('threads').reduce(add, 0, associative=True) == 0
+
+
+def test_associative_combine():
+    from collections import Counter
+    import operator
+
+    words = ['a', 'b', 'a', 'c', 'a', 'b'] * 500
+    counts = loop_over(words).concurrently('processes', num_workers=2).reduce(count_into, Counter(), associative=True, combine=operator.add)
+    assert counts == Counter(words)
+
+
+def test_associative_returning():
+    loop = loop_over(range(100)).map(square).returning(enumerations=True, inputs=True, outputs=True).concurrently('threads', chunksize=8)
+    assert loop.reduce(max, associative=True) == (99, 99, 99 * 99)
+
+
+def test_associative_raises():
+    def inverse(x):
+        return 1 / x
+
+    with pytest.raises(ZeroDivisionError):
+        loop_over([1, 2, 0, 3]).map(inverse).concurrently('threads', exceptions='return').reduce(add, associative=True)
+
+
+def test_associative_segments():
+    loop = loop_over(range(1000)).filter(is_odd).concurrently('threads', num_workers=2).map(square).concurrently('processes', num_workers=2)
+    assert loop.reduce(add, associative=True) == sum(x * x for x in range(1000) if x % 2)
+
+
+def test_associative_sends_partials():
+    loop = loop_over(range(100000)).concurrently('threads', num_workers=2)
+    assert loop.reduce(add, associative=True) == sum(range(100000))
+    segment, = loop.stats()['segments']
+    assert len(segment['chunksizes']) > 1 and max(segment['chunksizes']) > 100
+
+
+def test_combine_requires_associative_and_initializer():
+    with pytest.raises(ValueError):
+        loop_over(range(10)).reduce(add, 0, combine=add)
+
+    with pytest.raises(ValueError):
+        loop_over(range(10)).reduce(add, associative=True, combine=add)
+
+
+def test_associative_sequential():
+    assert loop_over(range(10)).reduce(add, associative=True) == 45
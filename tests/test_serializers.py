@@ -0,0 +1,110 @@
+import pickle
+import sys
+import time
+
+import pytest
+
+from src.loop import loop_over
+
+
+def add(x, y):
+    return x + y
+
+
+def inverse(x):
+    return 1 / x
+
+
+def is_even(x):
+    return x % 2 == 0
+
+
+def nap_unless_zero(x):
+    if x:
+        time.sleep(10)
+
+    return x
+
+
+def flaky(path, x):
+    marker = path / str(x)
+
+    if not marker.exists():
+        marker.touch()
+        raise ValueError(x)
+
+    return x
+
+
+@pytest.mark.parametrize('serializer', ['pickle', 'cloudpickle'])
+@pytest.mark.parametrize('start_method', [None, 'spawn'])
+def test_serializers(serializer, start_method):
+    if serializer == 'cloudpickle':
+        pytest.importorskip('cloudpickle')
+
+    loop = loop_over(range(10)).map(add, 1).filter(is_even).concurrently('processes', num_workers=2, serializer=serializer, start_method=start_method)
+    assert list(loop) == [2, 4, 6, 8, 10]
+
+
+@pytest.mark.parametrize('chunksize', [None, 3, 'auto'])
+@pytest.mark.parametrize('ordered', [True, False])
+def test_chunks(chunksize, ordered):
+    loop = loop_over(range(50)).map(add, 1).concurrently('processes', num_workers=2, serializer='pickle', chunksize=chunksize, ordered=ordered)
+    results = list(loop)
+    assert (results if ordered else sorted(results)) == list(range(1, 51))
+
+
+def test_exceptions_returned():
+    results = list(loop_over(range(3)).map(inverse).concurrently('processes', num_workers=2, serializer='pickle', exceptions='return'))
+    assert isinstance(results[0], ZeroDivisionError)
+    assert results[1:] == [1, 0.5]
+
+
+def test_map_batches_and_returning():
+    loop = loop_over('abc').map_batches(sorted, 2).returning(enumerations=True, inputs=True).concurrently('processes', num_workers=2, serializer='pickle')
+    assert list(loop) == [(0, 'a', 'a'), (1, 'b', 'b'), (2, 'c', 'c')]
+
+
+def test_reduce_in_workers():
+    assert loop_over(range(100)).map(add, 1).concurrently('processes', num_workers=2, serializer='pickle').reduce(add, associative=True) == 5050
+
+
+def test_lambdas():
+    pytest.importorskip('cloudpickle')
+    offset = 10
+    assert list(loop_over(range(3)).map(lambda x: x + offset).concurrently('processes', num_workers=2, serializer='cloudpickle')) == [10, 11, 12]
+
+    with pytest.raises((pickle.PicklingError, AttributeError)):  # Depending on the Python version.
+        list(loop_over(range(3)).map(lambda x: x + offset).concurrently('processes', num_workers=2, serializer='pickle'))
+
+
+def test_cloudpickle_missing(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'cloudpickle', None)  # Makes importing it fail.
+
+    with pytest.raises(ImportError, match='loop-python\\[cloudpickle\\]'):
+        list(loop_over(range(3)).map(add, 1).concurrently('processes', num_workers=2, serializer='cloudpickle'))
+
+
+def test_retries(tmp_path):
+    loop = loop_over(range(4)).next_call_with(args_first=True).map(flaky, tmp_path).concurrently('processes', num_workers=2, serializer='pickle', retries=1)
+    assert list(loop) == [0, 1, 2, 3]
+
+
+def test_stops_early():
+    start = time.perf_counter()
+    assert loop_over(range(4)).map(nap_unless_zero).concurrently('processes', num_workers=2, serializer='pickle').first() == 0
+    assert time.perf_counter() - start < 5
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently('processes', serializer='json')  # type: ignore
+
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently('processes', serializer='pickle', start_method='thread')  # type: ignore
+
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently('threads', serializer='pickle')
+
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently('processes', start_method='spawn')
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from src.loop import loop_over, pools
+
+
+def square(x):
+    return x * x
+
+
+def counting(calls):
+    lock = threading.Lock()
+
+    def function(x):
+        with lock:
+            calls.append(x)
+
+        time.sleep(0.001)
+        return x
+
+    return function
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_first(how):
+    assert loop_over(range(10)).map(square).filter(lambda x: x > 10).first() == 16
+    assert loop_over(range(10)).map(square).filter(lambda x: x > 10).concurrently(how).first() == 16
+
+
+def test_first_empty():
+    with pytest.raises(ValueError):
+        loop_over([]).first()
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_take(how):
+    assert loop_over(range(10)).map(square).take(3) == [0, 1, 4]
+    assert loop_over(range(10)).map(square).concurrently(how).take(3) == [0, 1, 4]
+    assert loop_over(range(2)).map(square).concurrently(how).take(3) == [0, 1]
+    assert loop_over(range(2)).take(0) == []
+
+
+def test_take_negative():
+    with pytest.raises(ValueError):
+        loop_over(range(2)).take(-1)
+
+
+def test_find():
+    assert loop_over(['apple', 'banana', 'cherry']).concurrently('threads').find(lambda word: 'n' in word) == 'banana'
+    assert loop_over(['apple', 'banana', 'cherry']).find(lambda word: 'z' in word) is None
+
+
+def test_find_returning():
+    assert loop_over('abc').map(str.upper).returning(enumerations=True, inputs=True).find(lambda retval: retval[2] == 'B') == (1, 'b', 'B')
+
+
+def test_any():
+    assert loop_over(range(10)).map(square).concurrently('threads').any(lambda x: x > 50)
+    assert not loop_over(range(5)).any(lambda x: x > 50)
+    assert loop_over([0, 0, 1]).any()
+    assert not loop_over([]).any()
+
+
+def test_all():
+    assert not loop_over(range(10)).map(square).concurrently('threads').all(lambda x: x < 50)
+    assert loop_over(range(5)).all(lambda x: x < 50)
+    assert not loop_over([1, 0, 1]).all()
+    assert loop_over([]).all()
+
+
+def test_stops_feeding_persistent_pool():
+    calls = []
+    handle = pools.PoolHandle('threads', 2)
+
+    try:
+        assert loop_over(range(100_000)).map(counting(calls)).concurrently(pool=handle).find(lambda x: x == 10) == 10
+
+        # The follow-up loop runs right away, the remaining items were dropped rather than queued ahead of it.
+        start = time.perf_counter()
+        assert loop_over([1]).map(square).concurrently(pool=handle).first() == 1
+        assert time.perf_counter() - start < 1
+    finally:
+        handle.shutdown()
+
+    assert len(calls) < 1000
+
+
+def test_stops_owned_pool():
+    calls = []
+    assert loop_over(range(100_000)).map(counting(calls)).concurrently('threads', num_workers=2).take(5) == [0, 1, 2, 3, 4]
+
+    num_calls = len(calls)
+    time.sleep(0.05)
+    assert len(calls) == num_calls < 1000
@@ -0,0 +1,146 @@
+from functools import partial
+import os
+import time
+
+import pytest
+
+from src.loop import loop_over
+from src.loop.supervision import WorkerCrashedError
+
+from .utilities import assert_loop_raises
+
+
+def hang_on_three(x):
+    if x == 3:
+        time.sleep(5)
+
+    return x
+
+
+def fail_first_attempts(path, attempts, x):
+    # Counts the attempts in a file, so it works across processes.
+    with open(path / f'{x}.txt', 'a+') as f:
+        f.write('.')
+        f.seek(0)
+        count = len(f.read())
+
+    if count <= attempts:
+        raise ValueError(f'Attempt {count} of {x}')
+
+    return x
+
+
+def crash_on_three(x):
+    if x == 3:
+        os._exit(1)
+
+    return x
+
+
+def nap(x):
+    time.sleep(0.1)
+    return x
+
+
+def slow_first(x):
+    time.sleep(0.3 if x == 0 else 0.0)
+    return x
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_timeout_returns_error(how):
+    start = time.perf_counter()
+    results = list(loop_over(range(6)).map(hang_on_three).concurrently(how, num_workers=2, exceptions='return', timeout=0.5))
+    assert time.perf_counter() - start < 4
+
+    assert [out for out in results if not isinstance(out, Exception)] == [0, 1, 2, 4, 5]
+    assert isinstance(results[3], TimeoutError)
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_timeout_raises(how):
+    assert_loop_raises(loop_over(range(6)).map(hang_on_three).concurrently(how, num_workers=2, timeout=0.5), TimeoutError)
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_timeout_measured_from_start(how):
+    # With a single worker, items wait for each other, which does not count towards their timeout.
+    assert list(loop_over(range(5)).map(nap).concurrently(how, num_workers=1, timeout=0.3)) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_retries_succeed(how, tmp_path):
+    function = partial(fail_first_attempts, tmp_path, 2)
+    assert list(loop_over(range(8)).map(function).concurrently(how, num_workers=2, retries=2)) == list(range(8))
+
+
+@pytest.mark.parametrize('how', ['threads', 'processes'])
+def test_retries_exhausted(how, tmp_path):
+    function = partial(fail_first_attempts, tmp_path, 3)
+    results = list(loop_over(range(4)).map(function).concurrently(how, num_workers=2, retries=2, exceptions='return'))
+    assert all(isinstance(out, ValueError) for out in results)
+    assert [str(out) for out in results] == [f'Attempt 3 of {x}' for x in range(4)]
+
+
+def test_backoff(tmp_path):
+    function = partial(fail_first_attempts, tmp_path, 2)
+    start = time.perf_counter()
+    assert list(loop_over([0]).map(function).concurrently('threads', retries=2, backoff=0.2)) == [0]
+    assert time.perf_counter() - start >= 0.2 + 0.4
+
+
+def test_crashed_worker_reported():
+    results = list(loop_over(range(6)).map(crash_on_three).concurrently('processes', num_workers=2, exceptions='return', timeout=10))
+    assert results[:3] + results[4:] == [0, 1, 2, 4, 5]
+    assert isinstance(results[3], WorkerCrashedError)
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+@pytest.mark.parametrize('chunksize', [None, 2])
+def test_crashed_worker_unsupervised(ordered, chunksize):
+    start = time.perf_counter()
+
+    with pytest.raises(WorkerCrashedError):
+        loop_over(range(6)).map(crash_on_three).concurrently('processes', num_workers=2, ordered=ordered, chunksize=chunksize).exhaust()
+
+    assert time.perf_counter() - start < 10
+
+
+def test_crashed_worker_retried(tmp_path):
+    def crash_once(x):
+        if x == 3 and not os.path.exists(tmp_path / 'crashed'):
+            open(tmp_path / 'crashed', 'w').close()
+            os._exit(1)
+
+        return x
+
+    assert list(loop_over(range(6)).map(crash_once).concurrently('processes', num_workers=2, retries=1)) == list(range(6))
+
+
+def test_unordered_and_batches():
+    results = loop_over(range(20)).map(slow_first).concurrently('threads', num_workers=3, ordered=False, timeout=5)
+    assert sorted(results) == list(range(20))
+
+    batches = loop_over(range(20)).map_batches(lambda batch: [2 * x for x in batch], 4).concurrently('threads', num_workers=2, retries=1)
+    assert list(batches) == [2 * x for x in range(20)]
+
+
+def test_max_in_flight():
+    assert list(loop_over(range(50)).map(slow_first).concurrently('threads', num_workers=4, max_in_flight=2, timeout=5)) == list(range(50))
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently('threads', timeout=0)
+
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently('threads', retries=-1)
+
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently('threads', backoff=-1)
+
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently('threads', timeout=1, chunksize=4)
+
+    with pytest.raises(ValueError):
+        loop_over(range(3)).concurrently('asyncio', timeout=1)
@@ -0,0 +1,88 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.pool import ThreadPool
+import os
+
+import pytest
+
+from src.loop import loop_over, pools
+
+from .utilities import assert_loop_raises
+
+
+np = pytest.importorskip('numpy')
+
+
+def shm_segments():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+def assert_arrays_equal(actual, expected):
+    actual = list(actual)
+    assert len(actual) == len(expected)
+
+    for a, e in zip(actual, expected):
+        assert isinstance(a, np.ndarray)
+        np.testing.assert_array_equal(a, e)
+
+
+@pytest.mark.parametrize('chunksize', [None, 4])
+@pytest.mark.parametrize('ordered', [True, False])
+def test_arrays_in_and_out(chunksize, ordered):
+    before = shm_segments()
+    arrays = [np.full((300, 500), i, dtype=np.float32) for i in range(30)]
+    loop = loop_over(arrays).map(np.negative).concurrently('processes', num_workers=2, chunksize=chunksize, ordered=ordered, transport='shm')
+    outputs = sorted(loop, key=lambda x: -x[0, 0]) if not ordered else list(loop)
+    assert_arrays_equal(outputs, [-x for x in arrays])
+    assert shm_segments() == before
+
+
+def test_outputs_only():
+    # The first outputs are pickled, until their size is known.
+    loop = loop_over(range(20)).map(lambda i: np.arange(i, i + 2**18)).concurrently('processes', num_workers=2, transport='shm')
+    assert_arrays_equal(loop, [np.arange(i, i + 2**18) for i in range(20)])
+
+
+def test_views_and_other_objects():
+    arrays = [np.arange(i, i + 2**18) for i in range(10)]
+    loop = loop_over(arrays + ['not an array']).map(lambda x: x[::2] if isinstance(x, np.ndarray) else x).returning(inputs=True)
+    loop = loop.concurrently('processes', num_workers=2, transport='shm')
+    outputs = list(loop)
+
+    for (inp, out), array in zip(outputs, arrays):
+        assert inp is array
+        np.testing.assert_array_equal(out, array[::2])
+
+    assert outputs[-1] == ('not an array', 'not an array')
+
+
+def test_exceptions():
+    arrays = [np.arange(10) for _ in range(5)]
+    loop = loop_over(arrays).map(lambda x: x / 0 if x.sum() else x).map(lambda x: 1 / 0).concurrently('processes', num_workers=2, transport='shm', exceptions='return')
+    assert all(isinstance(out, ZeroDivisionError) for out in loop)
+    assert_loop_raises(loop_over(arrays).map(lambda x: 1 / 0).concurrently('processes', num_workers=2, transport='shm'), ZeroDivisionError)
+
+
+def test_persistent_pool():
+    arrays = [np.full(2**18, i) for i in range(10)]
+
+    with pools.PoolHandle('processes', 2) as handle:
+        for _ in range(3):
+            loop = loop_over(arrays).map(np.negative).concurrently(pool=handle, transport='shm')
+            assert_arrays_equal(loop, [-x for x in arrays])
+
+
+def test_requires_processes():
+    with pytest.raises(ValueError):
+        loop_over(range(10)).concurrently('threads', transport='shm')
+
+    with pytest.raises(ValueError):
+        loop_over(range(10)).concurrently('processes', transport='mmap')  # type: ignore
+
+    with pools.PoolHandle('threads', 2) as handle, ThreadPool(2) as pool, ThreadPoolExecutor(2) as executor:
+        for kwargs in [{'pool': handle}, {'pool': pool}, {'executor': executor}]:
+            with pytest.raises(ValueError):
+                loop_over(range(10)).concurrently(transport='shm', **kwargs)  # type: ignore
+
+    with ProcessPoolExecutor(2) as executor:
+        arrays = [np.full(2**18, i) for i in range(4)]
+        assert_arrays_equal(loop_over(arrays).map(np.negative).concurrently(executor=executor, transport='shm'), [-x for x in arrays])
@@ -1,4 +1,4 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from operator import add
 
 from src.loop import loop_range, loop_over
@@ -228,3 +228,19 @@ def test_reduce() -> None:
     f: Tuple[int, str] = loop_over(inp).map(str).returning(enumerations=True).reduce(add)
     g: Tuple[int, float] = loop_over(inp).map(str).returning(enumerations=True, inputs=True, outputs=False).reduce(add)
     h: Tuple[int, float, str] = loop_over(inp).map(str).returning(enumerations=True, inputs=True).reduce(add)
+
+
+def test_async_for() -> None:
+    async def test_simple() -> None:
+        x: int
+        async for x in loop_range(10): pass
+
+    async def test_enums_and_outputs() -> None:
+        y: Tuple[int, str]
+        async for y in loop_over(['a', 'b']).returning(enumerations=True): pass
+
+
+def test_short_circuit() -> None:
+    x: int = loop_range(10).first()
+    y: List[Tuple[int, str]] = loop_over('abc').returning(enumerations=True).take(2)
+    z: Optional[str] = loop_over('abc').find(lambda c: c > 'a')